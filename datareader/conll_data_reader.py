@@ -5,17 +5,33 @@ The data reader will also check if the input file
 has the required amount of columns needed for the
 extraction. The existence of the last column (coreference
 information) is not enforced. If it doesn't exists the
-regex expression will simply not find any coreference information
+regex expression will simply not find any coreference information.
+Besides paths, documents can be parsed from strings, file-like
+objects or columns that are already split (see ConllParser.parse)
+OntoNotes files can contain multiple parts (#begin document ...;
+part 000), each part is an independent document and can be parsed
+on its own: the byte offset of each part is found in a single scan
+of the file and each part is read from its offset without reading
+the previous ones (see ConllParser.locate_parts and read_part).
+Files compressed with
+gzip, bzip2 or xz are decompressed while reading (see sources.py).
+Streams can also be parsed one sentence at a time, as soon as each
+sentence is complete (see ConllParser.parse_sentences)
 """
 
-from pathlib import Path
+import io
 import re
 
 from datareader.errors import InvalidInputFile
+from datareader.sources import open_binary, open_text
 
 
-class ConllParser:
-
+class ParseState:
+    """
+    information collected while parsing a single document.
+    Each parse has its own state, so that the same ConllParser
+    can be used at the same time (e.g. by multiple threads)
+    """
     def __init__(self):
         self.sentences = []
         self.tokens = []
@@ -27,9 +43,11 @@ class ConllParser:
         self.ner_open = False
         self.tok_counter = 0
 
-    def __call__(self, path):
-        self.__parse_connl(path)
-        to_return = (
+    def collect(self):
+        """
+        return the parsed information
+        """
+        return (
             self.sentences,
             self.tokens,
             self.pos_tags,
@@ -38,12 +56,167 @@ class ConllParser:
             self.coref
         )
 
-        # reset for next file
-        self.__init__()
 
-        return to_return
+class ConllParser:
+    """
+    the parser has no state of its own, so that
+    one instance can be shared safely
+    """
+
+    def __call__(self, path, part=None, offset=None):
+        state = ParseState()
+        self.__parse_connl(state, path, part, offset)
+        return state.collect()
+
+    def parse_string(self, text, part=None):
+        """
+        parse a document in CONLL format that is
+        already in memory as a string
+        """
+        state = ParseState()
+        self.__parse_lines(
+            state, self.select_part(text.splitlines(), part), "<string>"
+        )
+        return state.collect()
+
+    def parse_file(self, infile, part=None):
+        """
+        parse a document in CONLL format from a
+        file-like object opened in text mode
+        """
+        state = ParseState()
+        self.__parse_lines(
+            state, self.select_part(infile, part),
+            getattr(infile, "name", "<file>")
+        )
+        return state.collect()
+
+    @staticmethod
+    def part_number(line, position):
+        """
+        returns the number of the part that begins with line:
+            #begin document (bc/cctv/00/cctv_0000); part 001 --> "001"
+        headers without number are numbered by their position
+        """
+        match = re.search(r"part\s+(\d+)", line)
+        return match.group(1) if match else f"{position:03d}"
+
+    @classmethod
+    def iter_parts(cls, lines):
+        """
+        yields the number and the lines of each part in a single
+        pass over an iterable of lines. The lines of a part are
+        the same returned by select_part
+        """
+        number = None
+        current = None
+        position = 0
+        for line in lines:
+            if line.startswith("#begin document"):
+                if current is not None:
+                    yield number, current
+                number = cls.part_number(line, position)
+                current = [line]
+                position += 1
+            elif current is not None:
+                if line.startswith("#end document"):
+                    yield number, current
+                    current = None
+                else:
+                    current.append(line)
+
+        if current is not None:
+            yield number, current
+
+    def locate_parts(self, path):
+        """
+        returns the number and the byte offset of the header of
+        each part of a file without parsing its content. The file
+        is scanned once, each part can then be read on its own
+        (see read_part). A file without headers contains a single
+        part (None, 0)
+        """
+        parts = []
+        offset = 0
+        with open_binary(path) as infile:
+            for line in infile:
+                if line.startswith(b"#begin document"):
+                    number = self.part_number(
+                        line.decode("utf-8"), len(parts)
+                    )
+                    parts.append((number, offset))
+                offset += len(line)
+
+        return parts if parts else [(None, 0)]
+
+    @classmethod
+    def read_part(cls, path, offset=None):
+        """
+        yields the lines of the part of a file whose header is at
+        the byte offset (see locate_parts). The previous parts are
+        skipped with a seek, the lines after the end of the part
+        are not read. With offset None the whole file is read
+        """
+        if offset is None:
+            with open_text(path) as infile:
+                yield from infile
+            return
+
+        with open_binary(path) as infile:
+            infile.seek(offset)
+            lines = io.TextIOWrapper(infile, encoding="utf-8")
+            yield from cls.select_part(lines, 0)
+
+    @staticmethod
+    def select_part(lines, part):
+        """
+        yields only the lines of the part-th document (0 based
+        position in the file). With part None all lines are
+        returned. Lines after the end of the part are not read
+        """
+        if part is None:
+            yield from lines
+            return
+
+        current = -1
+        for line in lines:
+            if line.startswith("#begin document"):
+                current += 1
+            if current == part:
+                if line.startswith("#end document"):
+                    return
+                yield line
+            elif current > part:
+                return
+
+    def parse_columns(self, sentences):
+        """
+        parse a document that is already split in columns:
+        a list of sentences, each sentence is a list of
+        rows and each row a list with the CONLL columns
+        """
+        def lines():
+            for sentence in sentences:
+                for row in sentence:
+                    yield " ".join(row)
+                yield ""
+
+        state = ParseState()
+        self.__parse_lines(state, lines(), "<columns>")
+        return state.collect()
+
+    def parse(self, source):
+        """
+        parse a document given as a string in CONLL format,
+        a file-like object or a list of sentences split in columns
+        """
+        if isinstance(source, str):
+            return self.parse_string(source)
+        elif hasattr(source, "read"):
+            return self.parse_file(source)
+        return self.parse_columns(source)
 
-    def __extract_ne(self, ner):
+    def __extract_ne(self, state, ner):
         """
         extract information from the named entity column
         """
@@ -53,23 +226,23 @@ class ConllParser:
         # start collecting ner tags
         if opening_ner is not None:
             ner_tag = opening_ner.group(2)
-            self.ner.append(ner_tag)
-            self.ner_open = True
+            state.ner.append(ner_tag)
+            state.ner_open = True
 
         # if ner is open, copy last ner tag
-        elif self.ner_open is True:
-            last_element = self.ner[-1]
-            self.ner.append(last_element)
+        elif state.ner_open is True:
+            last_element = state.ner[-1]
+            state.ner.append(last_element)
 
         else:
-            self.ner.append(None)
+            state.ner.append(None)
 
         # check for closing ner
         closing_ner = re.match(r"(.+)\)", ner)
         if closing_ner:
-            self.ner_open = False
+            state.ner_open = False
 
-    def __extract_golden_coref(self, coref):
+    def __extract_golden_coref(self, state, coref):
         """
         extract golden coreference clusters
         """
@@ -79,26 +252,26 @@ class ConllParser:
 
         # start a new coreference cluster for each opening set
         for oset in opening_sets:
-            if oset not in self.temp:
-                self.temp[oset] = []
+            if oset not in state.temp:
+                state.temp[oset] = []
 
             # use a "stack" to keep track of nested mentions
-            self.temp[oset].append([])
+            state.temp[oset].append([])
 
         # add current token to all opened coreference clusters
-        for key in self.temp:
-            if len(self.temp[key]) > 0:
-                for i in range(len(self.temp[key])):
-                    self.temp[key][i].append(self.tok_counter)
+        for key in state.temp:
+            if len(state.temp[key]) > 0:
+                for i in range(len(state.temp[key])):
+                    state.temp[key][i].append(state.tok_counter)
 
         # save and close all closing coreference clusters
         for cset in closing_sets:
-            if cset not in self.coref:
-                self.coref[cset] = []
-            self.coref[cset].append(self.temp[cset][-1])
-            del self.temp[cset][-1]
+            if cset not in state.coref:
+                state.coref[cset] = []
+            state.coref[cset].append(state.temp[cset][-1])
+            del state.temp[cset][-1]
 
-    def __parse_connl(self, path):
+    def __parse_connl(self, state, path, part=None, offset=None):
         """
         read line by line a document and save:
             - sentences (list of slices)
@@ -109,57 +282,121 @@ class ConllParser:
                 {
                     "clusterID" : [[index_word_1, index_word_2], ...]
                 }
+        only the part whose header is at the byte offset is
+        read if offset is given (see read_part), otherwise
+        the part-th part (see select_part)
         """
+        if offset is not None:
+            self.__parse_lines(state, self.read_part(path, offset), path)
+            return
 
-        with open(Path(path), "r", encoding="utf-8") as infile:
-            last_sent = 0
-            this_tree = ""
+        with open_text(path) as infile:
+            self.__parse_lines(state, self.select_part(infile, part), path)
 
-            for line in infile:
-                line = line.strip()
+    def __parse_token(self, state, line, source):
+        """
+        parse the line of a token and save its information
+        in the state. Returns the fragment of the tree
+        """
+        # clean line
+        line = line.split()
+
+        # make sure the file has at least 10 columns
+        if not len(line) > 9:
+            raise InvalidInputFile(
+                "Input file is not in recognized CONLL format:\n"
+                f"{source}"
+            )
+
+        # extract information and save it
+        token = line[3]
+        tag = line[4]
+        tree = line[5]
+        ner = line[10]
+        coref = line[-1]
+
+        # extract NE and golden coref
+        self.__extract_ne(state, ner)
+        self.__extract_golden_coref(state, coref)
 
-                if line == "":
-                    # empty line --> new sentence
-                    # update sentence boundaries
-                    self.sentences.append(slice(last_sent, self.tok_counter))
-                    last_sent = self.tok_counter
+        state.tokens.append(token)
+        state.pos_tags.append(tag)
+        state.tok_counter += 1
 
-                    # save tree
-                    self.trees.append(this_tree)
+        # create string for tree
+        return tree.replace("*", f" {token}")
+
+    def parse_sentences(self, lines, source="<stream>"):
+        """
+        parse an iterable of lines in CONLL format one sentence
+        at a time (e.g. from a stream) and yield each sentence as
+        soon as it is complete:
+            (part, tokens, pos tags, named entities, tree)
+        part is the position of the document in the stream
+        (see select_part), it changes after #begin document.
+        Golden coreference information is not returned
+        """
+        part = -1
+        state = ParseState()
+        this_tree = ""
+
+        for line in lines:
+            line = line.strip()
+
+            if line == "" or line[0] == "#":
+                # empty line, begin or end of
+                # document --> end of sentence
+                if this_tree != "":
+                    yield (
+                        max(part, 0), state.tokens, state.pos_tags,
+                        state.ner, this_tree
+                    )
+                    state = ParseState()
                     this_tree = ""
 
-                elif line[0] == "#":
-                    # begin and end of document
-                    # do nothing
-                    pass
+                if line.startswith("#begin document"):
+                    part += 1
 
-                else:
-                    # increment sentence counter
-                    # and clean line
-                    line = line.split()
-
-                    # make sure the file has at least 10 columns
-                    if not len(line) > 9:
-                        raise InvalidInputFile(
-                            "Input file is not in recognized CONLL format:\n"
-                            f"{path}"
-                        )
-
-                    # extract information and save it
-                    token = line[3]
-                    tag = line[4]
-                    tree = line[5]
-                    ner = line[10]
-                    coref = line[-1]
-
-                    # extract NE and golden coref
-                    self.__extract_ne(ner)
-                    self.__extract_golden_coref(coref)
-
-                    self.tokens.append(token)
-                    self.pos_tags.append(tag)
-
-                    # create string for tree
-                    tree = tree.replace("*", f" {token}")
-                    this_tree += tree
-                    self.tok_counter += 1
+            else:
+                this_tree += self.__parse_token(state, line, source)
+
+        # last sentence was not followed by an empty line
+        if this_tree != "":
+            yield (
+                max(part, 0), state.tokens, state.pos_tags,
+                state.ner, this_tree
+            )
+
+    def __parse_lines(self, state, lines, source):
+        """
+        parse an iterable of lines in CONLL format,
+        source is only used for error messages
+        """
+        last_sent = 0
+        this_tree = ""
+
+        for line in lines:
+            line = line.strip()
+
+            if line == "":
+                # empty line --> new sentence
+                # update sentence boundaries
+                state.sentences.append(slice(last_sent, state.tok_counter))
+                last_sent = state.tok_counter
+
+                # save tree
+                state.trees.append(this_tree)
+                this_tree = ""
+
+            elif line[0] == "#":
+                # begin and end of document
+                # do nothing
+                pass
+
+            else:
+                this_tree += self.__parse_token(state, line, source)
+
+        # last sentence was not followed by an empty line
+        if this_tree != "":
+            state.sentences.append(slice(last_sent, state.tok_counter))
+            state.trees.append(this_tree)
@@ -0,0 +1,116 @@
+"""
+The predicted coreference clusters can be written in CONLL
+format, e.g. for the official scorer: the input document is
+read again line by line and the last column of each token is
+replaced with the predicted clusters in bracket notation:
+    (0      a mention of cluster 0 starts with the token
+    0)      a mention of cluster 0 ends with the token
+    (0)     single token mention of cluster 0
+    -       the token is not part of a mention
+several mentions of the same token are separated by "|".
+The lines are written as soon as they are read, so that only
+the current line is kept in memory (besides the brackets of
+the predicted mentions)
+"""
+
+from pathlib import Path
+import os
+import re
+
+from datareader.conll_data_reader import ConllParser
+from datareader.sources import open_text
+
+
+# everything before the last column of a token line
+LAST_COLUMN = re.compile(r"^(.*\s)\S+\s*$")
+
+
+def coref_columns(mapping):
+    """
+    returns the last column of the tokens that are part of a
+    mention: {token index: "(0|1)"}. mapping has the format of
+    ClusterContainer.convert_mapping, clusters are numbered in
+    order and singletons are ignored (as in the TSV files).
+    Outer mentions are opened first and closed last
+    """
+    starts = {}
+    ends = {}
+    singles = {}
+
+    number = 0
+    for spans in mapping.values():
+        if len(spans) < 2:
+            continue
+
+        for begin, end in spans:
+            if begin == end:
+                singles.setdefault(begin, []).append(number)
+            else:
+                starts.setdefault(begin, []).append((-end, number))
+                ends.setdefault(end, []).append((-begin, number))
+        number += 1
+
+    columns = {}
+    for token in starts.keys() | ends.keys() | singles.keys():
+        brackets = [f"({i}" for _, i in sorted(starts.get(token, []))]
+        brackets += [f"({i})" for i in singles.get(token, [])]
+        brackets += [f"{i})" for _, i in sorted(ends.get(token, []))]
+        columns[token] = "|".join(brackets)
+
+    return columns
+
+
+def splice_coref(lines, mapping):
+    """
+    yields the lines of a CONLL document (without line breaks)
+    with the predicted clusters in the last column. The end of
+    the document is added if the lines belong to a part that
+    was selected with ConllParser.select_part (or read_part)
+    """
+    columns = coref_columns(mapping)
+    token = 0
+    document_open = False
+
+    for line in lines:
+        line = line.rstrip("\r\n")
+        stripped = line.strip()
+
+        if stripped.startswith("#begin document"):
+            document_open = True
+        elif stripped.startswith("#end document"):
+            document_open = False
+        elif stripped and stripped[0] != "#":
+            line = LAST_COLUMN.match(line).group(1)
+            line += columns.get(token, "-")
+            token += 1
+
+        yield line
+
+    if document_open:
+        yield "#end document"
+
+
+def save_conll(source, part, mapping, outputfile, offset=None):
+    """
+    write the document with its predicted clusters in CONLL
+    format. source is the path of the input file (only the
+    part-th document is read, or the part whose header is
+    at the byte offset, see ConllParser.read_part) or the
+    text of the document
+    """
+    outputfile = Path(outputfile)
+    os.makedirs(outputfile.parent, exist_ok=True)
+
+    with open(outputfile, "w", encoding="utf-8") as ofile:
+        if isinstance(source, str):
+            lines = splice_coref(source.splitlines(), mapping)
+            ofile.writelines(f"{line}\n" for line in lines)
+        elif offset is not None:
+            lines = ConllParser.read_part(source, offset)
+            lines = splice_coref(lines, mapping)
+            ofile.writelines(f"{line}\n" for line in lines)
+        else:
+            with open_text(source) as infile:
+                lines = ConllParser.select_part(infile, part)
+                lines = splice_coref(lines, mapping)
+                ofile.writelines(f"{line}\n" for line in lines)
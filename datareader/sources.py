@@ -0,0 +1,99 @@
+"""
+Compressed files and archives can be read directly without
+extracting them on disk:
+    - files compressed with gzip (.gz), bzip2 (.bz2) or xz (.xz)
+      are opened as text streams (open_text)
+    - members of tar (also compressed) and zip archives are
+      streamed one after the other (iter_members), so that
+      compressed tar archives are decompressed only once
+"""
+
+import bz2
+import gzip
+import io
+import lzma
+from pathlib import Path
+import tarfile
+import zipfile
+
+
+COMPRESSED = {
+    ".gz": gzip.open,
+    ".bz2": bz2.open,
+    ".xz": lzma.open
+}
+
+TAR_ARCHIVES = (
+    ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tbz2", ".tar.xz", ".txz"
+)
+
+
+def is_archive(path):
+    name = str(path).lower()
+    return name.endswith(TAR_ARCHIVES) or name.endswith(".zip")
+
+
+def is_compressed(path):
+    return not is_archive(path) and Path(path).suffix.lower() in COMPRESSED
+
+
+def strip_compression(name):
+    """
+    name of a compressed file once decompressed:
+        a.conll.gz --> a.conll
+    """
+    path = Path(name)
+    if path.suffix.lower() in COMPRESSED:
+        return str(path.with_suffix(""))
+    return str(name)
+
+
+def open_text(path):
+    """
+    open a (compressed) file in text mode
+    """
+    opener = COMPRESSED.get(Path(path).suffix.lower(), open)
+    return opener(Path(path), "rt", encoding="utf-8")
+
+
+def open_binary(path):
+    """
+    open a (compressed) file in binary mode
+    """
+    opener = COMPRESSED.get(Path(path).suffix.lower(), open)
+    return opener(Path(path), "rb")
+
+
+def iter_members(path):
+    """
+    yields name and text content of each regular file
+    contained in a tar or zip archive (in archive order).
+    Compressed members are decompressed as well
+    """
+    if str(path).lower().endswith(".zip"):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                yield member_text(info.filename, archive.read(info))
+
+    else:
+        # stream mode: members are read sequentially
+        with tarfile.open(path, "r|*") as archive:
+            for info in archive:
+                if not info.isfile():
+                    continue
+                data = archive.extractfile(info).read()
+                yield member_text(info.name, data)
+
+
+def member_text(name, data):
+    """
+    decode the content of an archive member
+    """
+    opener = COMPRESSED.get(Path(name).suffix.lower())
+    if opener is not None:
+        data = opener(io.BytesIO(data)).read()
+        name = strip_compression(name)
+
+    return name, data.decode("utf-8")
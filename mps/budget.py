@@ -0,0 +1,50 @@
+"""
+Budget of the work the sieves can do on a single document,
+so that a few pathological documents (e.g. very long sentences
+with hundreds of mentions) do not dominate the running time:
+    - candidates: maximum number of candidates of each mention
+    - mentions: maximum number of mentions of a sentence
+    - seconds: wall-clock time of the sieves on a document
+all budgets are optional (None: unlimited). The candidates of
+a mention are simply cut off. If a sentence has too many
+mentions or the time is over, the document is degraded: the
+remaining sieves only run if they are cheap (e.g. ExactMatch,
+see Sieve.cheap or the cheap argument, a set of sieve names).
+The budgets that were exceeded are saved in
+ClusterContainer.exceeded
+"""
+
+
+class Budget:
+
+    def __init__(self, candidates=None, mentions=None, seconds=None,
+                 cheap=None):
+        self.candidates = candidates
+        self.mentions = mentions
+        self.seconds = seconds
+        self.cheap = None if cheap is None else set(cheap)
+
+    def __repr__(self):
+        return (
+            f"Budget(candidates={self.candidates}, "
+            f"mentions={self.mentions}, seconds={self.seconds})"
+        )
+
+    def is_cheap(self, name, sieve):
+        """
+        check if a sieve still runs on degraded documents
+        """
+        if self.cheap is None:
+            return sieve.cheap
+        return name in self.cheap
+
+    def too_many_mentions(self, document):
+        """
+        check if a sentence of the document has more
+        mentions than allowed
+        """
+        if self.mentions is None:
+            return False
+        return any(
+            len(sentence) > self.mentions for sentence in document.lr
+        )
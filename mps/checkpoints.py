@@ -0,0 +1,153 @@
+"""
+Checkpoints of the clusters after each sieve, so that a pipeline
+can be resumed without applying again the first sieves (e.g.
+while developing the last sieve):
+    checkpoints/02_PreciseConstructs_1f0c9a2e/<fingerprint>.ckpt
+The name of the directory is the prefix of the pipeline: the
+position and name of the last sieve and a digest of the sieves
+(and their windows) applied until then and of the options that
+change their results (the version of the lexicon, see
+lexicon_stamp). Budgets are not part of the digest, since
+degraded documents are not saved. The fingerprint of a document
+is a hash of its tokens, tags, named entities and mentions.
+A checkpoint is the journal of the merges (see provenance.py),
+which are replayed on the mentions of the document, so that the
+clusters and their attributes are the same as after the sieve:
+    - header: magic, number of merges, size of the rules
+    - spans: begin and end of both mentions of each merge
+    - merges: rule id of each merge
+    - rules: (sieve, rule) of each rule id as json
+Files are replaced atomically, the checkpoints can be written
+by different processes and threads
+"""
+
+from array import array
+import hashlib
+import json
+import os
+from pathlib import Path
+import struct
+import tempfile
+
+from mps.text.provenance import Provenance
+from mps.utils.errors import InvalidCheckpoint
+
+
+MAGIC = b"MSCCKP01"
+HEADER = struct.Struct("<8sII")
+ENDING = ".ckpt"
+
+
+def fingerprint(document):
+    """
+    returns the hash of the information of a
+    document that is used by the sieves
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for column in (document.tokens, document.pos_tags, document.ner):
+        digest.update("\x1f".join(map(str, column)).encode("utf-8"))
+        digest.update(b"\x1e")
+    for mention in document.nps:
+        digest.update(struct.pack("<3q", mention.sentence, *mention.span))
+
+    return digest.hexdigest()
+
+
+def lexicon_stamp(path):
+    """
+    returns the path, modification time and size of a lexicon,
+    so that a lexicon rebuilt at the same path gets new
+    checkpoints (None without lexicon)
+    """
+    if path is None:
+        return None
+
+    stat = os.stat(path)
+    return (str(path), stat.st_mtime_ns, stat.st_size)
+
+
+def pipeline_prefixes(names, windows, options=None):
+    """
+    returns the name of the checkpoint directory after
+    each sieve. options are saved in the digest of
+    every prefix (e.g. the stamp of the lexicon)
+    """
+    digest = hashlib.blake2b(repr(options).encode("utf-8"), digest_size=4)
+    prefixes = []
+    for position, (name, window) in enumerate(zip(names, windows), 1):
+        digest.update(f"{name}:{window};".encode("utf-8"))
+        prefixes.append(f"{position:02d}_{name}_{digest.hexdigest()}")
+
+    return prefixes
+
+
+class Checkpoints:
+
+    def __init__(self, path):
+        self.path = Path(path)
+
+    def file(self, prefix, document):
+        return self.path / prefix / f"{document}{ENDING}"
+
+    def save(self, prefix, document, journal):
+        """
+        save the journal of the merges of a document
+        """
+        spans = array("q", journal.spans)
+        merges = array("I", journal.merges)
+        rules = json.dumps(journal.rules).encode("utf-8")
+
+        outputfile = self.file(prefix, document)
+        outputfile.parent.mkdir(parents=True, exist_ok=True)
+
+        # write a temporary file (unique for each process and
+        # thread) and replace the checkpoint, so that nobody
+        # reads a partial checkpoint
+        descriptor, temporary = tempfile.mkstemp(
+            prefix=f"{outputfile.name}.", dir=outputfile.parent
+        )
+        try:
+            with os.fdopen(descriptor, "wb") as ofile:
+                ofile.write(HEADER.pack(MAGIC, len(merges), len(rules)))
+                ofile.write(spans.tobytes())
+                ofile.write(merges.tobytes())
+                ofile.write(rules)
+            os.replace(temporary, outputfile)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+    def load(self, prefix, document):
+        """
+        returns the journal of the merges of a document
+        (None if there is no checkpoint)
+        """
+        inputfile = self.file(prefix, document)
+        try:
+            with open(inputfile, "rb") as infile:
+                data = infile.read()
+        except FileNotFoundError:
+            return None
+
+        magic = None
+        if len(data) >= HEADER.size:
+            magic, size, rules_size = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise InvalidCheckpoint(f"Not a checkpoint file: {inputfile}")
+
+        spans = array("q")
+        merges = array("I")
+        offset = HEADER.size
+        end = offset + size * 4 * spans.itemsize
+        spans.frombytes(data[offset:end])
+        offset, end = end, end + size * merges.itemsize
+        merges.frombytes(data[offset:end])
+
+        journal = Provenance()
+        rules = json.loads(data[end:end + rules_size])
+        journal.rules = [tuple(i) for i in rules]
+        journal.ids = {rule: i for i, rule in enumerate(journal.rules)}
+        journal.spans = array("l", spans)
+        journal.merges = array("l", merges)
+
+        return journal
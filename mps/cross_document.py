@@ -0,0 +1,223 @@
+"""
+Cross-document coreference: the clusters resolved in each
+document (ClusterContainer.convert_mapping) are linked into
+entities of the whole corpus.
+Each cluster is summarized by its representative mention (the
+longest proper noun phrase, or the longest noun phrase), the
+heads of its mentions and a set of features (lower cased content
+words and heads). Clusters that only contain pronouns are ignored.
+Comparing all pairs of clusters of a corpus is not feasible, so
+clusters are blocked with locality sensitive hashing: the MinHash
+signature of the features is split in bands and only clusters that
+share a bucket (same values in a band) are compared. Two clusters of
+different documents are linked if the Jaccard similarity of their
+features reaches the threshold; entities are the connected
+components of the links
+"""
+
+import hashlib
+from pathlib import Path
+import random
+
+
+# tags of the words used as features
+CONTENT_TAGS = ("NN", "JJ", "CD")
+PRONOUN_TAGS = {"PRP", "PRP$", "WP", "WP$"}
+
+# modulus of the hash functions (mersenne prime)
+PRIME = (1 << 61) - 1
+
+
+class MinHash:
+    """
+    MinHash signatures of sets of strings. Features are hashed
+    with blake2b (the built-in hash is salted per process) and
+    permuted with permutations universal hash functions:
+        (a * x + b) mod PRIME
+    """
+    def __init__(self, permutations=64, seed=1):
+        rng = random.Random(seed)
+        self.params = [
+            (rng.randrange(1, PRIME), rng.randrange(0, PRIME))
+            for _ in range(permutations)
+        ]
+
+    @staticmethod
+    def hash(feature):
+        digest = hashlib.blake2b(feature.encode(), digest_size=8).digest()
+        return int.from_bytes(digest, "little")
+
+    def signature(self, features):
+        hashes = [self.hash(i) for i in features]
+        return tuple(
+            min((a * x + b) % PRIME for x in hashes)
+            for a, b in self.params
+        )
+
+
+class CrossDocumentLinker:
+    """
+    summarize is called (also in worker processes) for every
+    document and add (in the main process) with the summaries.
+    resolve returns the corpus-wide entity id of each cluster.
+    bands * rows is the length of the signatures: more rows make
+    buckets stricter, more bands find more candidates. Buckets
+    with more than max_bucket clusters (e.g. very frequent words)
+    are not used for blocking
+    """
+    def __init__(self, bands=16, rows=4, threshold=0.5,
+                 max_bucket=1000, seed=1):
+        self.bands = bands
+        self.rows = rows
+        self.threshold = threshold
+        self.max_bucket = max_bucket
+        self.minhash = MinHash(bands * rows, seed)
+
+        # state of the main process
+        self.clusters = []
+        self.buckets = {}
+
+    def __getstate__(self):
+        # workers only need the parameters to summarize documents
+        state = self.__dict__.copy()
+        state["clusters"] = []
+        state["buckets"] = {}
+        return state
+
+    @staticmethod
+    def head(words, tags):
+        """
+        last word of the first sequence of nouns, so that
+        names keep their last word (Barack Obama --> Obama),
+        the last word if the mention contains no nouns
+        """
+        head = None
+        for word, tag in zip(words, tags):
+            if tag.startswith("NN"):
+                head = word
+            elif head is not None:
+                break
+
+        return words[-1] if head is None else head
+
+    def summarize(self, document, mapping):
+        """
+        returns a summary of each cluster of the document:
+            (spans, representative, features, signature)
+        mapping is the result of ClusterContainer.convert_mapping
+        """
+        summaries = []
+        for spans in mapping.values():
+            representative = None
+            best = None
+            features = set()
+
+            for begin, end in spans:
+                tags = document.pos_tags[begin:end + 1]
+                words = document.tokens[begin:end + 1]
+                if all(tag in PRONOUN_TAGS for tag in tags):
+                    continue
+
+                features.add(f"head:{self.head(words, tags).lower()}")
+                features.update(
+                    w.lower() for w, t in zip(words, tags)
+                    if t.startswith(CONTENT_TAGS)
+                )
+
+                # proper noun phrases first, then the longest
+                rank = (any(t.startswith("NNP") for t in tags), len(words))
+                if best is None or rank > best:
+                    best = rank
+                    representative = " ".join(words)
+
+            if features:
+                summaries.append((
+                    [list(span) for span in spans],
+                    representative,
+                    sorted(features),
+                    self.minhash.signature(features)
+                ))
+
+        return summaries
+
+    def add(self, document, summaries):
+        """
+        add the summaries of a document and
+        put its clusters in the buckets
+        """
+        for spans, representative, features, signature in summaries:
+            index = len(self.clusters)
+            self.clusters.append(
+                (document, spans, representative, frozenset(features))
+            )
+
+            for band in range(self.bands):
+                rows = signature[band * self.rows:(band + 1) * self.rows]
+                key = (band, rows)
+                self.buckets.setdefault(key, []).append(index)
+
+    def order(self):
+        """
+        indexes of the clusters sorted by document, so that
+        the output does not depend on the order in which
+        the documents were processed
+        """
+        return sorted(
+            range(len(self.clusters)), key=lambda i: (self.clusters[i][0], i)
+        )
+
+    def resolve(self):
+        """
+        compare the clusters that share a bucket and return
+        the entity of each cluster. Entities are numbered
+        by their first cluster (see order)
+        """
+        parent = list(range(len(self.clusters)))
+
+        def find(node):
+            while parent[node] != node:
+                parent[node] = parent[parent[node]]
+                node = parent[node]
+            return node
+
+        for bucket in self.buckets.values():
+            if len(bucket) < 2 or len(bucket) > self.max_bucket:
+                continue
+
+            for i, this in enumerate(bucket):
+                document, _, _, features = self.clusters[this]
+                for that in bucket[i + 1:]:
+                    other = self.clusters[that]
+                    # documents are already resolved on their own
+                    if other[0] == document or find(this) == find(that):
+                        continue
+
+                    shared = len(features & other[3])
+                    union = len(features) + len(other[3]) - shared
+                    if shared / union >= self.threshold:
+                        parent[find(that)] = find(this)
+
+        numbers = {}
+        entities = [None] * len(self.clusters)
+        for i in self.order():
+            entities[i] = numbers.setdefault(find(i), len(numbers))
+
+        return entities
+
+    def save(self, output_file):
+        """
+        saves a tsv file with a line for each cluster:
+            entity  document    representative  begin,end   ...
+        """
+        entities = self.resolve()
+        with open(Path(output_file), "w", encoding="utf-8") as ofile:
+            ofile.write("ENTITY\tDOCUMENT\tREPRESENTATIVE\tSPANS\n")
+            for i in self.order():
+                document, spans, representative, _ = self.clusters[i]
+                entity = entities[i]
+                spans = "\t".join(f"{i},{j}" for i, j in spans)
+                ofile.write(
+                    f"{entity}\t{document}\t{representative}\t{spans}\n"
+                )
+
+        return entities
@@ -1,47 +1,209 @@
 """
 Main class of the multi pass sieve. Sieves are implemented
 singularly in the sieves/ directory. To add a new sieve,
-import it here and add it to the self.available dictionary
+register it in sieves/registry.py (or with an entry point).
+Only the configured sieves are created and only the features
+of the document they require are computed (self.features).
+The number of previous sentences each sieve searches for
+candidates can be set with the windows dictionary:
+    {"Pronoun": 3, "ExactMatch": None}
+where None means the whole document.
+With provenance, the clusters record the sieve and the
+rule that caused each merge (ClusterContainer.provenance).
+lexicon is the path of a lexicon of genus, number and animacy
+(see mps/text/lexicon.py) used by the attributes of the mentions,
+worker processes map the same file in memory (read-only).
+The work on each document can be bounded with a Budget (see
+mps/budget.py): degraded documents only run the cheap sieves.
+With checkpoints (a directory), the clusters of each document
+are saved after each sieve and, with resume_after, the clusters
+saved after that sieve are restored and only the following sieves
+are applied (see mps/checkpoints.py).
+Batches of documents can be resolved with MultiPassSieve.resolve
 """
 
-from mps.sieves.exact_match_sieve import ExactMatch
-from mps.sieves.precise_constructs_sieve import PreciseConstructs
-from mps.sieves.pronoun_sieve import Pronoun
+from contextlib import nullcontext
+import multiprocessing as mp
+import time
+
+from mps.checkpoints import (
+    Checkpoints,
+    fingerprint,
+    lexicon_stamp,
+    pipeline_prefixes
+)
+from mps.sieves import registry
 from mps.text.cluster_container import ClusterContainer
-from mps.utils.errors import MissingSieve
+from mps.text.document import Document
+from mps.text.lexicon import Lexicon
+from mps.utils.errors import InvalidCheckpoint, MissingSieve
 
 
 class MultiPassSieve:
 
-    def __init__(self, sieves):
-        self.available = {
-            "ExactMatch": ExactMatch(),
-            "PreciseConstructs": PreciseConstructs(),
-            "Pronoun": Pronoun()
-        }
+    def __init__(self, sieves, windows=None, provenance=False,
+                 lexicon=None, budget=None, checkpoints=None,
+                 resume_after=None):
+        self.provenance = provenance
+        self.budget = budget
+        self.lexicon = None if lexicon is None else Lexicon(lexicon)
+        self.available = registry.available_sieves()
 
         # if a sieve is not implemented
         # raise a MissingSieve error
-        if any(sieve not in self.available.keys() for sieve in sieves):
+        if any(sieve not in self.available for sieve in sieves):
             raise MissingSieve(
                 "Sieve not implemented or recognized\n"
-                f"Available Sieves: {', '.join(self.available.keys())}"
+                f"Available Sieves: {', '.join(self.available)}"
             )
 
-        # create a list of Sieve-objects
+        # create only the configured Sieve-objects
+        self.instances = {
+            name: registry.get_sieve(name)() for name in dict.fromkeys(sieves)
+        }
         self.sieves = [
-            self.available[i] for i in sieves
+            self.instances[i] for i in sieves
         ]
+        self.names = list(sieves)
+
+        # features of the document needed by the sieves
+        self.features = set()
+        for sieve in self.sieves:
+            self.features |= sieve.requires
 
-    def __call__(self, document):
+        # set search window of the sieves
+        if windows is not None:
+            if any(sieve not in sieves for sieve in windows.keys()):
+                raise MissingSieve(
+                    "Search window set for a sieve that is not used\n"
+                    f"Used Sieves: {', '.join(sieves)}"
+                )
+
+            for sieve, window in windows.items():
+                self.instances[sieve].window = window
+
+        # checkpoints after each sieve
+        self.checkpoints = None
+        self.resume_after = None
+        if checkpoints is not None:
+            self.checkpoints = Checkpoints(checkpoints)
+            self.prefixes = pipeline_prefixes(
+                self.names, [sieve.window for sieve in self.sieves],
+                options=lexicon_stamp(lexicon)
+            )
+        if resume_after is not None:
+            if self.checkpoints is None:
+                raise InvalidCheckpoint(
+                    "A directory of checkpoints is needed to resume"
+                )
+            if resume_after not in self.names:
+                raise MissingSieve(
+                    "Cannot resume after a sieve that is not used\n"
+                    f"Used Sieves: {', '.join(self.names)}"
+                )
+            self.resume_after = self.names.index(resume_after)
+
+    def __call__(self, document, stage=nullcontext):
+        """
+        apply all sieves to the mentions of the document and
+        return the ClusterContainer. Each sieve is run in the
+        context returned by stage(name of the sieve).
+        With a budget, only cheap sieves are applied once the
+        document is degraded (see clusters.exceeded)
+        """
         # get mentions from document
         mentions = document.nps
 
         # mentions are saved in a ClusterContainer
         # and passed on to each sieve
-        clusters = ClusterContainer(mentions)
+        clusters = ClusterContainer(
+            mentions, attributes="attributes" in self.features,
+            provenance=self.provenance, lexicon=self.lexicon,
+            journal=self.checkpoints is not None
+        )
 
-        for sieve in self.sieves:
-            clusters = sieve(document, clusters)
+        first = 0
+        if self.checkpoints is not None:
+            document_key = fingerprint(document)
+        if self.resume_after is not None:
+            with stage("checkpoint"):
+                journal = self.checkpoints.load(
+                    self.prefixes[self.resume_after], document_key
+                )
+                if journal is not None:
+                    clusters.replay(journal)
+                    clusters.resumed = True
+                    first = self.resume_after + 1
+
+        budget = self.budget
+        if budget is not None:
+            clusters.max_candidates = budget.candidates
+            if budget.too_many_mentions(document):
+                clusters.exceeded.add("mentions")
+            if budget.seconds is not None:
+                clusters.deadline = time.perf_counter() + budget.seconds
+
+        for position in range(first, len(self.sieves)):
+            name = self.names[position]
+            sieve = self.sieves[position]
+            if budget is not None and self.degraded(clusters):
+                if not budget.is_cheap(name, sieve):
+                    continue
+                # cheap sieves are not interrupted
+                clusters.deadline = None
+
+            if clusters.journal is not None:
+                clusters.journal.sieve = name
+            with stage(name):
+                clusters = sieve(document, clusters)
+
+            # the clusters of degraded documents are not saved
+            if self.checkpoints is not None and not clusters.exceeded:
+                with stage("checkpoint"):
+                    self.checkpoints.save(
+                        self.prefixes[position], document_key,
+                        clusters.journal
+                    )
 
         return clusters
+
+    @staticmethod
+    def degraded(clusters):
+        """
+        check if a budget of the document that makes the
+        sieves fall back to the cheap ones was exceeded
+        """
+        deadline = clusters.deadline
+        if deadline is not None and time.perf_counter() > deadline:
+            clusters.exceeded.add("seconds")
+        return bool(clusters.exceeded & {"mentions", "seconds"})
+
+    def resolve_document(self, document):
+        """
+        resolve a single document, given either as Document-object
+        or as the tuple returned by the data reader. The clusters
+        are returned as compact arrays (see ClusterContainer.to_arrays)
+        """
+        if not isinstance(document, Document):
+            document = Document(*document)
+            document.process(features=self.features)
+
+        return self(document).to_arrays()
+
+    def resolve(self, documents, processes=1, chunksize=1):
+        """
+        resolve an iterable of documents (see resolve_document)
+        and lazily yield the clusters of each document as
+        compact arrays in the same order. With more than one
+        process, documents are distributed among a pool of workers
+            mps.resolve(map(reader.parse, texts), processes=4)
+        """
+        if processes == 1:
+            yield from map(self.resolve_document, documents)
+
+        else:
+            context = mp.get_context("spawn")
+            with context.Pool(processes) as pool:
+                yield from pool.imap(
+                    self.resolve_document, documents, chunksize
+                )
@@ -0,0 +1,230 @@
+"""
+Online resolution: the sentences of a document are resolved one
+at a time, as soon as they are complete (e.g. live transcripts),
+with memory bounded by the search window. Only the last window
+sentences are kept (tokens, tags, mentions and their clusters),
+older sentences are evicted from a sliding document and from the
+ClusterContainer. The sieves are applied to the mentions of the
+new sentence only, their windows are limited to the window of the
+resolver (the sieves that search the whole document in batch mode
+search the last window sentences):
+    resolver = OnlineResolver(MultiPassSieve(sieves), window=3)
+    for tokens, pos_tags, ner, tree in sentences:
+        updates = resolver.add_sentence(tokens, pos_tags, ner, tree)
+The clusters of the mentions of a sentence do not change after
+the sentence is resolved (mentions only look for earlier
+candidates), so each update is final. Since the sieves run
+sentence by sentence instead of pass by pass over the whole
+document, the clusters can differ from the batch resolution
+"""
+
+import copy
+from collections import deque
+
+from mps.text.cluster_container import ClusterContainer
+from mps.text.document import Document
+
+
+class Window:
+    """
+    the last items of a growing sequence, indexed by their
+    absolute position in the sequence. Items before start
+    were evicted and cannot be accessed anymore
+    """
+    def __init__(self):
+        self.items = deque()
+        self.start = 0
+
+    def __len__(self):
+        return self.start + len(self.items)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+
+        if index < 0:
+            index += len(self)
+        if not self.start <= index < len(self):
+            raise IndexError(f"position {index} is not in the window")
+
+        return self.items[index - self.start]
+
+    def append(self, item):
+        self.items.append(item)
+
+    def extend(self, items):
+        self.items.extend(items)
+
+    def evict(self, position):
+        """
+        remove the items before position
+        """
+        while self.start < position and self.items:
+            self.items.popleft()
+            self.start += 1
+
+
+class SlidingDocument:
+    """
+    the sentences of a text that are still in the window, with
+    the attributes of a Document that are used by the sieves
+    (tokens, pos_tags, ner, lr and rl) indexed as in the whole text
+    """
+    def __init__(self):
+        self.tokens = Window()
+        self.pos_tags = Window()
+        self.ner = Window()
+        self.lr = Window()
+        self.rl = Window()
+
+        # first token of each sentence
+        self.starts = Window()
+
+    def add(self, document):
+        """
+        add the sentence of a processed single-sentence document
+        """
+        self.starts.append(len(self.tokens))
+        self.tokens.extend(document.tokens)
+        self.pos_tags.extend(document.pos_tags)
+        self.ner.extend(document.ner)
+        self.lr.extend(document.lr)
+        self.rl.extend(document.rl)
+
+    def evict(self, sentence):
+        """
+        remove the sentences before sentence
+        """
+        first_token = self.starts[sentence]
+        for column in (self.tokens, self.pos_tags, self.ner):
+            column.evict(first_token)
+        for column in (self.lr, self.rl, self.starts):
+            column.evict(sentence)
+
+
+class OnlineResolver:
+    """
+    resolves a document one sentence at a time with the sieves
+    of a MultiPassSieve. window is the number of previous
+    sentences that are kept (default: the largest window of the
+    sieves, 1 if all sieves search the whole document or only
+    the sentence of the mention)
+    """
+    def __init__(self, mps, window=None):
+        windows = [i.window for i in mps.sieves if i.window is not None]
+        if window is None:
+            # the previous sentence is kept even if no sieve needs it
+            window = max(max(windows, default=1), 1)
+        if window < 1:
+            raise ValueError("The window must contain at least 1 sentence")
+
+        self.window = window
+        self.features = mps.features
+        self.lexicon = mps.lexicon
+
+        # the sieves are copied, so that the windows
+        # of the MultiPassSieve are not changed
+        self.sieves = []
+        for sieve in mps.sieves:
+            sieve = copy.copy(sieve)
+            if sieve.window is None or sieve.window > window:
+                sieve.window = window
+            self.sieves.append(sieve)
+
+        self.reset()
+
+    def reset(self):
+        """
+        start a new document
+        """
+        self.document = SlidingDocument()
+        self.clusters = ClusterContainer(
+            [], attributes="attributes" in self.features,
+            lexicon=self.lexicon
+        )
+
+        # mentions of each sentence in the window
+        self.sentences = Window()
+
+        # clusters with more than one mention
+        # that were already returned
+        self.announced = set()
+
+    def add_sentence(self, tokens, pos_tags, ner, tree):
+        """
+        resolve the mentions of the next sentence of the document
+        (see ConllParser.parse_sentences) and return the updates of
+        the clusters: {cluster: [spans of the mentions that joined
+        the cluster]}. The first update of a cluster also contains
+        its earlier mentions, singletons are not returned
+        """
+        sentence = len(self.sentences)
+        document = Document(
+            [slice(0, len(tokens))], tokens, pos_tags, ner, [tree], {}
+        )
+        document.convert_trees(len(self.document.tokens), sentence)
+        document.extract_nps(rl="rl" in self.features)
+        document.release_trees()
+
+        self.document.add(document)
+        self.sentences.append(document.nps)
+        self.clusters.extend(document.nps)
+
+        for sieve in self.sieves:
+            self.clusters = sieve(self.document, self.clusters)
+
+        # each sentence is resolved only once, the mentions
+        # that found no antecedent stay singletons
+        self.clusters.unresolved.clear()
+
+        updates = self.updates(document.nps, sentence)
+
+        # keep the sentences searched by the next one
+        self.evict(sentence + 1 - self.window)
+
+        return updates
+
+    def updates(self, mentions, sentence):
+        """
+        group the new mentions by cluster and add the earlier
+        mentions of the clusters that were not returned yet
+        """
+        joined = {}
+        for mention in mentions:
+            joined.setdefault(mention.cluster, []).append(mention)
+
+        updates = {}
+        for cluster, members in joined.items():
+            if cluster not in self.announced:
+                members = [
+                    i for i in self.clusters
+                    if i.cluster == cluster and i.sentence < sentence
+                ] + members
+                if len(members) < 2:
+                    continue
+                self.announced.add(cluster)
+
+            updates[cluster] = [i.span for i in members]
+
+        return updates
+
+    def evict(self, sentence):
+        """
+        remove the sentences before sentence and their mentions
+        """
+        if sentence <= self.sentences.start:
+            return
+
+        for position in range(self.sentences.start, sentence):
+            self.clusters.evict(self.sentences[position])
+        self.sentences.evict(sentence)
+        self.document.evict(sentence)
+
+        live = {i.cluster for i in self.clusters}
+        self.announced &= live
+
+    def __len__(self):
+        """
+        number of mentions in memory
+        """
+        return len(self.clusters)
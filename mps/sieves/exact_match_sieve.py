@@ -9,24 +9,31 @@ from mps.sieves.template import Sieve
 
 class ExactMatch(Sieve):
 
+    cheap = True
+
+    # the candidates of the previous sentences are searched from
+    # right to left, whatever the other configured sieves
+    requires = frozenset(["rl"])
+
     def process(self, document, clusters):
         """
-        Loop over the mentions, if a mention does not
-        have an antecedent, loop with an inner loop from
-        the beginning until the selected mention (cataphoric
+        Loop over the mentions without an antecedent
+        (the worklist of the ClusterContainer), loop with
+        an inner loop from the beginning until the selected mention (cataphoric
         chains are not allowed) if two mentions have the same
         surface, merge the clusters
         """
-        for mention in clusters:
-            if mention.antecedent is False:
+        for mention in clusters.unresolved_mentions():
 
-                # collect candidates
-                candidates = clusters.get_candidates(mention, document)
+            # collect candidates
+            candidates = clusters.get_candidates(
+                mention, document, window=self.window
+            )
 
-                # look for matches
-                for candidate in candidates:
-                    if mention.same_surface(candidate):
-                        clusters.merge(mention, candidate)
-                        break
+            # look for matches
+            for candidate in candidates:
+                if mention.same_surface(candidate):
+                    clusters.merge(mention, candidate, rule="surface")
+                    break
 
         return clusters
@@ -0,0 +1,277 @@
+"""
+The head match sieves link a mention to an earlier cluster
+that shares its head. The head is the right-most noun of the
+first group of nouns of the mention ([the Florida Supreme Court]
+--> Court, [the president of the US] --> president), not the
+first noun of Mention.get_head that is used by the other sieves:
+    - StrictHeadMatch: the head of the mention is the head of a
+        mention of the cluster, all the words of the cluster of
+        the mention are included in the candidate cluster and
+        the modifiers of the mention are compatible
+        ex. [the Florida Supreme Court] ... [the Florida court]
+    - ProperHeadWordMatch: both heads are the same proper noun
+        and the mention has no numbers that are missing in
+        the candidate
+        ex. [Apollo 11] ... [Apollo 13] are not linked
+    - RelaxedHeadMatch: the head of the mention is any word of
+        the cluster, all the words of the cluster of the mention
+        are included and both heads are named entities of the
+        same type
+        ex. [Senator Bernie Sanders] ... [Sanders]
+In none of the sieves a mention can be linked to a mention that
+contains it (or is contained by it).
+Instead of scanning all candidates, each sieve builds an inverted
+index of the document (head or word of the cluster --> mentions)
+and only checks the clusters of the earlier mentions found in the
+index
+"""
+
+from abc import abstractmethod
+from bisect import bisect_left
+
+from mps.sieves.template import Sieve
+
+
+STOP_WORDS = {
+    "a", "an", "the", "this", "that", "these", "those",
+    "of", "in", "on", "at", "for", "to", "by", "with",
+    "and", "or", "'s", "'", ",", ".", "``", "''", "-"
+}
+
+
+class HeadMatch(Sieve):
+
+    # name of the rule saved in the provenance of the merges
+    rule = "head"
+
+    def __init__(self, window=None):
+        # heads are matched in the whole document by default
+        super().__init__(window)
+
+    @staticmethod
+    def head_word(mention):
+        """
+        last noun of the first group of nouns of the mention
+        """
+        head = None
+        for word in mention.words:
+            if word.tag.startswith("NN"):
+                head = word
+            elif head is not None:
+                break
+
+        return head
+
+    @classmethod
+    def head(cls, mention):
+        head = cls.head_word(mention)
+        return None if head is None else head.symbol.lower()
+
+    @staticmethod
+    def words(mention):
+        return {
+            word.symbol.lower() for word in mention.words
+            if word.symbol.lower() not in STOP_WORDS
+        }
+
+    def index_keys(self, mention, members):
+        """
+        keys under which a mention is saved in the index,
+        members are the mentions of its cluster
+        """
+        head = self.head(mention)
+        return [] if head is None else [head]
+
+    def lookup_key(self, mention):
+        """
+        key used to look for the candidates of a mention
+        """
+        return self.head(mention)
+
+    @abstractmethod
+    def compatible(self, mention, candidate, members, candidate_members):
+        """
+        check if the cluster of the mention (members) can be
+        merged into the cluster of the candidate
+        """
+        return False
+
+    def add_to_index(self, index, mention, members):
+        """
+        save a mention in the index (once per key), the mentions
+        of each key are kept in document order, so that the
+        earlier mentions can be found with bisect
+        """
+        for key in self.index_keys(mention, members):
+            spans, mentions = index.setdefault(key, ([], []))
+            position = bisect_left(spans, mention.span)
+            if position == len(spans) or spans[position] != mention.span:
+                spans.insert(position, mention.span)
+                mentions.insert(position, mention)
+
+    def build_index(self, members):
+        """
+        returns the inverted index of the document:
+            {key: ([spans], [mentions])}
+        members are the mentions of each cluster
+        """
+        index = {}
+        for cluster in members.values():
+            for mention in cluster:
+                self.add_to_index(index, mention, cluster)
+
+        return index
+
+    def get_candidates(self, mention, index):
+        """
+        earlier mentions with the same key in the search window:
+        the mentions of the same sentence from left to right,
+        then the previous sentences from the closest
+        """
+        key = self.lookup_key(mention)
+        if key not in index:
+            return
+
+        spans, mentions = index[key]
+        end = bisect_left(spans, mention.span)
+
+        # walk back one sentence at a time
+        while end > 0:
+            sentence = mentions[end - 1].sentence
+            if (self.window is not None
+                    and sentence < mention.sentence - self.window):
+                return
+
+            start = end - 1
+            while start > 0 and mentions[start - 1].sentence == sentence:
+                start -= 1
+
+            yield from mentions[start:end]
+            end = start
+
+    def process(self, document, clusters):
+        # mentions of each cluster, updated after each merge
+        members = {}
+        for mention in clusters:
+            members.setdefault(mention.cluster, []).append(mention)
+
+        index = self.build_index(members)
+
+        for mention in clusters.unresolved_mentions():
+            if not self.prune(mention):
+                checked = {mention.cluster}
+
+                candidates = self.get_candidates(mention, index)
+                for candidate in clusters.cap(candidates):
+                    cluster = candidate.cluster
+                    if cluster in checked:
+                        continue
+                    checked.add(cluster)
+
+                    # i-within-i
+                    if candidate in mention or mention in candidate:
+                        continue
+
+                    old = mention.cluster
+                    if self.compatible(
+                            mention, candidate, members[old],
+                            members[cluster]):
+                        clusters.merge(mention, candidate, rule=self.rule)
+
+                        # move the merged mentions to the new cluster
+                        moved = []
+                        for i in members.pop(old):
+                            if i.cluster == old:
+                                members.setdefault(old, []).append(i)
+                            else:
+                                moved.append(i)
+                        members[cluster].extend(moved)
+
+                        # the keys can depend on the whole cluster
+                        for i in members[cluster]:
+                            self.add_to_index(index, i, members[cluster])
+                        break
+
+        return clusters
+
+
+class StrictHeadMatch(HeadMatch):
+
+    rule = "strict_head"
+
+    @classmethod
+    def modifiers(cls, mention):
+        """
+        nouns and adjectives of the mention besides the head
+        """
+        head = cls.head_word(mention)
+        return {
+            word.symbol.lower() for word in mention.words
+            if word is not head and word.tag.startswith(("NN", "JJ"))
+        }
+
+    def compatible(self, mention, candidate, members, candidate_members):
+        # word inclusion
+        words = set().union(*(self.words(i) for i in members))
+        candidate_words = set().union(
+            *(self.words(i) for i in candidate_members)
+        )
+        if not words <= candidate_words:
+            return False
+
+        # compatible modifiers only
+        candidate_modifiers = set().union(
+            *(self.modifiers(i) for i in candidate_members)
+        )
+        return self.modifiers(mention) <= candidate_modifiers
+
+
+class ProperHeadWordMatch(HeadMatch):
+
+    rule = "proper_head"
+
+    @classmethod
+    def is_proper(cls, mention):
+        head = cls.head_word(mention)
+        return head is not None and head.tag.startswith("NNP")
+
+    def index_keys(self, mention, members):
+        if not self.is_proper(mention):
+            return []
+        return super().index_keys(mention, members)
+
+    def lookup_key(self, mention):
+        return self.head(mention) if self.is_proper(mention) else None
+
+    @staticmethod
+    def numbers(mention):
+        return {i.symbol for i in mention.words if i.tag == "CD"}
+
+    def compatible(self, mention, candidate, members, candidate_members):
+        # no numeric mismatch: [the 17 sailors] ... [the 7 sailors]
+        return self.numbers(mention) <= self.numbers(candidate)
+
+
+class RelaxedHeadMatch(HeadMatch):
+
+    rule = "relaxed_head"
+
+    def index_keys(self, mention, members):
+        # the head can match any word of the cluster
+        return set().union(*(self.words(i) for i in members))
+
+    def compatible(self, mention, candidate, members, candidate_members):
+        # both heads are named entities of the same type
+        head = self.head_word(mention)
+        candidate_head = self.head_word(candidate)
+        if candidate_head is None or head.ne is None:
+            return False
+        if head.ne != candidate_head.ne:
+            return False
+
+        # word inclusion
+        words = set().union(*(self.words(i) for i in members))
+        candidate_words = set().union(
+            *(self.words(i) for i in candidate_members)
+        )
+        return words <= candidate_words
@@ -21,8 +21,7 @@ from mps.text.mention import Mention
 
 class PreciseConstructs(Sieve):
 
-    def __init__(self):
-        self.document = None
+    requires = frozenset(["rl"])
 
     def __is_acronym(self, string1, string2):
         """
@@ -35,7 +34,7 @@ class PreciseConstructs(Sieve):
             return True
         return False
 
-    def __apposition(self, mention, candidate):
+    def __apposition(self, document, mention, candidate):
         """
         checks if mention i if the apposition
         of mention j. To be true mention i must
@@ -45,14 +44,16 @@ class PreciseConstructs(Sieve):
         init_i = mention.span[0]
         init_j = candidate.span[0]
 
-        if init_i - 2 == init_j:
-            if (self.document.tokens[init_i - 1] == "," and
-                    self.document.tokens[init_i + 1] == ","):
+        # the mention can be the last token of the
+        # document (or of the sentences read so far)
+        if init_i - 2 == init_j and init_i + 1 < len(document.tokens):
+            if (document.tokens[init_i - 1] == "," and
+                    document.tokens[init_i + 1] == ","):
                 return True
 
         return False
 
-    def __pred_nom(self, mention, candidate):
+    def __pred_nom(self, document, mention, candidate):
         """
         checks if mention i is the predicate of mention j.
         To be true, there must be an inflection of the verb
@@ -62,13 +63,13 @@ class PreciseConstructs(Sieve):
         init_j = candidate.span[0]
 
         if init_i - 2 == init_j:
-            verb = self.document.tokens[init_i - 1].lower()
+            verb = document.tokens[init_i - 1].lower()
             if verb in {"is", "are", "am", "was", "were"}:
                 return True
 
         return False
 
-    def __acronym(self, mention, candidate):
+    def __acronym(self, document, mention, candidate):
         """
         Checks whether one of the mentions if the acronym
         of the other one. In order to return true, both
@@ -76,11 +77,11 @@ class PreciseConstructs(Sieve):
         """
         init_i, end_i = mention.span
         span_i = slice(init_i, end_i + 1)
-        tags_i_mentions = set(self.document.pos_tags[span_i])
+        tags_i_mentions = set(document.pos_tags[span_i])
 
         init_j, end_j = candidate.span
         span_j = slice(init_j, end_j + 1)
-        tags_j_mentions = set(self.document.pos_tags[span_j])
+        tags_j_mentions = set(document.pos_tags[span_j])
 
         if tags_i_mentions == tags_j_mentions == set(["NNP"]):
             string1 = str(mention)
@@ -98,6 +99,9 @@ class PreciseConstructs(Sieve):
         given a Mention-object, this function
         will extract the head of the NP
         """
+        # the tree was already released (low memory mode)
+        if mention.tree is None:
+            return mention.np_head
 
         # assumption: the head is the first subtree
         head = mention.tree[0]
@@ -119,25 +123,38 @@ class PreciseConstructs(Sieve):
         return False
 
     def process(self, document, clusters):
-        self.document = document
-
-        for mention in clusters:
-            if mention.antecedent is False:
-                pruned = self.prune(mention)  # prune mentions
-                if not pruned:
-
-                    # collect candidates
-                    candidates = clusters.get_candidates(mention, document)
-
-                    # look for matches
-                    for candidate in candidates:
-                        appo = self.__apposition(mention, candidate)
-                        pred_nom = self.__pred_nom(mention, candidate)
-                        akr = self.__acronym(mention, candidate)
-                        head = self.__is_head_of(mention, candidate)
-
-                        if (appo or pred_nom or akr or head):
-                            clusters.merge(mention, candidate)
-                            break
+        # the document is passed to each check instead of being
+        # saved in the sieve, so that the sieve is reentrant
+        for mention in clusters.unresolved_mentions():
+            pruned = self.prune(mention)  # prune mentions
+            if not pruned:
+
+                # collect candidates
+                candidates = clusters.get_candidates(
+                    mention, document, window=self.window
+                )
+
+                # look for matches
+                for candidate in candidates:
+                    appo = self.__apposition(document, mention, candidate)
+                    pred_nom = self.__pred_nom(
+                        document, mention, candidate
+                    )
+                    akr = self.__acronym(document, mention, candidate)
+                    head = self.__is_head_of(mention, candidate)
+
+                    if appo:
+                        rule = "apposition"
+                    elif pred_nom:
+                        rule = "predicative"
+                    elif akr:
+                        rule = "acronym"
+                    elif head:
+                        rule = "head_of"
+                    else:
+                        continue
+
+                    clusters.merge(mention, candidate, rule=rule)
+                    break
 
         return clusters
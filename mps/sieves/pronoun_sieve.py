@@ -12,6 +12,8 @@ from mps.sieves.template import Sieve
 
 class Pronoun(Sieve):
 
+    requires = frozenset(["attributes"])
+
     pronouns = {
         "I", "me",
         "you",
@@ -22,26 +24,28 @@ class Pronoun(Sieve):
     }
 
     def process(self, document, clusters):
-        for mention in clusters:
-            if mention.antecedent is False:
-                if (len(mention.words) == 1 and
-                        mention.words[0].symbol.lower() in self.pronouns):
-                    # prune mentions
-                    pruned = self.prune(mention)
-                    if not pruned:
-                        # collect candidates
-                        candidates = clusters.get_candidates(
-                            mention, document, pronoun=True
-                        )
-
-                        # look for matches
-                        for candidate in candidates:
-                            # obtain cluster attributes
-                            ma = clusters.attributes[mention.cluster]
-                            ca = clusters.attributes[candidate.cluster]
-
-                            if ma.is_subset(ca):
-                                clusters.merge(mention, candidate)
-                                break
+        for mention in clusters.unresolved_mentions():
+            if (len(mention.words) == 1 and
+                    mention.words[0].symbol.lower() in self.pronouns):
+                # prune mentions
+                pruned = self.prune(mention)
+                if not pruned:
+                    # collect candidates
+                    candidates = clusters.get_candidates(
+                        mention, document, pronoun=True,
+                        window=self.window
+                    )
+
+                    # look for matches
+                    for candidate in candidates:
+                        # obtain cluster attributes
+                        ma = clusters.attributes[mention.cluster]
+                        ca = clusters.attributes[candidate.cluster]
+
+                        if ma.is_subset(ca):
+                            clusters.merge(
+                                mention, candidate, rule="attributes"
+                            )
+                            break
 
         return clusters
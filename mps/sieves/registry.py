@@ -0,0 +1,68 @@
+"""
+Registry of the available sieves. The built-in sieves are
+registered in the BUILTIN dictionary, other packages can add
+their own sieves with the entry point group "musicor.sieves":
+    [options.entry_points]
+    musicor.sieves =
+        MySieve = my_package.my_module:MySieve
+Each sieve declares in Sieve.requires the features of the
+document it needs, so that only those are computed:
+    - "rl": right-to-left BFS order of the mentions
+    - "attributes": linguistic attributes of the clusters
+"""
+
+from importlib import metadata
+
+from mps.sieves.exact_match_sieve import ExactMatch
+from mps.sieves.head_match_sieve import (
+    ProperHeadWordMatch, RelaxedHeadMatch, StrictHeadMatch
+)
+from mps.sieves.precise_constructs_sieve import PreciseConstructs
+from mps.sieves.pronoun_sieve import Pronoun
+
+
+ENTRY_POINT_GROUP = "musicor.sieves"
+
+BUILTIN = {
+    "ExactMatch": ExactMatch,
+    "PreciseConstructs": PreciseConstructs,
+    "StrictHeadMatch": StrictHeadMatch,
+    "ProperHeadWordMatch": ProperHeadWordMatch,
+    "RelaxedHeadMatch": RelaxedHeadMatch,
+    "Pronoun": Pronoun
+}
+
+
+def entry_points():
+    """
+    returns the sieves registered by other
+    packages as {name: entry point}
+    """
+    try:
+        found = metadata.entry_points(group=ENTRY_POINT_GROUP)
+    except TypeError:
+        # python < 3.10
+        found = metadata.entry_points().get(ENTRY_POINT_GROUP, [])
+
+    return {entry_point.name: entry_point for entry_point in found}
+
+
+def available_sieves():
+    """
+    returns the names of all available sieves
+    (built-in sieves first)
+    """
+    names = list(BUILTIN)
+    names += [name for name in entry_points() if name not in BUILTIN]
+    return names
+
+
+def get_sieve(name):
+    """
+    returns the class of a sieve given its name, sieves from
+    other packages are only imported when they are requested
+    """
+    if name in BUILTIN:
+        return BUILTIN[name]
+
+    return entry_points()[name].load()
@@ -3,6 +3,19 @@ from abc import ABC, abstractmethod
 
 class Sieve(ABC):
 
+    # features of the document needed by the sieve
+    # (see mps.sieves.registry)
+    requires = frozenset()
+
+    # cheap sieves still run when the budget of a
+    # document is exceeded (see mps.budget)
+    cheap = False
+
+    def __init__(self, window=1):
+        # number of previous sentences searched for
+        # candidates (None: the whole document)
+        self.window = window
+
     def __call__(self, document, clusters):
         processed = self.process(document, clusters)
         return processed
@@ -10,7 +23,8 @@ class Sieve(ABC):
     @abstractmethod
     def process(self, document, clusters):
         # do something with the document and clusters
-        # only return clusters
+        # (clusters.unresolved_mentions() returns the mentions
+        # still without antecedent) only return clusters
         return clusters
 
     def prune(self, mention):
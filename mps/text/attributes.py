@@ -5,19 +5,47 @@ of mentions:
     - genus
     - person
     - animacy
+Without a lexicon, animacy is based on the named entity of
+the head only (mentions that are not persons are inanimate) and
+the genus is unknown. With a lexicon of nouns (see lexicon.py),
+genus and animacy of pronouns are based on a list, those of the
+other mentions on the named entity of the head and on the lexicon
 """
 
 
 class Attributes:
 
-    def __init__(self, mention=None):
+    genus_pronouns = {
+        "he": {"masculine"},
+        "him": {"masculine"},
+        "she": {"feminine"},
+        "her": {"feminine"},
+        "it": {"neuter"}
+    }
+
+    animacy_pronouns = {
+        "i": {True},
+        "me": {True},
+        "you": {True},
+        "he": {True},
+        "him": {True},
+        "she": {True},
+        "her": {True},
+        "we": {True},
+        "us": {True},
+        "it": {False}
+    }
+
+    def __init__(self, mention=None, lexicon=None):
         self.number = set()
         self.genus = set()
         self.person = set()
         self.animacy = set()
         if mention is not None:
-            self.calculate_number(mention)
-            self.calculate_animacy(mention)
+            genus, number, animacy = self.lookup(mention, lexicon)
+            self.calculate_number(mention, number)
+            self.calculate_genus(mention, genus)
+            self.calculate_animacy(mention, animacy)
 
     def __eq__(self, other):
         if ((self.number == other.number) and
@@ -36,7 +64,38 @@ class Attributes:
             f"ani: {self.animacy}"
         )
 
-    def calculate_number(self, mention):
+    @staticmethod
+    def lookup(mention, lexicon):
+        """
+        genus, number and animacy of a mention in the lexicon:
+        the whole mention is looked up first, then its head.
+        Without a lexicon all three are None
+        """
+        if lexicon is None:
+            return None, None, None
+
+        keys = [" ".join(i.symbol for i in mention.words)]
+        if mention.head is not None:
+            keys.append(mention.head.symbol)
+
+        for key in keys:
+            found = lexicon.attributes(key)
+            if any(found):
+                return found
+
+        return set(), set(), set()
+
+    @staticmethod
+    def pronoun(mention):
+        """
+        returns the lower cased pronoun if the
+        mention is a single word, None otherwise
+        """
+        if len(mention.words) == 1:
+            return mention.words[0].symbol.lower()
+        return None
+
+    def calculate_number(self, mention, known=None):
         """
         given a list of words, this function
         will try to extract the number of
@@ -48,6 +107,8 @@ class Attributes:
                 the first noun in the NP is the head)
                 ant the number will be based on the
                 tag of that noun
+            - otherwise the number is taken
+                from the lexicon (known)
         """
         pronouns = {
             "I": {"singular"},
@@ -84,17 +145,51 @@ class Attributes:
                 if not self.number:
                     self.number = set(["singular"])
 
-    def calculate_animacy(self, mention):
+        if not self.number and known:
+            self.number = set(known)
+
+    def calculate_genus(self, mention, known=None):
+        """
+        the genus of pronouns is based on a list,
+        that of other mentions on the lexicon (known).
+        Without a lexicon the genus is unknown
+        """
+        if known is None:
+            return
+
+        pronoun = self.pronoun(mention)
+        if pronoun in self.genus_pronouns:
+            self.genus = set(self.genus_pronouns[pronoun])
+        elif mention.head and known:
+            self.genus = set(known)
+
+    def calculate_animacy(self, mention, known=None):
         """
         using NE annotation this function decides
-        whether the mention animate is or not
+        whether the mention animate is or not. With a
+        lexicon, pronouns are looked up in a list and
+        mentions without named entity in the lexicon
+        (known), if it is not known the animacy stays
+        empty (compatible)
         """
+        if known is None:
+            if mention.head:
+                self.animacy.add(mention.head.ne == "PERSON")
+            return
+
+        pronoun = self.pronoun(mention)
+        if pronoun in self.animacy_pronouns:
+            self.animacy = set(self.animacy_pronouns[pronoun])
+            return
+
         head = mention.head
         if head:
             if head.ne == "PERSON":
                 self.animacy.add(True)
-            else:
+            elif head.ne is not None:
                 self.animacy.add(False)
+            elif known:
+                self.animacy = set(known)
 
     @staticmethod
     def compatible(this, other, number=False):
@@ -151,7 +246,7 @@ class Attributes:
         new = Attributes()
 
         new.number = self.number.union(other.number)
-        new.get_head = self.genus.union(other.genus)
+        new.genus = self.genus.union(other.genus)
         new.person = self.person.union(other.person)
         new.animacy = self.animacy.union(other.animacy)
 
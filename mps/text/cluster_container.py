@@ -11,15 +11,66 @@ mentions. Each pair is a tuple of spans within the
 document:
     ex. ((15, 18), (46, 52))
     --> token spans 15-18 and 46-52 are coreferential
+The container also keeps the worklist of the mentions
+without antecedent (in document order), which shrinks
+with each merge: sieves only iterate over the unresolved
+mentions, so the last sieves of a long pipeline do not
+touch the mentions that were already resolved.
+With provenance, the sieve and the rule of each merge
+are recorded (see provenance.py). The attributes of the
+mentions use the genus, number and animacy of the lexicon
+(see lexicon.py), if one is given.
+The work of the sieves can be bounded (see budget.py): the
+candidates of each mention are capped at max_candidates and
+the worklist stops after the deadline. The budgets that were
+exceeded are saved in exceeded.
+With journal, the merges are recorded (as with provenance) so
+that they can be saved in a checkpoint and replayed on the
+same mentions (see mps/checkpoints.py).
+Mentions can also be added and evicted one sentence at a time
+(see extend, evict and mps/online.py)
 """
 
+from array import array
+import time
+
+from mps.text.provenance import Provenance
+
 
 class ClusterContainer:
 
-    def __init__(self, mentions, mapped=False):
+    def __init__(self, mentions, mapped=False, attributes=True,
+                 provenance=False, lexicon=None, journal=False):
         self.map = {}
         self.mentions = {}
         self.attributes = {}
+        self.provenance = Provenance() if provenance else None
+        self.lexicon = lexicon
+
+        # number of clusters created, the cluster of
+        # the next mention (see extend)
+        self.created = len(mentions)
+
+        # the provenance is also the journal of the merges
+        self.journal = self.provenance
+        if journal and self.journal is None:
+            self.journal = Provenance()
+
+        # mentions without antecedent: {span: mention}
+        self.unresolved = {}
+
+        # budgets of the sieves (None: unlimited)
+        self.max_candidates = None
+        self.deadline = None
+        self.exceeded = set()
+
+        # the merges of the first sieves were restored
+        # from a checkpoint (see MultiPassSieve)
+        self.resumed = False
+
+        # cluster attributes are only kept
+        # if a sieve needs them
+        self.track_attributes = attributes
 
         if mapped is False:
             # first mention has antecedent
@@ -34,11 +85,52 @@ class ClusterContainer:
 
             # map mention to its span in self.mentions
             self.mentions[mention.span] = mention
-            self.attributes[mention.cluster] = mention.attributes
+            if mention.antecedent is False:
+                self.unresolved[mention.span] = mention
+            if attributes:
+                self.attributes[mention.cluster] = mention.get_attributes(
+                    lexicon
+                )
 
     def __len__(self):
         return len(self.mentions)
 
+    def extend(self, mentions):
+        """
+        add the mentions of a new sentence (sorted by span), each
+        mention gets a new cluster. Mentions must come after those
+        already in the container
+        """
+        for mention in mentions:
+            # the first mention has no antecedent
+            if self.created == 0:
+                mention.antecedent = True
+            mention.cluster = self.created
+            self.created += 1
+
+            self.mentions[mention.span] = mention
+            if mention.antecedent is False:
+                self.unresolved[mention.span] = mention
+            if self.track_attributes:
+                self.attributes[mention.cluster] = mention.get_attributes(
+                    self.lexicon
+                )
+
+    def evict(self, mentions):
+        """
+        remove mentions (e.g. of a sentence that left the search
+        window) and the attributes of clusters without mentions.
+        Pointers between mentions only lead to later mentions,
+        so the remaining chains are not affected
+        """
+        for mention in mentions:
+            del self.mentions[mention.span]
+            self.unresolved.pop(mention.span, None)
+
+        live = {mention.cluster for mention in self.mentions.values()}
+        for cluster in [i for i in self.attributes if i not in live]:
+            del self.attributes[cluster]
+
     def __repr__(self):
         return str([str(i) for i in self.mentions.values()])
 
@@ -49,51 +141,105 @@ class ClusterContainer:
     def __iter__(self):
         return (i for i in self.mentions.values())
 
-    def get_candidates(self, mention, document, pronoun=False):
+    def unresolved_mentions(self):
+        """
+        returns the mentions without antecedent in document
+        order. The list is a copy of the worklist, so that
+        sieves can merge clusters while iterating over it.
+        After the deadline no more mentions are returned
+        """
+        mentions = list(self.unresolved.values())
+        if self.deadline is None:
+            return mentions
+        return self.__until_deadline(mentions, self.deadline)
+
+    def __until_deadline(self, mentions, deadline):
+        for mention in mentions:
+            if time.perf_counter() > deadline:
+                self.exceeded.add("seconds")
+                return
+            yield mention
+
+    def cap(self, candidates):
+        """
+        returns at most max_candidates of an iterable of candidates
+        """
+        if self.max_candidates is None:
+            return candidates
+        return self.__capped(candidates, self.max_candidates)
+
+    def __capped(self, candidates, limit):
+        for i, candidate in enumerate(candidates):
+            if i == limit:
+                self.exceeded.add("candidates")
+                return
+            yield candidate
+
+    def get_candidates(self, mention, document, pronoun=False, window=1):
         """
         given a mention, returns a  generator of candidates
         the candidates from the first sentence are in BFS-left to right
-        order, those of the second sentences are:
-            - BFS right to left if the mention is a pronoun
-            - BFS left to right otherwise
+        order, those of the previous sentences are:
+            - BFS left to right if the mention is a pronoun
+            - BFS right to left otherwise
+        window is the number of previous sentences that are searched
+        (None: all previous sentences of the document). Sentences are
+        searched from the closest to the farthest and the candidates
+        are generated lazily, so that the cost only depends on the
+        size of the window and not on the length of the document.
+        At most max_candidates are generated
         """
+        return self.cap(
+            self.__candidates(mention, document, pronoun, window)
+        )
+
+    def __candidates(self, mention, document, pronoun, window):
         this_sentence = mention.sentence
 
         # first get the candidates from this sentence
         # in BFS left-to-right order
-        possible = [i for i in document.lr[this_sentence] if i < mention]
+        for candidate in document.lr[this_sentence]:
+            if candidate < mention:
+                yield candidate
 
         # if not the first sentence, look for
-        # candidates in previous sentence
-        # in BFS right-to-left order
-        previous_sentence = []
-        if this_sentence != 0:
-            prev = this_sentence - 1
-            if pronoun:
-                previous_sentence = [i for i in document.lr[prev]]
-            else:
-                previous_sentence = [i for i in document.rl[prev]]
-
-        all_candidates = possible + previous_sentence
-
-        for candidate in all_candidates:
-            yield candidate
-
-    def merge(self, this, that):
+        # candidates in the previous sentences
+        if window is None:
+            first_sentence = 0
+        else:
+            first_sentence = max(0, this_sentence - window)
+
+        # the right-to-left order is only
+        # available if a sieve requires it
+        if pronoun or not document.rl:
+            order = document.lr
+        else:
+            order = document.rl
+
+        for prev in range(this_sentence - 1, first_sentence - 1, -1):
+            yield from order[prev]
+
+    def merge(self, this, that, rule=None):
         """
         merge this mention into the cluster of that mention.
         this and that are mention objects. Attributes will
-        also be updated.
+        also be updated. rule is the name of the rule of the
+        sieve that matched (only saved with provenance)
         """
+        if self.journal is not None:
+            self.journal.add(this.span, that.span, rule)
+
         # change cluster of this mention
         new_cluster = self.mentions[that.span].cluster
         self.mentions[this.span].cluster = new_cluster
 
         # merge attributes of mentions
-        self.attributes[new_cluster] += this.attributes
+        if self.track_attributes:
+            self.attributes[new_cluster] += this.attributes
 
         # this mention has antecedent
         self.mentions[this.span].antecedent = True
+        self.unresolved.pop(this.span, None)
 
         # add pointer from that mention to this
         self.mentions[that.span].next = this.span
@@ -107,12 +253,23 @@ class ClusterContainer:
             self.mentions[next_node].cluster = new_cluster
 
             # update cluster attributes
-            to_add = self.mentions[next_node].attributes
-            self.attributes[new_cluster] += to_add
+            if self.track_attributes:
+                to_add = self.mentions[next_node].attributes
+                self.attributes[new_cluster] += to_add
 
             # go to next mention
             next_node = self.mentions[next_node].next
 
+    def replay(self, journal):
+        """
+        apply again the merges of a journal, recorded
+        on the same mentions
+        """
+        for sieve, rule, this, that in journal:
+            if self.journal is not None:
+                self.journal.sieve = sieve
+            self.merge(self.mentions[this], self.mentions[that], rule)
+
     def map_clusters(self):
         """
         after having applied all sieves to merge the clusters,
@@ -142,6 +299,25 @@ class ClusterContainer:
 
         return result
 
+    def to_arrays(self):
+        """
+        compact representation of the clusters as two arrays:
+            - spans: begin and end of each mention one
+                after the other (sorted by span)
+            - clusters: cluster of each mention
+        ex.
+            spans:      [3, 4, 10, 10, 12, 15]
+            clusters:   [0, 0, 2]
+        """
+        spans = array("l")
+        clusters = array("l")
+
+        for mention in self.mentions.values():
+            spans.extend(mention.span)
+            clusters.append(mention.cluster)
+
+        return spans, clusters
+
 
 if __name__ == "__main__":
     from mps.text.word import Word
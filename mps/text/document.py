@@ -9,6 +9,9 @@ following information:
     - coreference sets (for evaluation)
 """
 
+from array import array
+from contextlib import nullcontext
+
 from nltk.tree import Tree
 
 from mps.text.cluster_container import ClusterContainer
@@ -31,17 +34,40 @@ class Document:
         self.nps = []
         self.lr = []
         self.rl = []
+        self._token_sentences = None
 
-    def process(self):
-        self.convert_trees()
-        self.extract_nps()
-        self.convert_coref()
-
-    def convert_trees(self):
+    def process(self, low_memory=False, features=None, stage=nullcontext):
+        """
+        convert the trees and extract the mentions. features
+        is a set with the optional information that is built:
+            - "rl": right-to-left BFS order of the mentions
+            - "gold": golden coreference clusters
+        (None: everything). Attributes of the mentions are
+        always calculated only when they are needed.
+        Each step is run in the context returned by stage(name)
+        (used for profiling)
+        """
+        if features is None:
+            features = {"rl", "gold"}
+
+        with stage("convert_trees"):
+            self.convert_trees()
+        with stage("extract_nps"):
+            self.extract_nps(rl="rl" in features)
+        if low_memory:
+            self.release_trees()
+        if "gold" in features:
+            with stage("convert_coref"):
+                self.convert_coref()
+
+    def convert_trees(self, first_token=0, first_sentence=0):
         """
         convert trees from string to nltk.Tree
         substitute leaves of syntax trees with Word objects to
-        keep track of the index of the word in the document
+        keep track of the index of the word in the document.
+        first_token and first_sentence are the indices of the
+        first word and tree if the document is only a part of
+        a longer text (see mps/online.py)
         """
         tok_counter = 0
         for t, string_tree in enumerate(self.trees):
@@ -57,21 +83,24 @@ class Document:
 
                 # create a word and append it to the tree
                 mention = Word(
-                    string, tok_counter, t, tag, ner
+                    string, first_token + tok_counter,
+                    first_sentence + t, tag, ner
                     )
                 tree[leaf] = mention
                 tok_counter += 1
 
             self.trees[t] = tree
 
-    def extract_nps(self):
+    def extract_nps(self, rl=True):
         """
         Extracts NPs from the trees and save them as
         Mention-objects in self.nps. In this step,
         each tree is traversed in BFS order left to right
         and right to left and right to lefts. NPs are
         then saved to avoid calling BFS multiple times on
-        the same tree
+        the same tree. Both orders share the same
+        Mention-objects, only the order differs.
+        The right-to-left order is skipped if rl is False
         """
         if not self.trees:
             raise DocumentNotParsed(
@@ -92,18 +121,43 @@ class Document:
             self.nps += mentions
             self.lr.append(mentions)
 
+            if not rl:
+                continue
+
             # traverse same tree in right-to-left BFS fashion
+            # and reuse the mentions created for the LtR order
+            by_span = {mention.span: mention for mention in mentions}
             nps = levelorder(tree, True)
             mentions = []
             for np in nps:
                 if np.label() == "NP":
-                    mention = Mention(np.leaves())
-                    mention.tree = np
-                    mentions.append(mention)
+                    first, last = np.leaves()[0], np.leaves()[-1]
+                    mentions.append(by_span[(first.index, last.index)])
             self.rl.append(mentions)
 
         self.nps.sort()
 
+    def release_trees(self):
+        """
+        free the syntax trees once the mentions are extracted.
+        Each mention keeps only the part of its tree that
+        is needed by the sieves
+        """
+        for mention in self.nps:
+            mention.release_tree()
+
+        self.trees = []
+
+    def release_mentions(self):
+        """
+        free the mentions, their words and both BFS orders once
+        the clusters are converted (see ClusterContainer.to_arrays
+        and convert_mapping). Tokens and tags are kept
+        """
+        self.nps = []
+        self.lr = []
+        self.rl = []
+
     def convert_coref(self):
         """
         convert list of Word-indexes into Mentions
@@ -111,6 +165,7 @@ class Document:
         into a ClusterContainer-object for evaluation
         """
         mentions = []
+        sentence_of = self.token_sentences
 
         # convert list of indeces into Mentions
         for cluster, word_lists in self.coref.items():
@@ -122,9 +177,7 @@ class Document:
                     token = self.tokens[word_index]
                     tag = self.pos_tags[word_index]
                     ner = self.ner[word_index]
-                    sentence = 0
-                    while word_index > self.sentences[sentence].stop - 1:
-                        sentence += 1
+                    sentence = sentence_of[word_index]
                     words.append(Word(token, word_index, sentence, tag, ner))
 
                 # create a mention
@@ -136,11 +189,60 @@ class Document:
         mentions.sort()
 
         # create Cluster-object
-        clusters = ClusterContainer(mentions, mapped=True)
+        clusters = ClusterContainer(mentions, mapped=True, attributes=False)
 
         # save cluster object
         self.coref = clusters
 
+    @property
+    def token_sentences(self):
+        """
+        array with the index of the sentence of each token,
+        built once from the sentence boundaries
+        """
+        if self._token_sentences is None:
+            self._token_sentences = array("l")
+            for i, sentence in enumerate(self.sentences):
+                self._token_sentences.extend(
+                    [i] * (sentence.stop - sentence.start)
+                )
+
+        return self._token_sentences
+
+    def gold_mapping(self):
+        """
+        returns the golden clusters with the same result as
+        convert_coref followed by coref.convert_mapping, but
+        only works with spans (no Words, Mentions or Attributes):
+        spans are sorted (if a span is in more clusters, the
+        last one is kept) and clusters are ordered by their
+        first span
+            {cluster: [(begin, end), ...]}
+        """
+        sentence_of = self.token_sentences
+        spans = []
+        for cluster, word_lists in self.coref.items():
+            cluster = int(cluster)
+            for w_list in word_lists:
+                begin, end = w_list[0], w_list[-1]
+                if sentence_of[begin] != sentence_of[end]:
+                    raise ValueError(
+                        "Mentions cannot span over multiple sentences"
+                    )
+                spans.append(((begin, end), cluster))
+
+        # stable sort, as the mentions in convert_coref
+        spans.sort(key=lambda x: x[0])
+        clusters = dict(spans)
+
+        mapping = {}
+        for span, cluster in clusters.items():
+            if cluster not in mapping:
+                mapping[cluster] = []
+            mapping[cluster].append(span)
+
+        return mapping
+
     @property
     def text(self):
         return " ".join(self.tokens)
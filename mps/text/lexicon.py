@@ -0,0 +1,230 @@
+"""
+Lexicon of the gender, number and animacy of nouns and
+noun phrases (e.g. built from the counts of Bergsma and
+Lin, 2006). The lexicon is a trie packed in a binary file
+that is memory-mapped (read-only): loading only maps the file
+and all processes share the same pages. The trie is saved as
+arrays (little endian):
+    - firsts: first edge of each node (nodes + 1 entries, the
+        edges of a node are contiguous and sorted by label)
+    - values: flags of each node (0: not a key)
+    - labels: byte (utf-8) of each edge
+    - children: node reached by each edge
+so that a lookup follows one edge for each byte of the key
+"""
+
+from array import array
+import mmap
+import struct
+import sys
+
+from mps.utils.errors import InvalidLexicon
+
+
+MAGIC = b"MSCLEX01"
+HEADER = struct.Struct("<8sII")
+
+# flags of the values
+MASCULINE = 1
+FEMININE = 2
+NEUTER = 4
+SINGULAR = 8
+PLURAL = 16
+ANIMATE = 32
+INANIMATE = 64
+
+GENUS = {MASCULINE: "masculine", FEMININE: "feminine", NEUTER: "neuter"}
+NUMBER = {SINGULAR: "singular", PLURAL: "plural"}
+ANIMACY = {ANIMATE: True, INANIMATE: False}
+
+# single bytes used to search the labels of a node
+BYTES = [bytes((i,)) for i in range(256)]
+
+
+def little_endian(values):
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values.tobytes()
+
+
+def padding(size):
+    return b"\x00" * (-size % 4)
+
+
+def build_lexicon(entries, path):
+    """
+    save a lexicon given an iterable of (key, flags).
+    Keys are lower cased, flags of the same key are joined.
+    Returns the number of keys
+    """
+    # nodes of the trie: [children {byte: node}, flags]
+    nodes = [[{}, 0]]
+    keys = 0
+    for key, flags in entries:
+        node = nodes[0]
+        for byte in key.lower().encode("utf-8"):
+            child = node[0].get(byte)
+            if child is None:
+                child = node[0][byte] = len(nodes)
+                nodes.append([{}, 0])
+            node = nodes[child]
+        keys += node[1] == 0
+        node[1] |= flags
+
+    # number the nodes breadth first, so that the
+    # edges of each node are contiguous
+    order = [0]
+    numbers = {0: 0}
+    for node in order:
+        for byte in sorted(nodes[node][0]):
+            child = nodes[node][0][byte]
+            numbers[child] = len(order)
+            order.append(child)
+
+    firsts = array("I", [0])
+    values = array("B")
+    labels = array("B")
+    children = array("I")
+    for node in order:
+        edges = nodes[node][0]
+        for byte in sorted(edges):
+            labels.append(byte)
+            children.append(numbers[edges[byte]])
+        firsts.append(len(labels))
+        values.append(nodes[node][1])
+
+    with open(path, "wb") as ofile:
+        ofile.write(HEADER.pack(MAGIC, len(order), len(labels)))
+        for data in (firsts, values, labels, children):
+            data = little_endian(data)
+            ofile.write(data + padding(len(data)))
+
+    return keys
+
+
+def read_bergsma_lin(infile, min_count=3):
+    """
+    read the gender and number counts of Bergsma and Lin:
+        noun phrase<TAB>masculine feminine neuter plural
+    and yield (noun phrase, flags). A value is only assigned if
+    its count is at least min_count and twice the count of the
+    alternatives. Masculine and feminine nouns are animate,
+    neuter nouns inanimate
+    """
+    for line in infile:
+        if "\t" not in line:
+            continue
+        phrase, counts = line.rstrip("\n").rsplit("\t", 1)
+        try:
+            masculine, feminine, neuter, plural = (
+                int(i) for i in counts.split()
+            )
+        except ValueError:
+            continue
+
+        flags = 0
+        genders = (
+            (masculine, MASCULINE | ANIMATE),
+            (feminine, FEMININE | ANIMATE),
+            (neuter, NEUTER | INANIMATE)
+        )
+        total = masculine + feminine + neuter
+        for count, value in genders:
+            if count >= min_count and count * 0.5 > total - count:
+                flags |= value
+
+        if total >= min_count and total * 0.5 > plural:
+            flags |= SINGULAR
+        elif plural >= min_count and plural * 0.5 > total:
+            flags |= PLURAL
+
+        if flags:
+            yield phrase, flags
+
+
+class Lexicon:
+    """
+    read-only lexicon saved with build_lexicon. Lookups
+    take one step for each byte of the key
+    """
+    def __init__(self, path):
+        if sys.byteorder == "big":
+            raise InvalidLexicon(
+                "Lexicons are only supported on little endian platforms"
+            )
+
+        self.path = path
+        with open(path, "rb") as infile:
+            try:
+                self.data = mmap.mmap(
+                    infile.fileno(), 0, access=mmap.ACCESS_READ
+                )
+            except ValueError:
+                # empty file
+                raise InvalidLexicon(f"Not a lexicon file: {path}")
+
+        magic = None
+        if len(self.data) >= HEADER.size:
+            magic, nodes, edges = HEADER.unpack_from(self.data)
+        if magic != MAGIC:
+            self.data.close()
+            raise InvalidLexicon(f"Not a lexicon file: {path}")
+
+        # views of the arrays, the file is not copied
+        self.views = []
+        offsets = []
+        offset = HEADER.size
+        for size, typecode in ((nodes + 1, "I"), (nodes, "B"),
+                               (edges, "B"), (edges, "I")):
+            size *= array(typecode).itemsize
+            view = memoryview(self.data)[offset:offset + size]
+            self.views += [view, view.cast(typecode)]
+            offsets.append(offset)
+            offset += size + (-size % 4)
+
+        self.firsts, self.values, _, self.children = self.views[1::2]
+        self.labels_offset = offsets[2]
+
+    def __getstate__(self):
+        # memory maps are not pickled, workers map the file again
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def __len__(self):
+        return sum(1 for i in self.values if i)
+
+    def get(self, key):
+        """
+        returns the flags of a key (0 if it is not in the lexicon)
+        """
+        node = 0
+        offset = self.labels_offset
+        for byte in key.lower().encode("utf-8"):
+            found = self.data.find(
+                BYTES[byte],
+                offset + self.firsts[node],
+                offset + self.firsts[node + 1]
+            )
+            if found < 0:
+                return 0
+            node = self.children[found - offset]
+
+        return self.values[node]
+
+    def attributes(self, key):
+        """
+        returns genus, number and animacy of a key as sets
+        (empty if they are not known)
+        """
+        flags = self.get(key)
+        return tuple(
+            {value for flag, value in names.items() if flags & flag}
+            for names in (GENUS, NUMBER, ANIMACY)
+        )
+
+    def close(self):
+        for view in reversed(self.views):
+            view.release()
+        self.data.close()
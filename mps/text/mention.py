@@ -15,6 +15,8 @@ against other mentions:
 
 import re
 
+from nltk.tree import Tree
+
 from mps.text.attributes import Attributes
 
 
@@ -27,8 +29,9 @@ class Mention:
         self.cluster = None
         self.next = None
         self.tree = None
+        self.np_head = None
         self.head = self.get_head(words)
-        self.attributes = Attributes(self)
+        self._attributes = None
 
         if words[0].sentence == words[-1].sentence:
             self.sentence = words[0].sentence
@@ -67,6 +70,35 @@ class Mention:
     def __getitem__(self, index):
         return self.words[index]
 
+    @property
+    def attributes(self):
+        """
+        attributes are only calculated when they are needed
+        """
+        return self.get_attributes()
+
+    def get_attributes(self, lexicon=None):
+        """
+        calculate the attributes (only once) with the
+        genus, number and animacy of the lexicon
+        """
+        if self._attributes is None:
+            self._attributes = Attributes(self, lexicon)
+        return self._attributes
+
+    def release_tree(self):
+        """
+        drop the reference to the syntax tree of the mention.
+        The first subtree is kept as a list of words if it
+        is a NP itself (naive assumption: it is the head
+        of the NP)
+        """
+        if self.tree is not None:
+            first = self.tree[0]
+            if isinstance(first, Tree) and first.label() == "NP":
+                self.np_head = first.leaves()
+            self.tree = None
+
     def get_head(self, words):
         """
         This function will extract the head of the NP.
@@ -0,0 +1,54 @@
+"""
+The provenance of a ClusterContainer records which sieve
+and which rule of the sieve caused each merge:
+    ("PreciseConstructs", "acronym", (41, 41), (37, 39))
+    --> mention 41-41 was merged into the cluster of 37-39
+Merges are saved in two arrays (spans and rule ids) and the
+names of the rules only once, so that recording a merge only
+appends 5 integers
+"""
+
+from array import array
+
+
+class Provenance:
+
+    def __init__(self):
+        # sieve that is currently applied (see MultiPassSieve)
+        self.sieve = None
+
+        # (sieve, rule) of each rule id
+        self.rules = []
+        self.ids = {}
+
+        # begin and end of both mentions of each merge
+        self.spans = array("l")
+        self.merges = array("l")
+
+    def __len__(self):
+        return len(self.merges)
+
+    def __iter__(self):
+        """
+        yields (sieve, rule, mention span, antecedent span)
+        for each merge, in the order of the merges
+        """
+        for i, rule_id in enumerate(self.merges):
+            sieve, rule = self.rules[rule_id]
+            b1, e1, b2, e2 = self.spans[i * 4:i * 4 + 4]
+            yield sieve, rule, (b1, e1), (b2, e2)
+
+    def add(self, this, that, rule=None):
+        """
+        record the merge of the mention with span this
+        into the cluster of the mention with span that
+        """
+        key = (self.sieve or "-", rule or "-")
+        rule_id = self.ids.get(key)
+        if rule_id is None:
+            rule_id = self.ids[key] = len(self.rules)
+            self.rules.append(key)
+
+        self.spans.extend(this)
+        self.spans.extend(that)
+        self.merges.append(rule_id)
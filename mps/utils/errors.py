@@ -6,3 +6,13 @@ class DocumentNotParsed(Exception):
 class MissingSieve(Exception):
     def __init__(self, msg):
         super().__init__(msg)
+
+
+class InvalidLexicon(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
+
+
+class InvalidCheckpoint(Exception):
+    def __init__(self, msg):
+        super().__init__(msg)
@@ -1,5 +1,8 @@
 from src.main_functions.evaluation import evaluate
 from src.main_functions.extraction import extract
+from src.main_functions.lexicon import build
+from src.main_functions.service import serve
+from src.main_functions.stream import stream
 from src.utils.cli import parse_arguments
 from src.utils.errors import InvalidArgument
 
@@ -11,6 +14,12 @@ def main():
         extract(args)
     elif args.subparser == "evaluate":
         evaluate(args)
+    elif args.subparser == "serve":
+        serve(args)
+    elif args.subparser == "stream":
+        stream(args)
+    elif args.subparser == "lexicon":
+        build(args)
     else:
         raise InvalidArgument(
             "Selected argument not supported"
@@ -4,17 +4,34 @@ F1 score based on unordered predictions and golden
 labels. For every call of the evaluate_document function
 the evaluator saves the number of predictions, golden
 labels and theirs intersection to calculate precision,
-recall and F1 score on the entire data set
+recall and F1 score on the entire data set.
+In the same pass, the counts of the cluster based metrics
+MUC, B-cubed, CEAF-e and CEAF-m (see metrics.py) are saved.
+If the provenance of the merges is known, the precision of
+the links is also broken down by sieve and rule
 """
 
+from pairwise_evaluator import metrics as cluster_metrics
+
 
 class Evaluator:
 
+    metrics = ("pairwise", "muc", "bcub", "ceafe", "ceafm")
+
     def __init__(self):
         self.dataset_found = 0
         self.dataset_gold = 0
         self.dataset_prediction = 0
 
+        # precision numerator, precision denominator,
+        # recall numerator, recall denominator
+        self.dataset_counts = {
+            metric: [0, 0, 0, 0] for metric in self.metrics
+        }
+
+        # {sieve: {rule: [correct links, links]}}
+        self.link_counts = {}
+
     def reset(self):
         self.__init__()
 
@@ -55,12 +72,12 @@ class Evaluator:
             return 0
         return 2 * precision * recall / (precision + recall)
 
-    def evaluate_document(self, preds_mapping, gold_mapping):
+    def count_document(self, preds_mapping, gold_mapping):
         """
-        evaluates a single document by calculating:
-            - precision
-            - recall
-            - f1
+        calculates the counts of all metrics for a single
+        document without saving them:
+            {metric: (precision numerator, precision denominator,
+                      recall numerator, recall denominator)}
         """
         # create transitive closure
         prediction = self.__transitive_closure(preds_mapping)
@@ -76,32 +93,95 @@ class Evaluator:
         gold = len(gold)
         found = len(found)
 
-        # save for data set evaluation
+        # cluster based metrics
+        counts = cluster_metrics.score(
+            list(gold_mapping.values()), list(preds_mapping.values())
+        )
+        counts["pairwise"] = (found, prediction, found, gold)
+
+        return counts
+
+    @staticmethod
+    def count_links(links, gold_mapping):
+        """
+        counts the links (see ClusterContainer.provenance) of
+        a document created by each sieve and rule and how many
+        of them are correct, i.e. both mentions are in the same
+        golden cluster:
+            {sieve: {rule: [correct links, links]}}
+        """
+        gold = {
+            span: cluster
+            for cluster, spans in gold_mapping.items() for span in spans
+        }
+
+        counts = {}
+        for sieve, rule, this, that in links:
+            count = counts.setdefault(sieve, {}).setdefault(rule, [0, 0])
+            cluster = gold.get(tuple(this))
+            if cluster is not None and cluster == gold.get(tuple(that)):
+                count[0] += 1
+            count[1] += 1
+
+        return counts
+
+    def add_link_counts(self, counts):
+        """
+        save the link counts of a document (see count_links)
+        """
+        for sieve, rules in counts.items():
+            saved = self.link_counts.setdefault(sieve, {})
+            for rule, (correct, links) in rules.items():
+                count = saved.setdefault(rule, [0, 0])
+                count[0] += correct
+                count[1] += links
+
+    def add_counts(self, counts):
+        """
+        save the counts of a document (see count_document)
+        for data set evaluation
+        """
+        found, prediction, _, gold = counts["pairwise"]
         self.dataset_found += found
         self.dataset_gold += gold
         self.dataset_prediction += prediction
 
-        # calculate precision, recall and f1 for document
-        precision = self.__precision(found, prediction)
-        recall = self.__recall(found, gold)
+        for metric, values in counts.items():
+            for i, value in enumerate(values):
+                self.dataset_counts[metric][i] += value
+
+    def evaluate_counts(self, counts):
+        """
+        calculates precision, recall and f1 from the
+        counts of a single metric
+        """
+        p_num, p_den, r_num, r_den = counts
+
+        precision = self.__precision(p_num, p_den)
+        recall = self.__recall(r_num, r_den)
         f1 = self.__f1_score(precision, recall)
 
         return precision, recall, f1
 
-    def evaluate_dataset(self):
+    def evaluate_document(self, preds_mapping, gold_mapping):
         """
-        calculates precision, recall and f1 for the entire
-        data set using the numbers saved from evaluate_document
-        calls
+        evaluates a single document by calculating:
+            - precision
+            - recall
+            - f1
         """
-        precision = self.__precision(
-            self.dataset_found, self.dataset_prediction
-        )
+        counts = self.count_document(preds_mapping, gold_mapping)
 
-        recall = self.__recall(
-            self.dataset_found, self.dataset_gold
-        )
+        # save for data set evaluation
+        self.add_counts(counts)
 
-        f1 = self.__f1_score(precision, recall)
+        # calculate precision, recall and f1 for document
+        return self.evaluate_counts(counts["pairwise"])
 
-        return precision, recall, f1
+    def evaluate_dataset(self, metric="pairwise"):
+        """
+        calculates precision, recall and f1 for the entire
+        data set using the numbers saved from evaluate_document
+        calls. metric is one of Evaluator.metrics
+        """
+        return self.evaluate_counts(self.dataset_counts[metric])
@@ -0,0 +1,217 @@
+"""
+Cluster based coreference metrics: MUC, B-cubed, CEAF-e and CEAF-m.
+All metrics are calculated from the overlap between key (gold)
+and response (predicted) clusters, which is computed once in linear
+time with a map from each span to its response cluster. Each metric
+returns the counts needed to calculate precision and recall:
+    (precision numerator, precision denominator,
+     recall numerator, recall denominator)
+so that they can be summed over the documents of a data set.
+CEAF aligns key and response clusters with the Hungarian algorithm.
+Since most clusters only overlap with a few other clusters, the
+(sparse) overlap matrix is split in connected components and each
+component is solved on its own
+"""
+
+INF = float("inf")
+
+
+def cluster_overlap(key, response):
+    """
+    given two lists of clusters (each a list of spans),
+    returns a dictionary with the number of shared
+    mentions for each pair of overlapping clusters:
+        {(key index, response index): overlap}
+    """
+    span_to_response = {}
+    for r, cluster in enumerate(response):
+        for span in cluster:
+            span_to_response[span] = r
+
+    overlap = {}
+    for k, cluster in enumerate(key):
+        for span in cluster:
+            r = span_to_response.get(span)
+            if r is not None:
+                overlap[(k, r)] = overlap.get((k, r), 0) + 1
+
+    return overlap
+
+
+def muc(key, response, overlap):
+    """
+    link based MUC metric. The recall numerator is the sum over
+    the key clusters of |K| - |partitions of K in the response|,
+    where each mention of K missing in the response is a partition
+    on its own. This is the same as the sum of (overlap - 1) over
+    the overlapping pairs, which is also the precision numerator
+    """
+    found = sum(shared - 1 for shared in overlap.values())
+    p_den = sum(len(cluster) - 1 for cluster in response)
+    r_den = sum(len(cluster) - 1 for cluster in key)
+
+    return found, p_den, found, r_den
+
+
+def b_cubed(key, response, overlap):
+    """
+    mention based B-cubed metric: for each mention the
+    overlap between its key and response cluster
+    """
+    p_num = 0
+    r_num = 0
+    for (k, r), shared in overlap.items():
+        r_num += shared * shared / len(key[k])
+        p_num += shared * shared / len(response[r])
+
+    p_den = sum(len(cluster) for cluster in response)
+    r_den = sum(len(cluster) for cluster in key)
+
+    return p_num, p_den, r_num, r_den
+
+
+def ceaf(key, response, overlap):
+    """
+    entity based CEAF (phi 4) and mention based CEAF (phi 3)
+    returns the counts of both metrics
+    """
+    entity = 0
+    mention = 0
+
+    for component in components(overlap):
+        keys = sorted({k for k, _ in component})
+        responses = sorted({r for _, r in component})
+
+        # phi 3: number of shared mentions
+        # phi 4: dice coefficient of the clusters
+        phi3 = [[0] * len(responses) for _ in keys]
+        phi4 = [[0] * len(responses) for _ in keys]
+        for i, k in enumerate(keys):
+            for j, r in enumerate(responses):
+                shared = overlap.get((k, r), 0)
+                phi3[i][j] = shared
+                phi4[i][j] = (
+                    2 * shared / (len(key[k]) + len(response[r]))
+                )
+
+        mention += max_assignment(phi3)
+        entity += max_assignment(phi4)
+
+    ceafe = (entity, len(response), entity, len(key))
+    ceafm = (
+        mention, sum(len(cluster) for cluster in response),
+        mention, sum(len(cluster) for cluster in key)
+    )
+
+    return ceafe, ceafm
+
+
+def components(overlap):
+    """
+    split the pairs of overlapping clusters in connected
+    components (clusters linked by at least one shared mention)
+    """
+    parent = {}
+
+    def find(node):
+        while parent[node] != node:
+            parent[node] = parent[parent[node]]
+            node = parent[node]
+        return node
+
+    for k, r in overlap:
+        for node in (("k", k), ("r", r)):
+            if node not in parent:
+                parent[node] = node
+        parent[find(("k", k))] = find(("r", r))
+
+    grouped = {}
+    for k, r in overlap:
+        grouped.setdefault(find(("k", k)), []).append((k, r))
+
+    return grouped.values()
+
+
+def max_assignment(weights):
+    """
+    Hungarian algorithm (shortest augmenting path version)
+    returns the maximum total weight of a one to one assignment
+    between the rows and the columns of the weight matrix
+    """
+    if len(weights) == 1 or len(weights[0]) == 1:
+        # only one row or column: take the best pair
+        return max(max(row) for row in weights)
+
+    # rows must not be more than columns
+    if len(weights) > len(weights[0]):
+        weights = [list(column) for column in zip(*weights)]
+
+    n = len(weights)
+    m = len(weights[0])
+
+    # potentials, assignment and path (1-indexed, 0 is a dummy)
+    u = [0] * (n + 1)
+    v = [0] * (m + 1)
+    assigned = [0] * (m + 1)
+    way = [0] * (m + 1)
+
+    for row in range(1, n + 1):
+        assigned[0] = row
+        col0 = 0
+        min_value = [INF] * (m + 1)
+        used = [False] * (m + 1)
+
+        while True:
+            used[col0] = True
+            row0 = assigned[col0]
+            delta = INF
+            col1 = 0
+
+            for col in range(1, m + 1):
+                if not used[col]:
+                    # maximise weight = minimise negative weight
+                    cost = -weights[row0 - 1][col - 1] - u[row0] - v[col]
+                    if cost < min_value[col]:
+                        min_value[col] = cost
+                        way[col] = col0
+                    if min_value[col] < delta:
+                        delta = min_value[col]
+                        col1 = col
+
+            for col in range(m + 1):
+                if used[col]:
+                    u[assigned[col]] += delta
+                    v[col] -= delta
+                else:
+                    min_value[col] -= delta
+
+            col0 = col1
+            if assigned[col0] == 0:
+                break
+
+        # update assignment along the augmenting path
+        while col0 != 0:
+            col1 = way[col0]
+            assigned[col0] = assigned[col1]
+            col0 = col1
+
+    return sum(
+        weights[assigned[col] - 1][col - 1]
+        for col in range(1, m + 1) if assigned[col] != 0
+    )
+
+
+def score(key, response):
+    """
+    calculates the counts of all metrics for a document.
+    key and response are lists of clusters (lists of spans)
+    """
+    overlap = cluster_overlap(key, response)
+    ceafe, ceafm = ceaf(key, response, overlap)
+
+    return {
+        "muc": muc(key, response, overlap),
+        "bcub": b_cubed(key, response, overlap),
+        "ceafe": ceafe,
+        "ceafm": ceafm
+    }
@@ -0,0 +1,241 @@
+"""
+Resampling of the counts of the documents (see
+Evaluator.count_document), vectorized with NumPy (optional
+dependency). The counts are stacked in an array of shape
+(documents, metrics, 4) and the scores of many resamples are
+calculated at once: a resample is a vector of weights (how many
+times each document is drawn) and its counts are the product of
+the weights and the counts of the documents.
+    - paired_bootstrap: two runs on the same documents are
+        resampled with the same weights. The p-value is the
+        fraction of resamples in which the difference of the
+        F1 scores does not have the observed sign (Koehn, 2004)
+    - stratified_sample and stratified_estimate: a subset of the
+        documents is drawn from each stratum (e.g. the genre) in
+        proportion to its size and the scores of the whole corpus
+        are estimated, with confidence intervals from a bootstrap
+        of the sample within each stratum
+Weights are drawn in chunks of resamples, so that the memory
+does not grow with the number of resamples
+"""
+
+from pairwise_evaluator.evaluator import Evaluator
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+METRICS = Evaluator.metrics
+
+# scores returned for each resample: F1 of each metric and CoNLL
+SCORES = (*METRICS, "conll")
+CONLL = [METRICS.index(i) for i in ("muc", "bcub", "ceafe")]
+
+
+def require_numpy():
+    if np is None:
+        raise ImportError(
+            "NumPy is needed for bootstrap and sampled evaluations, "
+            "install it with: pip install numpy"
+        )
+
+
+def counts_array(counts):
+    """
+    stack the counts of the documents (a list of the results
+    of Evaluator.count_document) in an array of shape
+    (documents, metrics, 4)
+    """
+    require_numpy()
+    array = np.zeros((len(counts), len(METRICS), 4))
+    for i, document in enumerate(counts):
+        array[i] = [document[metric] for metric in METRICS]
+
+    return array
+
+
+def f1_scores(totals):
+    """
+    F1 score of each metric and the CoNLL score given
+    counts of shape (..., metrics, 4). Returns an array
+    of shape (..., metrics + 1), see SCORES
+    """
+    p_num, p_den, r_num, r_den = np.moveaxis(totals, -1, 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(p_den > 0, p_num / p_den, 0)
+        recall = np.where(r_den > 0, r_num / r_den, 0)
+        f1 = np.where(
+            precision + recall > 0,
+            2 * precision * recall / (precision + recall),
+            0
+        )
+    conll = f1[..., CONLL].mean(axis=-1, keepdims=True)
+
+    return np.concatenate([f1, conll], axis=-1)
+
+
+def resampled_scores(weights, counts):
+    """
+    scores of each resample given weights of shape
+    (resamples, documents) and counts of the documents
+    """
+    documents, metrics, _ = counts.shape
+    totals = weights @ counts.reshape(documents, metrics * 4)
+    return f1_scores(totals.reshape(-1, metrics, 4))
+
+
+def bootstrap_weights(rng, documents, size):
+    """
+    weights of size resamples of the documents: documents
+    are drawn with replacement and counted in one bincount
+    (faster than a multinomial distribution)
+    """
+    drawn = rng.integers(0, documents, size=(size, documents))
+    drawn += np.arange(size)[:, None] * documents
+    weights = np.bincount(drawn.ravel(), minlength=size * documents)
+    return weights.reshape(size, documents).astype(np.float64)
+
+
+def chunks(samples, chunk):
+    for start in range(0, samples, chunk):
+        yield min(chunk, samples - start)
+
+
+def interval(scores, confidence):
+    """
+    percentile confidence interval of each column
+    """
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(scores, [alpha, 1 - alpha], axis=0)
+    return low, high
+
+
+def paired_bootstrap(counts_a, counts_b, samples=10000, confidence=0.95,
+                     seed=None, chunk=1000):
+    """
+    paired bootstrap of two runs given the counts of the same
+    documents in the same order (see counts_array). Returns a
+    dictionary of arrays with one value for each score (see SCORES):
+        a, b: scores of the runs
+        delta: b - a
+        low, high: confidence interval of delta
+        p_value: probability of the sign of delta by chance
+    """
+    require_numpy()
+    if counts_a.shape != counts_b.shape:
+        raise ValueError("The runs must have the counts of the same documents")
+    if not len(counts_a):
+        raise ValueError("The runs have no documents in common")
+
+    rng = np.random.default_rng(seed)
+    documents = len(counts_a)
+
+    a = f1_scores(counts_a.sum(axis=0))
+    b = f1_scores(counts_b.sum(axis=0))
+    delta = b - a
+
+    deltas = np.empty((samples, len(SCORES)))
+    start = 0
+    for size in chunks(samples, chunk):
+        weights = bootstrap_weights(rng, documents, size)
+        deltas[start:start + size] = (
+            resampled_scores(weights, counts_b)
+            - resampled_scores(weights, counts_a)
+        )
+        start += size
+
+    # resamples in which the difference has not the observed sign
+    p_value = np.where(
+        delta > 0, (deltas <= 0).mean(axis=0),
+        np.where(delta < 0, (deltas >= 0).mean(axis=0), 1.0)
+    )
+    low, high = interval(deltas, confidence)
+
+    return {
+        "a": a, "b": b, "delta": delta,
+        "low": low, "high": high, "p_value": p_value
+    }
+
+
+def stratified_sample(strata, size, seed=None):
+    """
+    draw size documents without replacement, given the stratum
+    of each document. Each stratum gets a share of the sample
+    proportional to its size (at least one document if the
+    sample is large enough). Returns the sorted indices of the
+    drawn documents
+    """
+    require_numpy()
+    rng = np.random.default_rng(seed)
+    labels, inverse, sizes = np.unique(
+        np.asarray(strata), return_inverse=True, return_counts=True
+    )
+    size = min(size, len(strata))
+
+    # largest remainder allocation
+    shares = sizes * size / sizes.sum()
+    allocation = np.floor(shares).astype(int)
+    if size >= len(labels):
+        allocation = np.maximum(allocation, 1)
+    for i in np.argsort(allocation - shares):
+        if allocation.sum() >= size:
+            break
+        allocation[i] += 1
+
+    # the minimum of one document per stratum can exceed the
+    # size, the largest strata give back their extra documents
+    while allocation.sum() > size:
+        extra = np.where(allocation > 1, allocation - shares, -np.inf)
+        allocation[np.argmax(extra)] -= 1
+
+    drawn = [
+        rng.choice(np.flatnonzero(inverse == i), n, replace=False)
+        for i, n in enumerate(allocation) if n > 0
+    ]
+    return np.sort(np.concatenate(drawn)).tolist()
+
+
+def stratified_estimate(counts, strata, population, samples=10000,
+                        confidence=0.95, seed=None, chunk=1000):
+    """
+    estimate the scores of a corpus from the counts of a
+    stratified sample of its documents (see counts_array). strata
+    is the stratum of each sampled document and population the
+    number of documents of each stratum in the corpus. Returns a
+    dictionary of arrays with one value for each score (see SCORES):
+        estimate: scores of the corpus
+        low, high: confidence interval of the scores
+    """
+    require_numpy()
+    rng = np.random.default_rng(seed)
+    strata = np.asarray(strata)
+
+    # each document stands for population / sampled
+    # documents of its stratum
+    members = {}
+    scale = np.empty(len(strata))
+    for stratum in np.unique(strata):
+        members[stratum] = np.flatnonzero(strata == stratum)
+        scale[members[stratum]] = (
+            population[stratum] / len(members[stratum])
+        )
+
+    estimate = f1_scores(np.tensordot(scale, counts, axes=1))
+
+    scores = np.empty((samples, len(SCORES)))
+    start = 0
+    for size in chunks(samples, chunk):
+        # documents are resampled within their stratum
+        weights = np.empty((size, len(strata)))
+        for indices in members.values():
+            weights[:, indices] = bootstrap_weights(rng, len(indices), size)
+        scores[start:start + size] = resampled_scores(
+            weights * scale, counts
+        )
+        start += size
+
+    low, high = interval(scores, confidence)
+
+    return {"estimate": estimate, "low": low, "high": high}
@@ -1,58 +1,434 @@
 import os
 from pathlib import Path
-import re
 
 from pairwise_evaluator.evaluator import Evaluator
+from pairwise_evaluator.resampling import (
+    SCORES,
+    counts_array,
+    paired_bootstrap,
+    require_numpy,
+    stratified_estimate,
+    stratified_sample
+)
+from src.utils.errors import InvalidArgument
+from src.utils.store import ResultStore
+from src.utils.telemetry import Telemetry
 from src.utils.utils import (
-    progress_bar,
+    file_hash,
+    file_stamp,
+    load_index,
     read_extracted,
+    read_links,
     retrieve_files,
+    save_index,
     save_results
 )
 
 
+INDEX_FILE = ".evaluation_index.json"
+ENDINGS = ("preds", "gold", "links")
+
+
+def is_unchanged(entry, files):
+    """
+    checks whether the .preds, .gold and .links files of a
+    document are the same as in the index entry. Files with a
+    different modification time are compared by their hash, the
+    entry is updated if only the modification time changed
+    """
+    if {i for i in ENDINGS if i in entry} != set(files):
+        return False
+
+    for ending, path in files.items():
+        stamp = file_stamp(path)
+        saved = entry.get(ending)
+        if saved is None:
+            return False
+
+        if stamp != saved["stamp"]:
+            if file_hash(path) != saved["hash"]:
+                return False
+            saved["stamp"] = stamp
+
+    return True
+
+
 def evaluate(args):
     """
-    main function for the evaluation
+    main function for the evaluation. The counts of each
+    document are saved in an index in the input directory.
+    With the incremental option, only documents that changed
+    since the last evaluation are read and scored again.
+    Documents with a .links file (provenance of the merges)
+    are also counted by sieve and rule.
+    With compare, a second run is scored on the same documents
+    and both runs are compared with a paired bootstrap. With
+    sample, only a stratified sample of the documents is scored
+    and the scores of all documents are estimated.
+    If the path is a SQLite database, a run is evaluated
+    directly from the database (see evaluate_store)
     """
-    evaluator = Evaluator()
-    results = []
+    if args.compare is not None or args.sample is not None:
+        # fail before the documents are scored
+        require_numpy()
+
+    if ResultStore.is_store(args.path):
+        return evaluate_store(args)
+
     inputpath = Path(args.path)
-    documents = retrieve_files(inputpath)
+    doc_names = list_documents(inputpath)
+    if args.compare is not None:
+        other = Path(args.compare)
+        doc_names = paired_documents(doc_names, list_documents(other))
+
+    population = doc_names
+    doc_names = select_documents(doc_names, args)
+
+    evaluator = Evaluator()
+    counts, results, rescored = score_directory(
+        inputpath, doc_names, evaluator, args.incremental
+    )
+
+    if args.verbose:
+        save_results(results, "evaluation.log")
+
+    if args.incremental:
+        print(f"Scored {rescored} of {len(doc_names)} documents")
+
+    print_evaluation(evaluator, len(doc_names), len(population))
+
+    if args.sample is not None:
+        print_estimate(counts, population, args)
+
+    if args.compare is not None:
+        other_counts, _, _ = score_directory(
+            other, doc_names, Evaluator(), args.incremental,
+            prefix="Comparing"
+        )
+        print_comparison(counts, other_counts, args)
+
+
+def list_documents(inputpath):
+    """
+    returns the sorted names of the documents of an output
+    directory: paths relative to the directory without ending
+    """
+    # subdirectories mirror the structure of the corpus
+    documents = retrieve_files(inputpath, recursive=True)
+    endings = {f".{i}" for i in ENDINGS}
 
-    # collect file names
-    pattern = re.compile(r".+(?=\.\w+$)")
     doc_names = set()
     for document in documents:
-        # remove ending of files (.preds and .gold)
-        name = re.match(pattern, str(document)).group()
-        doc_names.add(name)
+        # remove ending of files (.preds, .gold and .links)
+        if document.suffix in endings:
+            name = os.path.relpath(document.with_suffix(""), inputpath)
+            doc_names.add(name.replace(os.sep, "/"))
+
+    # documents are always summed in the same order
+    # so that incremental and full runs are identical
+    return sorted(doc_names)
+
+
+def score_directory(inputpath, doc_names, evaluator, incremental=False,
+                    prefix="Evaluating"):
+    """
+    score the documents of an output directory and add their
+    counts to the evaluator. Returns the counts of each document,
+    the scores of each document and the number of documents that
+    were scored again (the others are read from the index)
+    """
+    index_path = inputpath / INDEX_FILE
+    old_index = load_index(index_path)
+
+    # entries of documents that are not scored (e.g. not in
+    # a sample) are kept, those of deleted documents dropped
+    index = {
+        name: entry for name, entry in old_index.items()
+        if (inputpath / f"{name}.preds").exists()
+    }
+    if not incremental:
+        old_index = {}
 
-    for i, document in enumerate(doc_names):
-        # read files
-        preds = read_extracted(f"{document}.preds")
-        gold = read_extracted(f"{document}.gold")
+    counts = {}
+    results = []
+    rescored = 0
+    telemetry = Telemetry(len(doc_names), prefix=prefix)
+
+    for doc_name in doc_names:
+        document = inputpath / doc_name
+        files = {
+            ending: f"{document}.{ending}" for ending in ("preds", "gold")
+        }
+        if os.path.exists(f"{document}.links"):
+            files["links"] = f"{document}.links"
+
+        entry = old_index.get(doc_name)
+        if entry is None or not is_unchanged(entry, files):
+            # read files
+            preds = read_extracted(files["preds"])
+            gold = read_extracted(files["gold"])
+
+            # evaluate document
+            entry = {
+                ending: {"stamp": file_stamp(path), "hash": file_hash(path)}
+                for ending, path in files.items()
+            }
+            entry["counts"] = evaluator.count_document(preds, gold)
+            if "links" in files:
+                entry["link_counts"] = evaluator.count_links(
+                    read_links(files["links"]), gold
+                )
+            rescored += 1
 
-        # evaluate pairs
-        precision, recall, f1 = evaluator.evaluate_document(preds, gold)
+        index[doc_name] = entry
+        counts[doc_name] = entry["counts"]
+        evaluator.add_counts(entry["counts"])
+        evaluator.add_link_counts(entry.get("link_counts", {}))
 
         # save docname and values for log
-        doc_name = document.split(os.sep)[-1]
+        precision, recall, f1 = evaluator.evaluate_counts(
+            entry["counts"]["pairwise"]
+        )
         results.append((doc_name, precision, recall, f1))
-        progress_bar(
-            i+1, len(doc_names),
-            prefix=f"Evaluating: {i+1}/{len(doc_names)}",
-            length=50
+        telemetry.update()
+
+    save_index(index, index_path)
+
+    return counts, results, rescored
+
+
+def evaluate_store(args):
+    """
+    evaluate a run (by default the last one) saved in
+    a SQLite database. Documents are read with indexed
+    queries, so no index of counts is needed. With compare,
+    the run is compared with another run of the database
+    """
+    store = ResultStore(args.path)
+
+    run = store.last_run() if args.run is None else args.run
+    doc_names = store.documents(run)
+    if not doc_names:
+        store.close()
+        raise InvalidArgument(f"No documents found for run {run}")
+
+    if args.compare is not None:
+        try:
+            other = int(args.compare)
+        except ValueError:
+            store.close()
+            raise InvalidArgument(
+                "Runs of a database are compared with the id of a run"
+            )
+        try:
+            doc_names = paired_documents(doc_names, store.documents(other))
+        except InvalidArgument:
+            store.close()
+            raise
+
+    population = doc_names
+    doc_names = select_documents(doc_names, args)
+
+    print(f"Run {run}")
+    evaluator = Evaluator()
+    counts, results = score_run(store, run, doc_names, evaluator)
+    if args.compare is not None:
+        other_counts, _ = score_run(
+            store, other, doc_names, Evaluator(), prefix="Comparing"
         )
+    store.close()
 
     if args.verbose:
         save_results(results, "evaluation.log")
 
-    precision, recall, f1 = evaluator.evaluate_dataset()
+    print_evaluation(evaluator, len(doc_names), len(population))
+
+    if args.sample is not None:
+        print_estimate(counts, population, args)
+
+    if args.compare is not None:
+        print_comparison(counts, other_counts, args)
+
+
+def score_run(store, run, doc_names, evaluator, prefix="Evaluating"):
+    """
+    score the documents of a run saved in a database and add
+    their counts to the evaluator. Returns the counts and the
+    scores of each document
+    """
+    counts = {}
+    results = []
+    telemetry = Telemetry(len(doc_names), prefix=prefix)
+
+    for doc_name in doc_names:
+        preds = store.clusters(run, doc_name, "preds")
+        gold = store.clusters(run, doc_name, "gold")
+
+        counts[doc_name] = evaluator.count_document(preds, gold)
+        evaluator.add_counts(counts[doc_name])
+        evaluator.add_link_counts(
+            evaluator.count_links(store.links(run, doc_name), gold)
+        )
+
+        # save docname and values for log
+        precision, recall, f1 = evaluator.evaluate_counts(
+            counts[doc_name]["pairwise"]
+        )
+        results.append((doc_name, precision, recall, f1))
+        telemetry.update()
+
+    return counts, results
+
+
+def paired_documents(doc_names, other_names):
+    """
+    returns the documents of both runs, the
+    others cannot be compared and are ignored
+    """
+    common = set(doc_names) & set(other_names)
+    if not common:
+        raise InvalidArgument("The runs have no documents in common")
+
+    ignored = len(set(doc_names) | set(other_names)) - len(common)
+    if ignored:
+        print(f"Ignoring {ignored} documents that are not in both runs")
 
+    return [i for i in doc_names if i in common]
+
+
+def stratum(doc_name):
+    """
+    documents are stratified by their first directory
+    (e.g. the genre of OntoNotes: bc/, nw/, ...)
+    """
+    return doc_name.split("/", 1)[0] if "/" in doc_name else ""
+
+
+def select_documents(doc_names, args):
+    """
+    returns the documents that are scored: with sample,
+    a stratified sample of the documents
+    """
+    if args.sample is None:
+        return doc_names
+
+    indices = stratified_sample(
+        [stratum(i) for i in doc_names], args.sample, seed=args.seed
+    )
+    return [doc_names[i] for i in indices]
+
+
+def print_evaluation(evaluator, scored=None, total=None):
+    """
+    print precision, recall and F1 score of each metric
+    for the whole data set and the official CoNLL score
+    (or for the scored sample of the documents)
+    """
+    if scored is not None and scored < total:
+        title = f"Sample Evaluation ({scored} of {total} documents)"
+    else:
+        title = "Data set Evaluation"
     print(
-        f"Data set Evaluation:\n"
-        f"Precision:\t{round(precision, 5):.5f}\n"
-        f"Recall: \t{round(recall, 5):.5f}\n"
-        f"F1 score:\t{round(f1, 5):.5f}"
+        f"{title}:\n"
+        f"{'Metric':<10}{'Precision':<11}{'Recall':<11}F1 score"
     )
+    conll = []
+    for metric in evaluator.metrics:
+        precision, recall, f1 = evaluator.evaluate_dataset(metric)
+        print(
+            f"{metric:<10}"
+            f"{round(precision, 5):<11.5f}"
+            f"{round(recall, 5):<11.5f}"
+            f"{round(f1, 5):.5f}"
+        )
+        if metric in {"muc", "bcub", "ceafe"}:
+            conll.append(f1)
+
+    # official CoNLL score: average F1 of MUC, B-cubed and CEAF-e
+    print(f"{'CoNLL':<32}{round(sum(conll) / len(conll), 5):.5f}")
+
+    if evaluator.link_counts:
+        print_links(evaluator)
+
+
+def print_links(evaluator):
+    """
+    print the number of links and their precision
+    for each sieve and rule
+    """
+    print(
+        "\nLink Precision by Sieve and Rule:\n"
+        f"{'Sieve':<22}{'Rule':<15}{'Links':<9}Precision"
+    )
+    for sieve, rules in evaluator.link_counts.items():
+        for rule, (correct, links) in sorted(rules.items()):
+            print(
+                f"{sieve:<22}{rule:<15}{links:<9}"
+                f"{round(correct / links, 5):.5f}"
+            )
+
+
+def print_estimate(counts, population, args):
+    """
+    print the F1 scores of all documents estimated from
+    the counts of a stratified sample, with confidence intervals
+    """
+    strata = {}
+    for doc_name in population:
+        strata[stratum(doc_name)] = strata.get(stratum(doc_name), 0) + 1
+
+    names = list(counts)
+    result = stratified_estimate(
+        counts_array([counts[i] for i in names]),
+        [stratum(i) for i in names],
+        strata,
+        samples=args.bootstrap,
+        confidence=args.confidence,
+        seed=args.seed
+    )
+
+    print(
+        f"\nEstimated F1 score of {len(population)} documents "
+        f"({round(100 * args.confidence)}% confidence interval):\n"
+        f"{'Metric':<10}{'F1 score':<11}{'Low':<11}High"
+    )
+    for i, score in enumerate(SCORES):
+        print(
+            f"{score:<10}"
+            f"{result['estimate'][i]:<11.5f}"
+            f"{result['low'][i]:<11.5f}"
+            f"{result['high'][i]:.5f}"
+        )
+
+
+def print_comparison(counts, other_counts, args):
+    """
+    print the F1 scores of two runs on the same documents,
+    their difference with its confidence interval and the
+    p-value of a paired bootstrap
+    """
+    names = list(counts)
+    result = paired_bootstrap(
+        counts_array([counts[i] for i in names]),
+        counts_array([other_counts[i] for i in names]),
+        samples=args.bootstrap,
+        confidence=args.confidence,
+        seed=args.seed
+    )
+
+    print(
+        f"\nPaired Bootstrap ({args.bootstrap} resamples, "
+        f"{round(100 * args.confidence)}% confidence interval):\n"
+        f"{'Metric':<10}{'F1 run':<11}{'F1 other':<11}{'Delta':<11}"
+        f"{'Low':<11}{'High':<11}p-value"
+    )
+    for i, score in enumerate(SCORES):
+        print(
+            f"{score:<10}"
+            f"{result['a'][i]:<11.5f}"
+            f"{result['b'][i]:<11.5f}"
+            f"{result['delta'][i]:<+11.5f}"
+            f"{result['low'][i]:<+11.5f}"
+            f"{result['high'][i]:<+11.5f}"
+            f"{result['p_value'][i]:.4f}"
+        )
@@ -1,79 +1,539 @@
 import configparser
-import multiprocessing as mp
+from contextlib import nullcontext
+import cProfile
+import os
+import time
 
 from datareader.conll_data_reader import ConllParser
+from datareader.conll_writer import save_conll
+from datareader.sources import (
+    is_archive,
+    is_compressed,
+    iter_members,
+    open_text,
+    strip_compression
+)
+from mps.budget import Budget
+from mps.cross_document import CrossDocumentLinker
 from mps.multi_pass_sieve import MultiPassSieve
 from mps.text.document import Document
-from src.utils.utils import progress_bar, save_coref_clusters, retrieve_files
+from src.utils.errors import InvalidArgument
+from src.utils.executors import EXECUTORS, default_backend
+from src.utils.gold_cache import GoldCache
+from src.utils.profiling import CpuProfiler, MemoryProfiler
+from src.utils.store import ResultStore
+from src.utils.telemetry import Telemetry
+from src.utils.utils import (
+    file_stamp,
+    matches,
+    peak_rss,
+    reset_peak_rss,
+    retrieve_files,
+    save_coref_clusters,
+    save_links,
+    save_memory_report
+)
+
+
+GOLD_CACHE = ".gold_cache.json"
+ENTITIES = "entities.tsv"
+DEGRADED = "degraded.tsv"
+CONLL_OUTPUT = "preds.conll"
 
 
 class Extractor:
     """
     this class manages the extraction function of MuSiCoR.
-    it can extract coreference information working
-    either in parallel or on a single thread
+    The documents are distributed by an executor (serial,
+    threads, processes or asyncio, see executors.py), the
+    reader and the sieves are reentrant so that the same
+    extractor can be shared by multiple threads.
+    In low memory mode, parse structures are released
+    as soon as they are not needed anymore and the peak
+    RSS of each document is measured.
+    With profile_memory, the memory allocated by each stage
+    is measured in the worker processes and aggregated in
+    self.memory_profiler. With profile_cpu, each document
+    is profiled with cProfile and the statistics are
+    aggregated in self.cpu_profiler.
+    Documents are tasks (source, offset, name, key): each part of
+    a multi-part OntoNotes file is processed as an independent
+    document and its outputs are saved under its own name.
+    The source is either the path of a plain file, which is
+    read by the worker from the byte offset of the part (None:
+    the whole file), or the text of a document that was
+    decompressed by the main process (see split_parts).
+    With the sqlite backend, the clusters are returned to the
+    main process with the statistics and saved in a ResultStore.
+    Golden clusters are kept in a GoldCache (main process only)
+    and are only exported again if the key of the input file
+    changed (see cached_tasks), the workers only send back the
+    new entries of the cache. With a CrossDocumentLinker, the
+    clusters of each document are summarized by the workers and
+    linked into entities of the whole corpus by the main process.
+    If the sieves record the provenance of the merges, it is
+    saved in a .links file (or the table links of the store).
+    With conll, each document is also written in CONLL format
+    with the predicted clusters in the last column
     """
-    def __init__(self, outputpath, reader, mps):
+    def __init__(self, outputpath, reader, mps, low_memory=False,
+                 profile_memory=False, profile_cpu=False, backend="tsv",
+                 linker=None, conll=False, gold_cache=None):
         self.outputpath = outputpath
+        self.backend = backend
+        self.conll = conll
+        self.linker = linker
         self.reader = reader
         self.mps = mps
+        self.low_memory = low_memory
+        self.profile_memory = profile_memory
+        self.memory_profiler = MemoryProfiler()
+        self.profile_cpu = profile_cpu
+        self.cpu_profiler = CpuProfiler()
+        self.gold_cache = gold_cache
+        self.cache_gold = gold_cache is not None
+
+    def __getstate__(self):
+        # the cache and the aggregated profiles are not needed by
+        # the worker processes (each document has its own profiles)
+        state = self.__dict__.copy()
+        state["gold_cache"] = None
+        state["memory_profiler"] = None
+        state["cpu_profiler"] = None
+        return state
+
+    def process_document(self, task):
+        """
+        extract coreference information from a single document
+        (one part of a file)
+        and save predictions and goldens. Returns a dictionary
+        with statistics about the document: number of tokens and
+        mentions, processing time and the peak RSS of the process
+        while working on the document (only measured in low
+        memory mode). With profile_memory and profile_cpu, the
+        statistics also contain the profiles of the document
+        """
+        if self.profile_cpu:
+            profiler = cProfile.Profile()
+            profiler.enable()
+
+        source, offset, name, key = task
+        stats = {"document": name}
+        start = time.perf_counter()
+        if self.low_memory:
+            reset_peak_rss()
+
+        if self.profile_memory:
+            MemoryProfiler.start()
+            stage = MemoryProfiler()
+        else:
+            stage = nullcontext
+
+        with stage("ConllParser"):
+            if isinstance(source, str):
+                data = self.reader.parse_string(source)
+            else:
+                data = self.reader(source, offset=offset)
+
+        doc = Document(*data)
+        del data
+        doc.process(
+            low_memory=self.low_memory,
+            features=self.mps.features,
+            stage=stage
+        )
+
+        # calculate gold mapping, unless it is cached (key is None)
+        gold = None
+        if key is not None:
+            with stage("gold_mapping"):
+                gold = doc.gold_mapping()
+            if self.cache_gold:
+                # new entry of the cache
+                stats["gold"] = (key, gold)
+        doc.coref = None
+
+        if self.low_memory and gold is not None:
+            # gold clusters are not needed by the sieves
+            self.save(gold, "gold", stats)
+            gold = None
+
+        # extract coreference information with MPS
+        clusters = self.mps(doc, stage=stage)
 
-    @staticmethod
-    def split_lists(list, n):
+        # calculate cluster mapping
+        with stage("convert_mapping"):
+            preds = clusters.convert_mapping()
+        if clusters.provenance is not None:
+            self.save_links(list(clusters.provenance), stats)
+        stats["tokens"] = len(doc.tokens)
+        stats["mentions"] = len(doc.nps)
+        if clusters.exceeded:
+            stats["budget"] = sorted(clusters.exceeded)
+        if clusters.resumed:
+            stats["resumed"] = True
+        del clusters
+
+        if self.low_memory:
+            # only the tokens and tags are needed from now on
+            doc.release_mentions()
+
+        if self.conll:
+            # the input is read again and written line by line
+            with stage("save_conll"):
+                save_conll(source, None, preds, os.path.join(
+                    self.outputpath, f"{name}.{CONLL_OUTPUT}"
+                ), offset=offset)
+        if self.linker is not None:
+            with stage("cross_document"):
+                stats["entities"] = self.linker.summarize(doc, preds)
+        del doc
+
+        # save predictions and goldens
+        self.save(preds, "preds", stats)
+        if gold is not None:
+            self.save(gold, "gold", stats)
+
+        stats["seconds"] = time.perf_counter() - start
+        if self.low_memory:
+            stats["peak_rss"] = peak_rss()
+        if self.profile_memory:
+            stats["memory_profile"] = stage.stages
+
+        if self.profile_cpu:
+            profiler.disable()
+            profiler.create_stats()
+            stats["cpu_profile"] = profiler.stats
+
+        return stats
+
+    def cached_tasks(self, tasks):
         """
-        divide a list in n lists
-        with equal number of elements
+        the key of the tasks whose golden clusters are
+        still valid in the cache is replaced with None
         """
-        for i in range(0, n):
-            yield list[i::n]
+        for source, offset, name, key in tasks:
+            if self.gold_cache.is_valid(name, key):
+                key = None
+            yield source, offset, name, key
 
-    def single(self, documents, verbose=False):
+    def save(self, coref_dict, ending, stats):
         """
-        main processing function to extract coreference
-        information from a document. This functions
-        takes a list of paths to the documents as argument.
-        with the verbose option, a progress bar will be
-        printed at the end of each file
+        save the clusters of a document in a TSV file or, with
+        the sqlite backend, add them to the statistics so that
+        the main process can write them in the database
         """
-        # process documents
-        for i, document in enumerate(documents):
-            data = self.reader(document)
-            doc = Document(*data)
-            doc.process()
+        if self.backend == "sqlite":
+            stats.setdefault("clusters", {})[ending] = {
+                key: value for key, value in coref_dict.items()
+                if len(value) > 1
+            }
+        else:
+            save_coref_clusters(
+                coref_dict, ending, stats["document"], self.outputpath
+            )
 
-            # extract coreference information with MPS
-            clusters = self.mps(doc)
+    def save_links(self, links, stats):
+        """
+        save the provenance of the merges of a document, with
+        the sqlite backend it is written by the main process
+        """
+        if self.backend == "sqlite":
+            stats["links"] = links
+        else:
+            save_links(links, stats["document"], self.outputpath)
 
-            # calculate cluster mapping
-            preds = clusters.convert_mapping()
-            gold = doc.coref.convert_mapping()
-
-            # save predictions and goldens
-            save_coref_clusters(preds, "preds", document, self.outputpath)
-            save_coref_clusters(gold, "gold", document, self.outputpath)
-            if verbose:
-                progress_bar(
-                    i+1, len(documents),
-                    prefix=f"Extracting: {i+1}/{len(documents)}",
-                    length=50
-                )
-
-    def multi(self, documents):
+    def collect(self, stats, results, telemetry, store=None):
+        """
+        save the statistics of a processed document, merge
+        its profiles, update the gold cache and write its
+        clusters in the store
         """
-        divides input in lists of equal size and distribute
-        it among multiple threads to process more files
-        at the same time
+        name = stats["document"]
+        clusters = stats.pop("clusters", {})
+        gold = stats.pop("gold", None)
+
+        if self.gold_cache is not None:
+            if gold is not None:
+                self.gold_cache.update(name, *gold)
+            else:
+                # export the cached gold of an unchanged document
+                cached = self.gold_cache.get(name)
+                if store is not None:
+                    clusters["gold"] = cached
+                elif not os.path.exists(
+                        os.path.join(self.outputpath, f"{name}.gold")):
+                    save_coref_clusters(
+                        cached, "gold", name, self.outputpath
+                    )
+
+        for ending, coref_dict in clusters.items():
+            store.add(name, ending, coref_dict)
+
+        links = stats.pop("links", None)
+        if links is not None:
+            store.add_links(name, links)
+
+        summaries = stats.pop("entities", None)
+        if summaries is not None:
+            self.linker.add(name, summaries)
+
+        profile = stats.pop("memory_profile", None)
+        if profile is not None:
+            self.memory_profiler.merge(profile)
+
+        profile = stats.pop("cpu_profile", None)
+        if profile is not None:
+            self.cpu_profiler.merge(profile)
+
+        results.append(stats)
+        if telemetry is not None:
+            telemetry.update(stats)
+
+    def run(self, documents, executor, telemetry=None, store=None):
+        """
+        main processing function to extract coreference
+        information from the documents. This functions
+        takes a list of tasks (see split_parts) and an
+        executor (see executors.py) that distributes them.
+        If a Telemetry-object is given, it is updated
+        at the end of each file. With the sqlite backend,
+        the clusters are saved in store.
+        Returns a list with the statistics of each document
         """
-        # create sublists for pool
-        sublists = self.split_lists(documents, len(documents))
+        results = []
+
+        def callback(stats):
+            self.collect(stats, results, telemetry, store)
+
+        executor.run(self.process_document, documents, callback)
+
+        return results
 
-        with mp.Pool() as pool:
-            for i, _ in enumerate(pool.imap(self.single, sublists)):
-                progress_bar(
-                    i+1, len(documents),
-                    prefix=f"Extracting: {i+1}/{len(documents)}",
-                    length=50
-                )
+
+def split_parts(documents, reader, root=".", include=None, exclude=None):
+    """
+    yields a task (source, offset, name, key) for each part of
+    the documents. Names are relative to root, files with a
+    single part keep their name, parts of multi-part files are
+    named after their number:
+        cctv_0000.conll --> cctv_0000.conll_part000, ...
+    Plain files are only indexed (the byte offset of each part
+    is found in one scan, see ConllParser.locate_parts),
+    compressed files and members of archives are decompressed
+    here (only once) and split in parts in a single pass, their
+    parts are given to the workers as text. include and exclude
+    patterns are matched against the decompressed names and
+    the members of the archives. The key identifies the version
+    of the input file: [absolute path, modification time, size]
+    """
+    def text_parts(text, name):
+        parts = list(reader.iter_parts(text.splitlines()))
+        if len(parts) <= 1:
+            yield text, None, name, key
+        else:
+            for number, lines in parts:
+                yield "\n".join(lines), None, f"{name}_part{number}", key
+
+    for document in documents:
+        name = os.path.relpath(document, root).replace(os.sep, "/")
+        key = [os.path.abspath(document), *file_stamp(document)]
+
+        if is_archive(document):
+            for member, text in iter_members(document):
+                member = f"{name}/{member}"
+                if matches(member, include, exclude):
+                    yield from text_parts(text, member)
+
+        elif is_compressed(document):
+            name = strip_compression(name)
+            if matches(name, include, exclude):
+                with open_text(document) as infile:
+                    yield from text_parts(infile.read(), name)
+
+        elif matches(name, include, exclude):
+            parts = reader.locate_parts(document)
+            if len(parts) == 1:
+                yield document, None, name, key
+            else:
+                for number, offset in parts:
+                    yield document, offset, f"{name}_part{number}", key
+
+
+def read_patterns(config, key):
+    """
+    read a comma separated list of glob patterns
+    from the PATH section of the configuration file
+    """
+    value = config["PATH"].get(key, "")
+    return [i.strip() for i in value.split(",") if i.strip()]
+
+
+def read_execution(config, args):
+    """
+    read the optional EXECUTION section of the configuration file:
+        backend = serial, thread, process or asyncio (default: thread
+            on free-threaded builds of python, process otherwise)
+        workers = number of workers (default: number of CPUs)
+        queued = documents read ahead of the workers (default: 64)
+    the single option always selects the serial backend.
+    Profiling and the low memory mode need the serial or
+    the process backend
+    """
+    section = config["EXECUTION"] if "EXECUTION" in config else {}
+    backend = section.get("backend", default_backend()).strip().lower()
+    if args.single:
+        backend = "serial"
+
+    if backend not in EXECUTORS:
+        raise InvalidArgument(f"Unknown execution backend: {backend}")
+
+    # profilers and the peak RSS of the low memory
+    # mode measure the whole process, not one document
+    profiling = args.profile_memory or args.profile_cpu
+    if profiling and backend in {"thread", "asyncio"}:
+        raise InvalidArgument(
+            "Profiling is only supported by the serial "
+            "and process backends"
+        )
+    if args.low_memory and backend in {"thread", "asyncio"}:
+        raise InvalidArgument(
+            "The low memory mode is only supported by the serial "
+            "and process backends"
+        )
+
+    workers = section.get("workers")
+    return EXECUTORS[backend](
+        workers=int(workers) if workers else None,
+        queued=int(section.get("queued", 64))
+    )
+
+
+def read_cross_document(config):
+    """
+    read the optional CROSS_DOCUMENT section of the configuration
+    file, which enables the cross-document coreference:
+        bands = number of bands of the signatures (default: 16)
+        rows = rows of each band (default: 4)
+        threshold = minimum Jaccard similarity (default: 0.5)
+        max_bucket = larger buckets are ignored (default: 1000)
+    """
+    if "CROSS_DOCUMENT" not in config:
+        return None
+
+    section = config["CROSS_DOCUMENT"]
+    return CrossDocumentLinker(
+        bands=section.getint("bands", 16),
+        rows=section.getint("rows", 4),
+        threshold=section.getfloat("threshold", 0.5),
+        max_bucket=section.getint("max_bucket", 1000)
+    )
+
+
+def read_output(config, outputpath):
+    """
+    read the optional OUTPUT section of the configuration file:
+        backend = tsv (default) or sqlite
+        database = path of the database (default: output/results.sqlite)
+        provenance = record the sieve and the rule of each merge
+            (default: no)
+        conll = also write the documents in CONLL format with the
+            predicted clusters in the last column (default: no)
+        checkpoints = directory where the clusters are saved after
+            each sieve (default: no checkpoints)
+    """
+    section = config["OUTPUT"] if "OUTPUT" in config else {}
+    backend = section.get("backend", "tsv").strip().lower()
+    if backend not in {"tsv", "sqlite"}:
+        raise InvalidArgument(f"Unknown output backend: {backend}")
+
+    database = section.get(
+        "database", os.path.join(outputpath, "results.sqlite")
+    )
+    provenance = config.getboolean("OUTPUT", "provenance", fallback=False)
+    conll = config.getboolean("OUTPUT", "conll", fallback=False)
+    checkpoints = section.get("checkpoints")
+
+    return backend, database, provenance, conll, checkpoints
+
+
+def read_budget(config, sieves):
+    """
+    read the optional BUDGET section of the configuration file
+    (see mps/budget.py), all entries are optional:
+        candidates = maximum number of candidates of a mention
+        mentions = maximum number of mentions of a sentence
+        seconds = time of the sieves on a single document
+        cheap = comma separated sieves that still run on
+            degraded documents (default: ExactMatch)
+    """
+    if "BUDGET" not in config:
+        return None
+
+    section = config["BUDGET"]
+    candidates = section.get("candidates")
+    mentions = section.get("mentions")
+    seconds = section.get("seconds")
+
+    cheap = section.get("cheap")
+    if cheap is not None:
+        cheap = [i.strip() for i in cheap.split(",") if i.strip()]
+        if any(sieve not in sieves for sieve in cheap):
+            raise InvalidArgument(
+                "Cheap sieve that is not used\n"
+                f"Used Sieves: {', '.join(sieves)}"
+            )
+
+    return Budget(
+        candidates=int(candidates) if candidates else None,
+        mentions=int(mentions) if mentions else None,
+        seconds=float(seconds) if seconds else None,
+        cheap=cheap
+    )
+
+
+def save_degraded(results, outputfile):
+    """
+    save the documents that exceeded their budget and the
+    reasons (candidates, mentions or seconds) in a TSV file.
+    Returns the number of degraded documents
+    """
+    degraded = sorted(
+        (stats["document"], stats["budget"])
+        for stats in results if "budget" in stats
+    )
+    with open(outputfile, "w", encoding="utf-8") as ofile:
+        ofile.write("DOCUMENT\tREASONS\n")
+        for document, reasons in degraded:
+            ofile.write(f"{document}\t{','.join(reasons)}\n")
+
+    return len(degraded)
+
+
+def read_windows(config, sieves):
+    """
+    read the optional WINDOWS section of the configuration
+    file. Each entry is the name of a sieve followed by the
+    number of previous sentences it will search for candidates
+    or "all" to search the whole document:
+        Pronoun = 3
+        ExactMatch = all
+    """
+    if "WINDOWS" not in config:
+        return None
+
+    # configparser lower cases keys
+    names = {sieve.lower(): sieve for sieve in sieves}
+
+    windows = {}
+    for key, value in config["WINDOWS"].items():
+        name = names.get(key, key)
+        if value.strip().lower() == "all":
+            windows[name] = None
+        else:
+            windows[name] = int(value)
+
+    return windows
 
 
 def extract(args):
@@ -86,18 +546,104 @@ def extract(args):
     inputpath = config["PATH"]["input"]
     outputpath = config["PATH"]["output"]
     sieves = [i.strip() for i in config["SIEVES"]["sieves"].split(",")]
+    windows = read_windows(config, sieves)
+    lexicon = config["SIEVES"].get("lexicon")
+    budget = read_budget(config, sieves)
+    backend, database, provenance, conll, checkpoints = read_output(
+        config, outputpath
+    )
+    if args.resume_after is not None and checkpoints is None:
+        raise InvalidArgument(
+            "Resuming requires a checkpoints directory (OUTPUT section)"
+        )
+    executor = read_execution(config, args)
 
-    # retrieve documents
-    documents = retrieve_files(inputpath)
+    # retrieve documents and split them in parts
+    reader = ConllParser()
+    files = retrieve_files(
+        inputpath,
+        recursive=config["PATH"].getboolean("recursive", False),
+        exclude=read_patterns(config, "exclude")
+    )
+    documents = split_parts(
+        files, reader, inputpath,
+        include=read_patterns(config, "include"),
+        exclude=read_patterns(config, "exclude")
+    )
+
+    # the number of documents in compressed files and archives
+    # is only known once they are decompressed
+    if any(is_archive(i) or is_compressed(i) for i in files):
+        total = None
+    else:
+        documents = list(documents)
+        total = len(documents)
 
     # instantiate MPS and extractor
-    reader = ConllParser()
-    mps = MultiPassSieve(sieves)
-    ex = Extractor(outputpath, reader, mps)
+    mps = MultiPassSieve(
+        sieves, windows, provenance=provenance, lexicon=lexicon,
+        budget=budget, checkpoints=checkpoints,
+        resume_after=args.resume_after
+    )
+    ex = Extractor(
+        outputpath, reader, mps,
+        low_memory=args.low_memory,
+        profile_memory=args.profile_memory,
+        profile_cpu=args.profile_cpu,
+        backend=backend,
+        linker=read_cross_document(config),
+        conll=conll,
+        gold_cache=GoldCache(os.path.join(outputpath, GOLD_CACHE))
+    )
 
-    # extract
-    if args.single:
-        ex.single(documents, verbose=True)
+    if total is None:
+        documents = ex.cached_tasks(documents)
     else:
-        mp.set_start_method("spawn")
-        ex.multi(documents)
+        documents = list(ex.cached_tasks(documents))
+
+    store = None
+    if backend == "sqlite":
+        store = ResultStore(database)
+        run = store.new_run({
+            "input": inputpath, "sieves": sieves, "provenance": provenance,
+            "resume_after": args.resume_after
+        })
+        print(f"Run {run}: saving results in {database}")
+
+    # extract
+    telemetry = Telemetry(total, prefix="Extracting")
+    try:
+        results = ex.run(documents, executor, telemetry, store)
+    finally:
+        if store is not None:
+            store.close()
+
+    ex.gold_cache.save()
+    if ex.linker is not None:
+        entities = ex.linker.save(os.path.join(outputpath, ENTITIES))
+        print(
+            f"Linked {len(entities)} clusters into "
+            f"{len(set(entities))} entities"
+        )
+    telemetry.finish()
+    telemetry.save(args.metrics)
+
+    if args.resume_after is not None:
+        resumed = sum(1 for stats in results if stats.get("resumed"))
+        print(
+            f"{resumed} of {len(results)} documents resumed "
+            f"after {args.resume_after}"
+        )
+
+    if budget is not None:
+        degraded = save_degraded(results, os.path.join(outputpath, DEGRADED))
+        print(f"{degraded} documents exceeded their budget")
+
+    if args.low_memory:
+        save_memory_report(results, "memory.log")
+
+    if args.profile_memory:
+        ex.memory_profiler.save("memory_profile.log")
+
+    if args.profile_cpu:
+        ex.cpu_profiler.save("cpu_profile")
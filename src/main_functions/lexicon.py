@@ -0,0 +1,22 @@
+import time
+
+from datareader.sources import open_text
+from mps.text.lexicon import Lexicon, build_lexicon, read_bergsma_lin
+
+
+def build(args):
+    """
+    main function to build a lexicon of genus, number and
+    animacy from the counts of Bergsma and Lin (the input
+    can be compressed, e.g. gender.data.gz)
+    """
+    start = time.perf_counter()
+    with open_text(args.input) as infile:
+        entries = read_bergsma_lin(infile, min_count=args.min_count)
+        keys = build_lexicon(entries, args.output)
+
+    seconds = time.perf_counter() - start
+    print(f"Saved {keys} entries in {args.output} ({seconds:.1f} s)")
+
+    # make sure the lexicon can be loaded
+    Lexicon(args.output).close()
@@ -0,0 +1,207 @@
+import configparser
+from collections import deque
+import json
+import multiprocessing as mp
+import sys
+import time
+
+from datareader.conll_data_reader import ConllParser
+from mps.multi_pass_sieve import MultiPassSieve
+from mps.text.document import Document
+from src.main_functions.extraction import read_budget, read_windows
+
+
+# reader and multi pass sieve of this process,
+# they are created once and kept warm between requests
+_reader = None
+_mps = None
+
+
+def init_resolver(sieves, windows, lexicon=None, budget=None):
+    """
+    create the reader and the multi pass sieve
+    of the current (worker) process
+    """
+    global _reader, _mps
+    _reader = ConllParser()
+    _mps = MultiPassSieve(sieves, windows, lexicon=lexicon, budget=budget)
+
+
+class InvalidRequest:
+    """
+    a line of the input that is not a valid request, the
+    error is only set by read_requests (never by the client)
+    """
+    def __init__(self, error):
+        self.error = error
+
+
+def resolve(request):
+    """
+    resolve a single request. A request is a dictionary
+    containing a document in CONLL format:
+        {"id": "doc1", "conll": "..."}
+    The response contains the coreference chains (singletons
+    are ignored) as lists of inclusive word spans:
+        {"id": "doc1", "clusters": [[[0, 1], [5, 5]], ...]}
+    Documents that exceeded their budget are flagged:
+        {"id": "doc1", "clusters": [...], "degraded": ["seconds"]}
+    Requests with the key "metrics" are answered by the
+    main process with the metrics of the service, invalid
+    requests (see read_requests) get a response with their error
+    """
+    if isinstance(request, InvalidRequest):
+        return {"id": None, "error": request.error}
+    if "metrics" in request:
+        return request
+
+    start = time.perf_counter()
+    response = {"id": request.get("id")}
+    try:
+        doc = Document(*_reader.parse_string(request["conll"]))
+        doc.process(features=_mps.features)
+        resolved = _mps(doc)
+        clusters = resolved.convert_mapping()
+
+        response["clusters"] = [
+            [list(span) for span in cluster]
+            for cluster in clusters.values() if len(cluster) > 1
+        ]
+        if resolved.exceeded:
+            response["degraded"] = sorted(resolved.exceeded)
+        response["tokens"] = len(doc.tokens)
+
+    except Exception as e:
+        response["error"] = f"{type(e).__name__}: {e}"
+
+    response["latency_ms"] = (time.perf_counter() - start) * 1000
+
+    return response
+
+
+class Metrics:
+    """
+    keeps track of the number of requests, tokens and the
+    latency (from the moment a request is read until its
+    response is written) of the last requests
+    """
+    def __init__(self, window=1000):
+        self.start = time.perf_counter()
+        self.requests = 0
+        self.errors = 0
+        self.tokens = 0
+        self.latencies = deque(maxlen=window)
+
+    def update(self, response, latency):
+        self.requests += 1
+        self.tokens += response.get("tokens", 0)
+        if "error" in response:
+            self.errors += 1
+        self.latencies.append(latency)
+
+    def summary(self):
+        uptime = time.perf_counter() - self.start
+        latencies = sorted(self.latencies)
+
+        def percentile(p):
+            if not latencies:
+                return 0
+            return latencies[min(len(latencies) - 1, int(p * len(latencies)))]
+
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "uptime_s": round(uptime, 3),
+            "requests_per_s": round(self.requests / uptime, 3),
+            "tokens_per_s": round(self.tokens / uptime, 3),
+            "latency_ms": {
+                "mean": round(sum(latencies) / max(len(latencies), 1), 3),
+                "p50": round(percentile(0.5), 3),
+                "p95": round(percentile(0.95), 3),
+                "p99": round(percentile(0.99), 3)
+            }
+        }
+
+
+def read_requests(stream, submitted):
+    """
+    read one json request per line and save
+    the time at which each request was read.
+    Lines that are not json objects are turned
+    into an InvalidRequest with their error
+    """
+    for line in stream:
+        if not line.strip():
+            continue
+
+        try:
+            request = json.loads(line)
+        except json.JSONDecodeError as e:
+            request = InvalidRequest(f"JSONDecodeError: {e}")
+
+        # valid json that is not an object
+        if not isinstance(request, (dict, InvalidRequest)):
+            request = InvalidRequest(
+                f"InvalidRequest: expected an object, "
+                f"got {type(request).__name__}"
+            )
+
+        submitted.append(time.perf_counter())
+        yield request
+
+
+def serve(args):
+    """
+    main function of the service: requests are read from stdin
+    (one json object per line) and resolved by a pool of workers
+    that keep the reader and the sieves loaded. Responses are
+    written to stdout in the same order as the requests
+    """
+    config = configparser.ConfigParser()
+    config.read(args.path)
+    sieves = [i.strip() for i in config["SIEVES"]["sieves"].split(",")]
+    windows = read_windows(config, sieves)
+    lexicon = config["SIEVES"].get("lexicon")
+    budget = read_budget(config, sieves)
+
+    metrics = Metrics()
+    submitted = deque()
+    requests = read_requests(sys.stdin, submitted)
+
+    if args.single:
+        init_resolver(sieves, windows, lexicon, budget)
+        pool = None
+        responses = map(resolve, requests)
+    else:
+        context = mp.get_context("spawn")
+        pool = context.Pool(
+            args.workers,
+            initializer=init_resolver,
+            initargs=(sieves, windows, lexicon, budget)
+        )
+        responses = pool.imap(resolve, requests)
+
+    try:
+        for response in responses:
+            latency = (time.perf_counter() - submitted.popleft()) * 1000
+
+            if "metrics" in response:
+                response = {
+                    "id": response.get("id"),
+                    "metrics": metrics.summary()
+                }
+            else:
+                metrics.update(response, latency)
+                response.pop("tokens", None)
+
+            sys.stdout.write(f"{json.dumps(response)}\n")
+            sys.stdout.flush()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        if pool is not None:
+            pool.terminate()
+
+        print(json.dumps(metrics.summary()), file=sys.stderr)
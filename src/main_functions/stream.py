@@ -0,0 +1,70 @@
+import configparser
+import json
+import sys
+import time
+
+from datareader.conll_data_reader import ConllParser
+from mps.multi_pass_sieve import MultiPassSieve
+from mps.online import OnlineResolver
+from src.main_functions.extraction import read_windows
+from src.main_functions.service import Metrics
+
+
+def stream(args):
+    """
+    main function of the online mode: documents in CONLL format
+    are read from stdin one sentence at a time. Each sentence is
+    resolved as soon as it is complete and the updates of the
+    clusters are written to stdout (one json object per sentence):
+        {"document": 0, "sentence": 4,
+         "updates": [{"cluster": 2, "mentions": [[3, 4], [30, 30]]}],
+         "latency_ms": 1.2}
+    Only the sentences in the search window are kept in memory
+    """
+    config = configparser.ConfigParser()
+    config.read(args.path)
+    sieves = [i.strip() for i in config["SIEVES"]["sieves"].split(",")]
+    windows = read_windows(config, sieves)
+    lexicon = config["SIEVES"].get("lexicon")
+
+    mps = MultiPassSieve(sieves, windows, lexicon=lexicon)
+    resolver = OnlineResolver(mps, window=args.window)
+    reader = ConllParser()
+    metrics = Metrics()
+
+    current = None
+    sentences = reader.parse_sentences(sys.stdin, "<stdin>")
+    try:
+        for part, tokens, pos_tags, ner, tree in sentences:
+            start = time.perf_counter()
+
+            # a new document begins
+            if part != current:
+                resolver.reset()
+                current = part
+
+            sentence = len(resolver.sentences)
+            updates = resolver.add_sentence(tokens, pos_tags, ner, tree)
+
+            response = {
+                "document": part,
+                "sentence": sentence,
+                "updates": [
+                    {
+                        "cluster": cluster,
+                        "mentions": [list(span) for span in spans]
+                    }
+                    for cluster, spans in updates.items()
+                ],
+                "latency_ms": (time.perf_counter() - start) * 1000
+            }
+            metrics.update({"tokens": len(tokens)}, response["latency_ms"])
+
+            sys.stdout.write(f"{json.dumps(response)}\n")
+            sys.stdout.flush()
+
+    except KeyboardInterrupt:
+        pass
+
+    finally:
+        print(json.dumps(metrics.summary()), file=sys.stderr)
@@ -2,6 +2,8 @@ import argparse
 import configparser
 import os
 
+from src.utils.errors import InvalidArgument
+
 
 def parse_arguments():
     """
@@ -15,7 +17,7 @@ def parse_arguments():
         )
     )
 
-    # add subparsers (2)
+    # add subparsers (4)
     subparsers = parser.add_subparsers(dest="subparser")
 
     # extraction
@@ -33,6 +35,49 @@ def parse_arguments():
         help="disable concurrency"
     )
 
+    parser_extract.add_argument(
+        "-l", "--low-memory", action="store_true",
+        help=(
+            "release parse structures as early as possible "
+            "and save the peak RSS of each file in memory.log"
+        )
+    )
+
+    parser_extract.add_argument(
+        "--profile-memory", action="store_true",
+        help=(
+            "measure the memory allocated by each stage of the "
+            "extraction and save a report in memory_profile.log"
+        )
+    )
+
+    parser_extract.add_argument(
+        "--profile-cpu", action="store_true",
+        help=(
+            "profile each document with cProfile and save the "
+            "merged statistics of all processes in cpu_profile.pstats "
+            "and cpu_profile.collapsed (flamegraph)"
+        )
+    )
+
+    parser_extract.add_argument(
+        "--resume-after", metavar="SIEVE", action="store",
+        help=(
+            "restore the clusters saved after SIEVE in the "
+            "checkpoints and only apply the following sieves"
+        )
+    )
+
+    parser_extract.add_argument(
+        "-m", "--metrics", metavar="FILE", action="store",
+        default="extraction_metrics.json",
+        help=(
+            "json file where throughput, latency histogram and "
+            "slowest documents are saved "
+            "(default: extraction_metrics.json)"
+        )
+    )
+
     # evaluation
     parser_evaluate = subparsers.add_parser(
         "evaluate",
@@ -46,7 +91,7 @@ def parse_arguments():
         "path", metavar="PATH", action="store",
         help=(
             "Path to the folder containing the "
-            "extracted files"
+            "extracted files or to a results database"
         )
     )
 
@@ -59,6 +104,132 @@ def parse_arguments():
         )
     )
 
+    parser_evaluate.add_argument(
+        "-i", "--incremental", action="store_true",
+        help=(
+            "only score documents that changed since "
+            "the last evaluation of the directory"
+        )
+    )
+
+    parser_evaluate.add_argument(
+        "-r", "--run", action="store", type=int, default=None,
+        help=(
+            "id of the run to evaluate if PATH is a "
+            "results database (default: last run)"
+        )
+    )
+
+    parser_evaluate.add_argument(
+        "-c", "--compare", metavar="OTHER", action="store", default=None,
+        help=(
+            "compare with another run (a folder of extracted files "
+            "or the id of a run of the same database) with a "
+            "paired bootstrap"
+        )
+    )
+
+    parser_evaluate.add_argument(
+        "-s", "--sample", metavar="N", action="store", type=int,
+        default=None,
+        help=(
+            "only score a stratified sample of N documents and "
+            "estimate the scores of all documents"
+        )
+    )
+
+    parser_evaluate.add_argument(
+        "-b", "--bootstrap", metavar="N", action="store", type=int,
+        default=10000,
+        help="number of bootstrap resamples (default: 10000)"
+    )
+
+    parser_evaluate.add_argument(
+        "--confidence", action="store", type=float, default=0.95,
+        help="level of the confidence intervals (default: 0.95)"
+    )
+
+    parser_evaluate.add_argument(
+        "--seed", action="store", type=int, default=None,
+        help="seed of the random sampling"
+    )
+
+    # service
+    parser_serve = subparsers.add_parser(
+        "serve",
+        help=(
+            "resolve documents read from stdin "
+            "(one json request per line)"
+        )
+    )
+
+    parser_serve.add_argument(
+        "path", metavar="PATH", action="store",
+        help="Path to the configuration file"
+    )
+
+    parser_serve.add_argument(
+        "-w", "--workers", action="store", type=int, default=None,
+        help="number of worker processes (default: number of CPUs)"
+    )
+
+    parser_serve.add_argument(
+        "-s", "--single", action="store_true",
+        help="resolve requests in the main process"
+    )
+
+    # online mode
+    parser_stream = subparsers.add_parser(
+        "stream",
+        help=(
+            "resolve documents read from stdin "
+            "one sentence at a time (CONLL format)"
+        )
+    )
+
+    parser_stream.add_argument(
+        "path", metavar="PATH", action="store",
+        help="Path to the configuration file"
+    )
+
+    parser_stream.add_argument(
+        "-w", "--window", action="store", type=int, default=None,
+        help=(
+            "number of previous sentences kept in memory "
+            "(default: the largest window of the sieves, at least 1)"
+        )
+    )
+
+    # lexicon
+    parser_lexicon = subparsers.add_parser(
+        "lexicon",
+        help=(
+            "build a lexicon of genus, number and animacy "
+            "from the counts of Bergsma and Lin"
+        )
+    )
+
+    parser_lexicon.add_argument(
+        "input", metavar="INPUT", action="store",
+        help=(
+            "file with a noun phrase and its counts (masculine, "
+            "feminine, neuter, plural) on each line"
+        )
+    )
+
+    parser_lexicon.add_argument(
+        "output", metavar="OUTPUT", action="store",
+        help="path of the lexicon file"
+    )
+
+    parser_lexicon.add_argument(
+        "-c", "--min-count", action="store", type=int, default=3,
+        help=(
+            "minimum count of a gender or number to be "
+            "saved in the lexicon (default: 3)"
+        )
+    )
+
     # check that arguments are safe
     args = parser.parse_args()
     subparser = args.subparser
@@ -79,6 +250,23 @@ def parse_arguments():
         if not os.path.isdir(config["PATH"]["input"]):
             raise NotADirectoryError(config["PATH"]["input"])
 
+    elif subparser == "serve":
+        # make sure config file exists
+        if not os.path.exists(args.path):
+            raise FileNotFoundError("File not found")
+
+    elif subparser == "stream":
+        # make sure config file exists
+        if not os.path.exists(args.path):
+            raise FileNotFoundError("File not found")
+
+        if args.window is not None and args.window < 1:
+            raise InvalidArgument("The window must be at least 1")
+
+    elif subparser == "lexicon":
+        if not os.path.exists(args.input):
+            raise FileNotFoundError("Input file not found")
+
     elif subparser == "evaluate":
         # make sure directory exists
         if not os.path.exists(args.path):
@@ -87,9 +275,18 @@ def parse_arguments():
             )
 
         # make sure directory is not empty
-        if not os.listdir(args.path):
+        if os.path.isdir(args.path) and not os.listdir(args.path):
             raise FileNotFoundError(
                 "Empty input directory"
             )
 
+        if args.sample is not None and args.sample < 1:
+            raise InvalidArgument("The sample must be at least 1")
+
+        if args.bootstrap < 1:
+            raise InvalidArgument("The bootstrap needs at least 1 resample")
+
+        if not 0 < args.confidence < 1:
+            raise InvalidArgument("The confidence must be between 0 and 1")
+
     return args
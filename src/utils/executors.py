@@ -0,0 +1,192 @@
+"""
+Executors distribute the documents of the extraction. Every
+executor has the same interface:
+    executor.run(function, tasks, callback)
+function is called on each task and callback on each result
+(in the main thread, in order of completion). Tasks are read
+lazily and at most queued tasks are read ahead of the workers,
+so that reading (e.g. decompressing) overlaps the processing.
+Available backends:
+    - serial: one document after the other in the main thread
+    - thread: a pool of threads sharing the same function
+    - process: a pool of processes (spawn), function and tasks
+        are pickled to the workers
+    - asyncio: an event loop that reads the tasks and dispatches
+        them to a pool of threads
+Threads only run in parallel on free-threaded builds of Python,
+where they also avoid pickling the documents between processes
+"""
+
+from abc import ABC, abstractmethod
+import asyncio
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+import multiprocessing as mp
+import queue
+import sys
+import threading
+
+
+def gil_enabled():
+    # sys._is_gil_enabled only exists since python 3.13
+    return getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def default_backend():
+    """
+    threads on free-threaded builds, processes otherwise
+    """
+    return "process" if gil_enabled() else "thread"
+
+
+def prefetch(tasks, size=4):
+    """
+    iterate over the tasks while the next ones are produced
+    (e.g. decompressed) in a separate thread
+    """
+    buffer = queue.Queue(size)
+    done = object()
+
+    def produce():
+        try:
+            for task in tasks:
+                buffer.put(task)
+        except Exception as e:
+            buffer.put(e)
+        buffer.put(done)
+
+    threading.Thread(target=produce, daemon=True).start()
+
+    while True:
+        task = buffer.get()
+        if task is done:
+            return
+        if isinstance(task, Exception):
+            raise task
+        yield task
+
+
+class Executor(ABC):
+
+    def __init__(self, workers=None, queued=64):
+        self.workers = workers
+        self.queued = queued
+
+    @abstractmethod
+    def run(self, function, tasks, callback):
+        # call function on each task and callback on each
+        # result in the main thread
+        pass
+
+
+class SerialExecutor(Executor):
+
+    def run(self, function, tasks, callback):
+        # the next tasks are read in a separate thread
+        for task in prefetch(tasks):
+            callback(function(task))
+
+
+class ThreadExecutor(Executor):
+
+    def run(self, function, tasks, callback):
+        pool = ThreadPoolExecutor(self.workers)
+        pending = set()
+
+        try:
+            for task in prefetch(tasks, self.queued):
+                pending.add(pool.submit(function, task))
+
+                # wait for a result if too many tasks are queued
+                timeout = None if len(pending) >= self.queued else 0
+                done, pending = wait(
+                    pending, timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                for future in done:
+                    callback(future.result())
+
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    callback(future.result())
+
+        finally:
+            pool.shutdown(cancel_futures=True)
+
+
+class ProcessExecutor(Executor):
+
+    def run(self, function, tasks, callback):
+        # the pool reads the tasks in a separate thread, at most
+        # queued tasks are read ahead of the workers
+        pending = threading.Semaphore(self.queued)
+        stopped = threading.Event()
+
+        def bounded():
+            for task in tasks:
+                pending.acquire()
+                if stopped.is_set():
+                    return
+                yield task
+
+        context = mp.get_context("spawn")
+        with context.Pool(self.workers) as pool:
+            try:
+                for result in pool.imap_unordered(function, bounded()):
+                    pending.release()
+                    callback(result)
+            finally:
+                # unblock the task thread if a task failed
+                stopped.set()
+                pending.release(self.queued)
+
+
+class AsyncioExecutor(Executor):
+
+    def run(self, function, tasks, callback):
+        asyncio.run(self.dispatch(function, tasks, callback))
+
+    async def dispatch(self, function, tasks, callback):
+        """
+        tasks are read in the default executor of the loop,
+        so that reading does not block the collection of the
+        results, and processed in a pool of threads
+        """
+        loop = asyncio.get_running_loop()
+        tasks = iter(tasks)
+        done = object()
+        pending = set()
+        pool = ThreadPoolExecutor(self.workers)
+
+        def collect(finished):
+            for future in finished:
+                callback(future.result())
+
+        try:
+            while True:
+                task = await loop.run_in_executor(None, next, tasks, done)
+                if task is done:
+                    break
+                pending.add(loop.run_in_executor(pool, function, task))
+
+                timeout = None if len(pending) >= self.queued else 0
+                finished, pending = await asyncio.wait(
+                    pending, timeout=timeout, return_when=FIRST_COMPLETED
+                )
+                collect(finished)
+
+            while pending:
+                finished, pending = await asyncio.wait(
+                    pending, return_when=FIRST_COMPLETED
+                )
+                collect(finished)
+
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+EXECUTORS = {
+    "serial": SerialExecutor,
+    "thread": ThreadExecutor,
+    "process": ProcessExecutor,
+    "asyncio": AsyncioExecutor
+}
@@ -0,0 +1,52 @@
+from pathlib import Path
+
+from src.utils.utils import load_index, save_index
+
+
+class GoldCache:
+    """
+    golden clusters of the documents of a corpus, saved as
+    json in the output directory. Golden clusters never change,
+    so an entry is valid as long as the input file (path,
+    modification time and size) is the same. Documents are
+    identified by their name, which also contains the part.
+    Only the entries of the documents seen in the last
+    extraction are saved
+    """
+    def __init__(self, path):
+        self.path = Path(path)
+        self.entries = load_index(self.path)
+        self.seen = set()
+
+    def is_valid(self, name, key):
+        entry = self.entries.get(name)
+        return entry is not None and entry["key"] == key
+
+    def get(self, name):
+        """
+        returns the cached clusters of a document
+            {cluster: [(begin, end), ...]}
+        """
+        self.seen.add(name)
+        return {
+            int(cluster): [tuple(span) for span in spans]
+            for cluster, spans in self.entries[name]["gold"].items()
+        }
+
+    def update(self, name, key, gold):
+        self.seen.add(name)
+        self.entries[name] = {
+            "key": key,
+            "gold": {
+                cluster: [list(span) for span in spans]
+                for cluster, spans in gold.items()
+            }
+        }
+
+    def save(self):
+        entries = {
+            name: entry for name, entry in self.entries.items()
+            if name in self.seen
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        save_index(entries, self.path)
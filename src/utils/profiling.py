@@ -0,0 +1,230 @@
+from contextlib import contextmanager
+import os
+from pathlib import Path
+import pstats
+import tracemalloc
+
+
+class MemoryProfiler:
+    """
+    measures with tracemalloc the memory allocated in each
+    stage of the extraction. A stage is profiled with:
+        with profiler("convert_trees"):
+            ...
+    For each stage the profiler saves the number of calls, the
+    peak of allocated memory, the memory that is still allocated
+    at the end of the stage (retained) and the source lines that
+    allocated most memory. Profiles of different processes can
+    be aggregated with merge
+    """
+    def __init__(self, top=10):
+        self.top = top
+        self.stages = {}
+
+    @staticmethod
+    def start():
+        if not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @staticmethod
+    def snapshot():
+        """
+        snapshot of the traced memory without the allocations
+        of tracemalloc and of the profiler itself
+        """
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),
+        ))
+
+    @contextmanager
+    def __call__(self, name):
+        before = self.snapshot()
+        tracemalloc.reset_peak()
+        start, _ = tracemalloc.get_traced_memory()
+
+        yield
+
+        current, peak = tracemalloc.get_traced_memory()
+        after = self.snapshot()
+
+        # source lines with the largest allocations in this stage
+        lines = {}
+        for diff in after.compare_to(before, "lineno")[:self.top]:
+            if diff.size_diff > 0:
+                frame = diff.traceback[0]
+                lines[f"{frame.filename}:{frame.lineno}"] = diff.size_diff
+
+        self.merge({
+            name: {
+                "calls": 1,
+                "max_peak": peak - start,
+                "total_peak": peak - start,
+                "retained": current - start,
+                "lines": lines
+            }
+        })
+
+    def merge(self, stages):
+        """
+        add the stages of another profiler
+        (e.g. from a worker process)
+        """
+        for name, stats in stages.items():
+            if name not in self.stages:
+                self.stages[name] = {
+                    "calls": 0,
+                    "max_peak": 0,
+                    "total_peak": 0,
+                    "retained": 0,
+                    "lines": {}
+                }
+            saved = self.stages[name]
+
+            saved["calls"] += stats["calls"]
+            saved["max_peak"] = max(saved["max_peak"], stats["max_peak"])
+            saved["total_peak"] += stats["total_peak"]
+            saved["retained"] += stats["retained"]
+            for line, size in stats["lines"].items():
+                saved["lines"][line] = saved["lines"].get(line, 0) + size
+
+    def save(self, output_file):
+        """
+        saves a report with the memory allocated by
+        each stage and its top allocating source lines
+        """
+        def mib(size):
+            return f"{size / 2**20:.3f}"
+
+        with open(Path(output_file), "w", encoding="utf-8") as ofile:
+            ofile.write(
+                "STAGE\tCALLS\tMAX_PEAK_MB\tMEAN_PEAK_MB\t"
+                "MEAN_RETAINED_MB\n"
+            )
+            for name, stats in self.stages.items():
+                calls = stats["calls"]
+                ofile.write(
+                    f"{name}\t{calls}\t{mib(stats['max_peak'])}\t"
+                    f"{mib(stats['total_peak'] / calls)}\t"
+                    f"{mib(stats['retained'] / calls)}\n"
+                )
+
+            for name, stats in self.stages.items():
+                ofile.write(f"\nTop allocations: {name}\n")
+                lines = sorted(
+                    stats["lines"].items(), key=lambda x: x[1], reverse=True
+                )
+                for line, size in lines[:self.top]:
+                    ofile.write(f"{mib(size)} MB\t{line}\n")
+
+
+class RawStats:
+    """
+    wrapper around the raw statistics of a profile
+    (cProfile.Profile.stats) that can be loaded by pstats
+    """
+    def __init__(self, stats):
+        self.stats = stats
+
+    def create_stats(self):
+        pass
+
+
+class CpuProfiler:
+    """
+    aggregates the cProfile statistics of documents
+    processed in different processes. The merged statistics
+    are saved as pstats file and as collapsed stacks:
+        caller;callee;...;function microseconds
+    which can be read by flamegraph tools
+    """
+    def __init__(self, min_time=1e-6, max_depth=100):
+        self.stats = None
+        self.min_time = min_time
+        self.max_depth = max_depth
+
+    def merge(self, stats):
+        """
+        add the raw statistics of a profile
+        """
+        if self.stats is None:
+            self.stats = pstats.Stats(RawStats(stats))
+        else:
+            self.stats.add(RawStats(stats))
+
+    @staticmethod
+    def label(function):
+        filename, line, name = function
+        if filename == "~":
+            # built-in function
+            return name
+        return f"{name} ({os.path.basename(filename)}:{line})"
+
+    def collapsed_stacks(self):
+        """
+        reconstruct the stacks from the call graph. pstats only
+        knows the time spent in each function and on each edge
+        between caller and callee, so the time of a function is
+        split among its callers in proportion to the time of the
+        calls (as done by most pstats to flamegraph converters)
+        """
+        stats = self.stats.stats
+        callees = {}
+        for function, (_, _, _, _, callers) in stats.items():
+            for caller, edge in callers.items():
+                callees.setdefault(caller, {})[function] = edge[3]
+
+        stacks = {}
+
+        def walk(function, stack, fraction):
+            _, _, own, total, _ = stats[function]
+            stack = stack + (function,)
+
+            if own * fraction >= self.min_time:
+                key = ";".join(self.label(i) for i in stack)
+                stacks[key] = stacks.get(key, 0) + own * fraction
+
+            if len(stack) >= self.max_depth:
+                return
+
+            for callee, edge_time in callees.get(function, {}).items():
+                callee_total = stats[callee][3]
+                # skip recursive calls and negligible paths
+                if callee in stack or callee_total == 0:
+                    continue
+                if edge_time * fraction < self.min_time:
+                    continue
+                walk(callee, stack, fraction * edge_time / callee_total)
+
+        # functions called before the profiled code was entered
+        # (e.g. directly by the function that enabled the profiler)
+        # are roots, also for the part of their time that is not
+        # recorded on the edges from their callers
+        for function, (_, _, _, total, callers) in stats.items():
+            if total == 0:
+                if not callers:
+                    walk(function, (), 1.0)
+                continue
+            rest = total - sum(edge[3] for edge in callers.values())
+            if rest > total * 1e-9:
+                walk(function, (), rest / total)
+
+        return stacks
+
+    def save(self, output_file):
+        """
+        saves the merged statistics (output_file.pstats) and
+        the collapsed stacks (output_file.collapsed)
+        """
+        if self.stats is None:
+            return
+
+        self.stats.dump_stats(f"{output_file}.pstats")
+
+        stacks = self.collapsed_stacks()
+        with open(Path(f"{output_file}.collapsed"), "w",
+                  encoding="utf-8") as ofile:
+            for stack, seconds in sorted(stacks.items()):
+                microseconds = int(seconds * 1e6)
+                if microseconds > 0:
+                    ofile.write(f"{stack} {microseconds}\n")
@@ -0,0 +1,215 @@
+from datetime import datetime
+import json
+from pathlib import Path
+import sqlite3
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY,
+    started TEXT NOT NULL,
+    config TEXT
+);
+CREATE TABLE IF NOT EXISTS documents (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    document TEXT NOT NULL,
+    PRIMARY KEY (run, document)
+);
+CREATE TABLE IF NOT EXISTS clusters (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    document TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    cluster INTEGER NOT NULL,
+    begin INTEGER NOT NULL,
+    end INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS links (
+    run INTEGER NOT NULL REFERENCES runs(id),
+    document TEXT NOT NULL,
+    sieve TEXT NOT NULL,
+    rule TEXT NOT NULL,
+    begin INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    antecedent_begin INTEGER NOT NULL,
+    antecedent_end INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS links_run
+    ON links(run, document);
+CREATE INDEX IF NOT EXISTS clusters_run
+    ON clusters(run, document, kind);
+CREATE INDEX IF NOT EXISTS clusters_document
+    ON clusters(document, run);
+CREATE INDEX IF NOT EXISTS clusters_span
+    ON clusters(document, begin, end);
+"""
+
+
+class ResultStore:
+    """
+    SQLite database with the predicted (kind "preds") and
+    golden (kind "gold") clusters of each extraction run.
+    Each mention is a row of the table clusters:
+        run, document, kind, cluster, begin, end
+    and the documents of each run (also those without
+    clusters) are saved in the table documents.
+    Rows are buffered and written in bulk transactions
+    of batch rows. As in the TSV files, singletons are
+    not saved and spans are inclusive. Clusters are added
+    to the current run (see new_run). The provenance of
+    the merges is saved in the table links (see add_links)
+    """
+    def __init__(self, path, batch=50000):
+        self.path = Path(path)
+        self.batch = batch
+        self.rows = []
+        self.names = []
+        self.links_rows = []
+        self.run = None
+
+        if self.path.parent != Path(""):
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.executescript(SCHEMA)
+
+    @staticmethod
+    def is_store(path):
+        """
+        check if path is a SQLite database
+        """
+        path = Path(path)
+        if not path.is_file():
+            return False
+        with open(path, "rb") as infile:
+            return infile.read(16) == b"SQLite format 3\x00"
+
+    def new_run(self, config=None):
+        """
+        register a new run, which becomes the current run,
+        and return its id. config is a dictionary saved with
+        the run (e.g. the sieves)
+        """
+        with self.connection:
+            cursor = self.connection.execute(
+                "INSERT INTO runs (started, config) VALUES (?, ?)",
+                (datetime.now().isoformat(timespec="seconds"),
+                 json.dumps(config))
+            )
+        self.run = cursor.lastrowid
+        return self.run
+
+    def add(self, document, kind, coref_dict):
+        """
+        buffer the clusters of a document, coref_dict has
+        the same format as the result of convert_mapping
+        """
+        self.names.append((self.run, document))
+        cluster = 0
+        for value in coref_dict.values():
+            if len(value) > 1:  # ignore singletons
+                self.rows.extend(
+                    (self.run, document, kind, cluster, begin, end)
+                    for begin, end in value
+                )
+                cluster += 1
+
+        if len(self.rows) >= self.batch:
+            self.flush()
+
+    def add_links(self, document, links):
+        """
+        buffer the provenance of the merges of a document,
+        a list of (sieve, rule, mention, antecedent)
+        """
+        self.links_rows.extend(
+            (self.run, document, sieve, rule, *this, *that)
+            for sieve, rule, this, that in links
+        )
+
+        if len(self.links_rows) >= self.batch:
+            self.flush()
+
+    def flush(self):
+        """
+        write the buffered rows in a single transaction
+        """
+        if not self.rows and not self.names and not self.links_rows:
+            return
+
+        with self.connection:
+            self.connection.executemany(
+                "INSERT OR IGNORE INTO documents (run, document) "
+                "VALUES (?, ?)", self.names
+            )
+            self.connection.executemany(
+                "INSERT INTO clusters "
+                "(run, document, kind, cluster, begin, end) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                self.rows
+            )
+            self.connection.executemany(
+                "INSERT INTO links (run, document, sieve, rule, begin, "
+                "end, antecedent_begin, antecedent_end) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                self.links_rows
+            )
+        self.rows = []
+        self.names = []
+        self.links_rows = []
+
+    def close(self):
+        self.flush()
+        self.connection.close()
+
+    def last_run(self):
+        row = self.connection.execute("SELECT MAX(id) FROM runs").fetchone()
+        return row[0]
+
+    def runs(self):
+        """
+        returns a list of (id, started, config) of all runs
+        """
+        return [
+            (run, started, json.loads(config))
+            for run, started, config in self.connection.execute(
+                "SELECT id, started, config FROM runs ORDER BY id"
+            )
+        ]
+
+    def documents(self, run):
+        """
+        returns the sorted names of the documents of a run
+        """
+        return [
+            document for document, in self.connection.execute(
+                "SELECT document FROM documents "
+                "WHERE run = ? ORDER BY document", (run,)
+            )
+        ]
+
+    def clusters(self, run, document, kind):
+        """
+        returns the clusters of a document in the same
+        format as read_extracted: {cluster: [(begin, end), ...]}
+        """
+        mapping = {}
+        for cluster, begin, end in self.connection.execute(
+                "SELECT cluster, begin, end FROM clusters "
+                "WHERE run = ? AND document = ? AND kind = ? "
+                "ORDER BY rowid", (run, document, kind)):
+            mapping.setdefault(cluster, []).append((begin, end))
+
+        return mapping
+
+    def links(self, run, document):
+        """
+        returns the provenance of the merges of a document
+        in the same format as read_links
+        """
+        return [
+            (sieve, rule, (b1, e1), (b2, e2))
+            for sieve, rule, b1, e1, b2, e2 in self.connection.execute(
+                "SELECT sieve, rule, begin, end, antecedent_begin, "
+                "antecedent_end FROM links WHERE run = ? AND document = ? "
+                "ORDER BY rowid", (run, document)
+            )
+        ]
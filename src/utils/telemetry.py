@@ -0,0 +1,150 @@
+from bisect import bisect_left
+import heapq
+import json
+from pathlib import Path
+import sys
+import time
+
+
+class Telemetry:
+    """
+    throttled progress reporter. For every processed document
+    update is called with a dictionary of statistics:
+        {"document": name, "tokens": 512, "mentions": 130, "seconds": 0.2}
+    The progress line (with documents/s, tokens/s and ETA) is
+    printed at most once every interval seconds. A latency
+    histogram and the top slowest documents are kept to be
+    saved in a machine-readable metrics file. If the total is
+    not known in advance (None), the progress line only shows the
+    processed documents and the throughput until finish is called.
+    Documents that exceeded their budget (stats["budget"]) are
+    counted by reason
+    """
+
+    # upper bounds of the latency histogram in milliseconds
+    buckets = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+
+    def __init__(self, total, prefix="", interval=0.5, top=10,
+                 length=30, stream=None):
+        self.total = total
+        self.prefix = prefix
+        self.interval = interval
+        self.top = top
+        self.length = length
+        self.stream = sys.stdout if stream is None else stream
+
+        self.done = 0
+        self.tokens = 0
+        self.mentions = 0
+        self.degraded = {}
+        self.histogram = [0] * (len(self.buckets) + 1)
+        self.slowest = []
+        self.start = time.perf_counter()
+        self.last_print = 0
+
+    def update(self, stats=None):
+        """
+        register a processed document and print the
+        progress line if enough time has passed
+        """
+        self.done += 1
+
+        if stats is not None:
+            self.tokens += stats.get("tokens", 0)
+            self.mentions += stats.get("mentions", 0)
+            for reason in stats.get("budget", ()):
+                self.degraded[reason] = self.degraded.get(reason, 0) + 1
+
+            if "seconds" in stats:
+                ms = stats["seconds"] * 1000
+                self.histogram[bisect_left(self.buckets, ms)] += 1
+
+                # keep the top slowest documents in a min heap
+                entry = (stats["seconds"], self.done, stats)
+                if len(self.slowest) < self.top:
+                    heapq.heappush(self.slowest, entry)
+                else:
+                    heapq.heappushpop(self.slowest, entry)
+
+        now = time.perf_counter()
+        finished = self.total is not None and self.done >= self.total
+        if now - self.last_print >= self.interval or finished:
+            self.last_print = now
+            self.print_progress(now - self.start)
+
+    def print_progress(self, elapsed):
+        """
+        prints the progress line, a new line
+        is printed when all documents are done
+        """
+        docs_s = self.done / elapsed if elapsed > 0 else 0
+        tokens_s = self.tokens / elapsed if elapsed > 0 else 0
+        # tokens are only shown if they are counted
+        tokens = f"{tokens_s:.0f} tokens/s | " if self.tokens else ""
+
+        if self.total is None:
+            to_print = (
+                f"\r{self.prefix}: {self.done} | "
+                f"{docs_s:.1f} docs/s | {tokens}".rstrip(" |")
+            )
+            print(to_print, end="", file=self.stream, flush=True)
+            return
+
+        if docs_s > 0:
+            eta = int((self.total - self.done) / docs_s)
+        else:
+            eta = 0
+
+        total = max(self.total, 1)
+        filled = int(self.length * self.done // total)
+        bar = f"{'#' * filled}{'.' * (self.length - filled)}"
+        to_print = (
+            f"\r{self.prefix}: {self.done}/{self.total} [{bar}] "
+            f"{100 * self.done / total:.1f}% | "
+            f"{docs_s:.1f} docs/s | {tokens}"
+            f"ETA {eta // 60:02d}:{eta % 60:02d}"
+        )
+        print(to_print, end="", file=self.stream, flush=True)
+
+        if self.done >= self.total:
+            print(file=self.stream)
+
+    def finish(self):
+        """
+        prints the last progress line if the
+        total number of documents was not known
+        """
+        if self.total is None:
+            self.print_progress(time.perf_counter() - self.start)
+            print(file=self.stream)
+
+    def report(self):
+        """
+        returns the collected metrics as a dictionary
+        """
+        elapsed = time.perf_counter() - self.start
+        labels = [f"<={b}ms" for b in self.buckets]
+        labels.append(f">{self.buckets[-1]}ms")
+
+        slowest = [
+            stats for _, _, stats in sorted(self.slowest, reverse=True)
+        ]
+
+        return {
+            "documents": self.done,
+            "tokens": self.tokens,
+            "mentions": self.mentions,
+            "seconds": round(elapsed, 3),
+            "documents_per_s": round(self.done / elapsed, 3),
+            "tokens_per_s": round(self.tokens / elapsed, 3),
+            "degraded": self.degraded,
+            "latency_histogram": dict(zip(labels, self.histogram)),
+            "slowest": slowest
+        }
+
+    def save(self, output_file):
+        """
+        saves the collected metrics as json
+        """
+        with open(Path(output_file), "w", encoding="utf-8") as ofile:
+            json.dump(self.report(), ofile, indent=2)
@@ -1,58 +1,49 @@
 from pathlib import Path
+import fnmatch
+import hashlib
+import json
 import os
+import sys
 
 
-def retrieve_files(dir_path):
+def retrieve_files(dir_path, recursive=False, include=None, exclude=None):
     """
-    collects all files in the given folder
-    and return a list of Path-elements
+    collects all files in the given folder (and its subfolders
+    if recursive) and return a sorted list of Path-elements.
+    include and exclude are lists of glob patterns matched
+    against the file name or its path relative to dir_path:
+    only files that match an include pattern (all files if
+    include is empty) and no exclude pattern are returned
     """
     file_list = []
-    for path, _, files in os.walk(dir_path):
-        if path == str(dir_path):
-            for filename in files:
-                file_list.append(Path(f"{path}/{filename}"))
-
-    return file_list
-
-
-def progress_bar(
-        iteration, total, prefix='', suffix='', decimals=1,
-        length=40, fill='#', miss=".", end="\r", stay=True,
-        fixed_len=True):
-    """
-    Call in a loop to create terminal progress bar
-    Parameters:
-        iteration   - Required  : current iteration (Int)
-        total       - Required  : total iterations (Int)
-        prefix      - Optional  : prefix string (Str)
-        suffix      - Optional  : suffix string (Str)
-        decimals    - Optional  : decimals in percent complete (Int)
-        length      - Optional  : character length of bar (Int)
-        fill        - Optional  : bar fill character (Str)
-        miss        - Optional  : bar missing character (Str)
-        printEnd    - Optional  : end character (e.g. "\r", "\r\n") (Str)
-        stay        - Optional  : progress bar stays on terminal
-        fiexed_len  - Optional  : length includes pre- and suffix
-    """
-    if fixed_len:
-        bar_len = length - len(prefix) - len(suffix)
-    else:
-        bar_len = length
-
-    percent = f"{100*(iteration/float(total)):.{decimals}f}"
-    filled_length = int(bar_len * iteration // total)
-    bar = f"{fill * filled_length}{miss * (bar_len - filled_length)}"
-    to_print = f"\r{prefix} [{bar}] {percent}% {suffix}"
-    print(to_print, end=end)
-
-    # print new line on complete
-    if iteration >= total:
-        if stay:
-            print()
-        else:
-            # clean line given lenght of lase print
-            print(" "*len(to_print), end=end)
+    for path, dirs, files in os.walk(dir_path):
+        if not recursive:
+            dirs.clear()
+        for filename in files:
+            file_path = Path(f"{path}/{filename}")
+            relative = file_path.relative_to(dir_path).as_posix()
+            if matches(relative, include, exclude):
+                file_list.append(file_path)
+
+    return sorted(file_list)
+
+
+def matches(name, include=None, exclude=None):
+    """
+    check if a (relative) path matches at least one include
+    pattern and no exclude pattern (see retrieve_files)
+    """
+    candidates = (name, name.split("/")[-1])
+
+    def match_any(patterns):
+        return any(
+            fnmatch.fnmatch(candidate, pattern)
+            for pattern in patterns for candidate in candidates
+        )
+
+    if include and not match_any(include):
+        return False
+    return not (exclude and match_any(exclude))
 
 
 def save_results(results, output_file):
@@ -75,6 +66,63 @@ def save_results(results, output_file):
             )
 
 
+def reset_peak_rss():
+    """
+    reset the peak resident set size of the current
+    process. This is only supported on linux, on other
+    systems peak_rss will return the peak of the
+    entire lifetime of the process
+    """
+    try:
+        with open("/proc/self/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss():
+    """
+    returns the peak resident set size of the current
+    process in KiB or None if it cannot be measured
+    """
+    try:
+        with open("/proc/self/status", "r") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        # not available on windows
+        return None
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform == "darwin":
+        # macOS reports bytes
+        peak //= 1024
+
+    return peak
+
+
+def save_memory_report(results, output_file):
+    """
+    this function will create a tsv document
+    where the peak RSS of each file is saved:
+    name    peak RSS (MiB)
+    """
+    output_file = Path(output_file)
+
+    with open(output_file, "w", encoding="utf-8") as ofile:
+        ofile.write("FILE\tPEAK_RSS_MB\n")
+        for stats in results:
+            rss = stats.get("peak_rss")
+            rss = "NA" if rss is None else f"{rss / 1024:.1f}"
+            ofile.write(f"{stats['document']}\t{rss}\n")
+
+
 def save_coref_clusters(coref_dict, ending, document, outputpath):
     """
     given a coreference dictionary this function saves
@@ -85,14 +133,12 @@ def save_coref_clusters(coref_dict, ending, document, outputpath):
         12,14   45,45
         34,45   65,68   78,79
     """
-    # extract only document name
-    filename = Path(str(document).split(os.sep)[-1])
-    outputpath = Path(outputpath)
+    # document is the name of the document relative to the corpus,
+    # subdirectories (and archives) are mirrored in the output
+    outputfile = Path(f"{outputpath}/{document}.{ending}")
 
     # make sure output directory exists
-    os.makedirs(outputpath, exist_ok=True)
-
-    outputfile = Path(f"{outputpath}/{filename}.{ending}")
+    os.makedirs(outputfile.parent, exist_ok=True)
 
     # save coreference chains from dictionary
     with open(outputfile, "w", encoding="utf-8") as ofile:
@@ -121,3 +167,77 @@ def read_extracted(filepath):
             mapping[i] = [(int(begin), int(end)) for begin, end in line]
 
     return mapping
+
+
+def save_links(links, document, outputpath):
+    """
+    saves the provenance of the merges of a document in a
+    tsv file (document.links), one merge per line:
+        sieve   rule    mention     antecedent
+    ex.
+        PreciseConstructs   acronym     41,41   37,39
+    """
+    outputfile = Path(f"{outputpath}/{document}.links")
+    os.makedirs(outputfile.parent, exist_ok=True)
+
+    with open(outputfile, "w", encoding="utf-8") as ofile:
+        for sieve, rule, (b1, e1), (b2, e2) in links:
+            ofile.write(f"{sieve}\t{rule}\t{b1},{e1}\t{b2},{e2}\n")
+
+
+def read_links(filepath):
+    """
+    reads a file saved with save_links and returns
+    a list of (sieve, rule, mention, antecedent)
+    """
+    links = []
+    with open(Path(filepath), "r", encoding="utf-8") as infile:
+        for line in infile:
+            sieve, rule, *spans = line.rstrip("\n").split("\t")
+            this, that = (
+                tuple(int(i) for i in span.split(",")) for span in spans
+            )
+            links.append((sieve, rule, this, that))
+
+    return links
+
+
+def file_stamp(filepath):
+    """
+    returns modification time (ns) and size of a file
+    """
+    stat = os.stat(filepath)
+    return [stat.st_mtime_ns, stat.st_size]
+
+
+def file_hash(filepath):
+    """
+    returns the sha1 hash of the content of a file
+    """
+    sha1 = hashlib.sha1()
+    with open(Path(filepath), "rb") as infile:
+        for block in iter(lambda: infile.read(1 << 16), b""):
+            sha1.update(block)
+
+    return sha1.hexdigest()
+
+
+def load_index(filepath):
+    """
+    reads an index saved as json, returns an empty
+    dictionary if the index does not exist
+    """
+    filepath = Path(filepath)
+    if not filepath.exists():
+        return {}
+
+    with open(filepath, "r", encoding="utf-8") as infile:
+        return json.load(infile)
+
+
+def save_index(index, filepath):
+    """
+    saves an index as json
+    """
+    with open(Path(filepath), "w", encoding="utf-8") as ofile:
+        json.dump(index, ofile)
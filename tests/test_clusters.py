@@ -114,6 +114,45 @@ class Test(unittest.TestCase):
 
         self.assertEqual(to_test, gold)
 
+    def test_unresolved_worklist(self):
+        """
+        check that the worklist only contains the
+        mentions without antecedent
+        """
+        cl = self.get_cluster()
+        self.assertEqual(cl.unresolved_mentions(), list(cl)[1:])
+
+        # dutch - holland - netherlands
+        cl.merge(cl[1], cl[0])
+        cl.merge(cl[2], cl[1])
+
+        gold = [i for i in cl if i.antecedent is False]
+        self.assertEqual(cl.unresolved_mentions(), gold)
+        self.assertEqual(len(cl.unresolved), 2)
+
+    def test_provenance(self):
+        """
+        check that the sieve and the rule
+        of each merge are recorded
+        """
+        cl = self.get_cluster()
+        self.assertIsNone(cl.provenance)
+
+        cl = ClusterContainer(list(cl), provenance=True)
+        cl.provenance.sieve = "PreciseConstructs"
+        cl.merge(cl[1], cl[0], rule="predicative")
+        cl.provenance.sieve = "ExactMatch"
+        cl.merge(cl[2], cl[1], rule="surface")
+        cl.merge(cl[4], cl[3])
+
+        gold = [
+            ("PreciseConstructs", "predicative", (2, 2), (1, 1)),
+            ("ExactMatch", "surface", (3, 3), (2, 2)),
+            ("ExactMatch", "-", (12, 12), (13, 13))
+        ]
+        self.assertEqual(list(cl.provenance), gold)
+        self.assertEqual(len(cl.provenance.rules), 3)
+
     def test_attributes_merging(self):
         """
         check that cluster attributes get
@@ -0,0 +1,53 @@
+from types import SimpleNamespace
+import unittest
+
+from mps.cross_document import CrossDocumentLinker, MinHash
+
+
+class Test(unittest.TestCase):
+
+    def document(self, text):
+        words = [i.split("/") for i in text.split()]
+        return SimpleNamespace(
+            tokens=[w for w, _ in words], pos_tags=[t for _, t in words]
+        )
+
+    def test_minhash(self):
+        """
+        signatures are deterministic and similar
+        sets have similar signatures
+        """
+        minhash = MinHash(128)
+        a = minhash.signature({"barack", "obama", "president"})
+        b = minhash.signature({"barack", "obama", "president", "us"})
+        c = minhash.signature({"ship", "captain"})
+
+        self.assertEqual(
+            a, MinHash(128).signature({"obama", "president", "barack"})
+        )
+        self.assertGreater(sum(i == j for i, j in zip(a, b)), 64)
+        self.assertLess(sum(i == j for i, j in zip(a, c)), 16)
+
+    def test_link(self):
+        """
+        clusters of different documents with similar
+        surfaces are linked, pronoun clusters are ignored
+        """
+        linker = CrossDocumentLinker(threshold=0.5)
+        first = self.document(
+            "Barack/NNP Obama/NNP met/VBD the/DT captain/NN ./. he/PRP"
+        )
+        second = self.document(
+            "President/NNP Barack/NNP Obama/NNP spoke/VBD ./. It/PRP"
+        )
+
+        linker.add("first", linker.summarize(
+            first, {0: [(0, 1), (6, 6)], 1: [(3, 4)]}
+        ))
+        linker.add("second", linker.summarize(
+            second, {0: [(0, 2)], 1: [(5, 5)]}
+        ))
+
+        self.assertEqual(len(linker.clusters), 3)
+        self.assertEqual(linker.clusters[0][2], "Barack Obama")
+        self.assertEqual(linker.resolve(), [0, 1, 0])
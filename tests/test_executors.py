@@ -0,0 +1,116 @@
+from argparse import Namespace
+import configparser
+from pathlib import Path
+import tempfile
+import unittest
+
+from datareader.conll_data_reader import ConllParser
+from mps.multi_pass_sieve import MultiPassSieve
+from src.main_functions.extraction import (
+    Extractor,
+    read_execution,
+    split_parts
+)
+from src.utils.errors import InvalidArgument
+from src.utils.executors import EXECUTORS, Executor
+from src.utils.gold_cache import GoldCache
+
+
+def square(x):
+    return x * x
+
+
+class Test(unittest.TestCase):
+
+    def test_backends(self):
+        """
+        every backend calls the callback once for each task
+        """
+        for name, executor in EXECUTORS.items():
+            results = []
+            executor(workers=2, queued=3).run(
+                square, iter(range(20)), results.append
+            )
+            self.assertEqual(
+                sorted(results), [x * x for x in range(20)], name
+            )
+
+    def test_errors(self):
+        """
+        errors of the tasks are raised in the main thread
+        """
+        for name, executor in EXECUTORS.items():
+            with self.assertRaises(TypeError, msg=name):
+                executor(workers=2, queued=3).run(
+                    square, iter([1, None, 3]), lambda x: None
+                )
+
+    def test_interface(self):
+        """
+        every backend implements run
+        """
+        with self.assertRaises(TypeError):
+            Executor()
+
+        self.assertTrue(all(
+            issubclass(i, Executor) for i in EXECUTORS.values()
+        ))
+
+    def test_gold_cache(self):
+        """
+        the workers only send back the golden clusters
+        that are new entries of the cache
+        """
+        conll = (
+            "#begin document (test); part 000\n"
+            "test 0 0 John NNP (TOP(S(NP*) - - - - (PERSON) * (0)\n"
+            "test 0 1 saw VBD (VP* - - - - * * -\n"
+            "test 0 2 John NNP (NP*)))) - - - - (PERSON) * (0)\n"
+            "\n"
+            "#end document\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "test.conll"
+            path.write_text(conll)
+            reader = ConllParser()
+            mps = MultiPassSieve(["ExactMatch"])
+            tasks = list(split_parts([path], reader, tmp))
+
+            # without cache
+            extractor = Extractor(tmp, reader, mps)
+            stats = extractor.process_document(tasks[0])
+            self.assertNotIn("gold", stats)
+            self.assertTrue((Path(tmp) / "test.conll.gold").exists())
+
+            extractor = Extractor(
+                tmp, reader, mps,
+                gold_cache=GoldCache(Path(tmp) / "cache.json")
+            )
+            for cached in (False, True):
+                task, = extractor.cached_tasks(tasks)
+                stats = extractor.process_document(task)
+                self.assertEqual("gold" not in stats, cached)
+                if not cached:
+                    extractor.gold_cache.update("test.conll", *stats["gold"])
+
+    def test_read_execution(self):
+        """
+        options that measure the whole process are
+        rejected with the thread and asyncio backends
+        """
+        config = configparser.ConfigParser()
+        for backend in EXECUTORS:
+            config["EXECUTION"] = {"backend": backend}
+            for option in ("low_memory", "profile_memory", "profile_cpu"):
+                args = Namespace(
+                    single=False, low_memory=False,
+                    profile_memory=False, profile_cpu=False
+                )
+                setattr(args, option, True)
+
+                if backend in {"thread", "asyncio"}:
+                    with self.assertRaises(InvalidArgument):
+                        read_execution(config, args)
+                else:
+                    executor = read_execution(config, args)
+                    self.assertIs(type(executor), EXECUTORS[backend])
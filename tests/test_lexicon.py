@@ -0,0 +1,114 @@
+import io
+import pickle
+from pathlib import Path
+import tempfile
+from types import SimpleNamespace
+import unittest
+
+from mps.sieves.pronoun_sieve import Pronoun
+from mps.text.cluster_container import ClusterContainer
+from mps.text.lexicon import Lexicon, build_lexicon, read_bergsma_lin
+from mps.text.mention import Mention
+from mps.text.word import Word
+from mps.utils.errors import InvalidLexicon
+
+
+class Test(unittest.TestCase):
+
+    # noun phrase, masculine, feminine, neuter and plural counts
+    counts = (
+        "ship\t0 1 40 2\n"
+        "captain\t30 2 1 3\n"
+        "mary\t0 50 0 0\n"
+        "crew\t3 1 2 20\n"
+        "the ship\t0 0 9 0\n"
+        "über\t5 0 0 0\n"
+        "rare\t1 0 0 0\n"
+    )
+
+    def get_lexicon(self, tmp):
+        path = Path(tmp) / "gender.lex"
+        entries = read_bergsma_lin(io.StringIO(self.counts))
+        self.assertEqual(build_lexicon(entries, path), 6)
+        return Lexicon(path)
+
+    def test_lookup(self):
+        """
+        keys are found byte by byte, prefixes
+        and unknown keys have no attributes
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            lexicon = self.get_lexicon(tmp)
+
+            self.assertEqual(len(lexicon), 6)
+            self.assertEqual(
+                lexicon.attributes("Ship"), ({"neuter"}, {"singular"}, {False})
+            )
+            self.assertEqual(
+                lexicon.attributes("captain"),
+                ({"masculine"}, {"singular"}, {True})
+            )
+            self.assertEqual(
+                lexicon.attributes("crew"), (set(), {"plural"}, set())
+            )
+            self.assertEqual(lexicon.attributes("über")[0], {"masculine"})
+            for key in ("shi", "ships", "rare", ""):
+                self.assertEqual(lexicon.get(key), 0)
+
+            # workers map the file again
+            copy = pickle.loads(pickle.dumps(lexicon))
+            self.assertEqual(copy.get("mary"), lexicon.get("mary"))
+            copy.close()
+            lexicon.close()
+
+            with self.assertRaises(InvalidLexicon):
+                Lexicon(__file__)
+
+    def test_without_lexicon(self):
+        """
+        without a lexicon, the attributes are based on the
+        named entities only (pronouns have no genus)
+        """
+        captain = Mention([
+            Word("the", 0, 0, "DT", None),
+            Word("captain", 1, 0, "NN", None)
+        ])
+        he = Mention([Word("he", 2, 1, "PRP", None)])
+        it = Mention([Word("it", 3, 2, "PRP", None)])
+
+        self.assertEqual(captain.attributes.animacy, {False})
+        self.assertEqual(captain.attributes.genus, set())
+        for pronoun in (he, it):
+            self.assertEqual(pronoun.attributes.animacy, set())
+            self.assertEqual(pronoun.attributes.genus, set())
+
+        # [the captain] ... [he] are linked as before
+        document = SimpleNamespace(lr=[[captain], [he]], rl=[])
+        cl = Pronoun()(document, ClusterContainer([captain, he]))
+        self.assertEqual(cl[0].cluster, cl[1].cluster)
+
+    def test_pronoun_sieve(self):
+        """
+        with the lexicon, [she] is not linked to [the ship]
+        """
+        ship = Mention([
+            Word("the", 0, 0, "DT", None), Word("ship", 1, 0, "NN", None)
+        ])
+        she = Mention([Word("she", 2, 1, "PRP", None)])
+        document = SimpleNamespace(lr=[[ship], [she]], rl=[])
+
+        with tempfile.TemporaryDirectory() as tmp:
+            lexicon = self.get_lexicon(tmp)
+            for lexicon, linked in ((None, True), (lexicon, False)):
+                ship._attributes = she._attributes = None
+                cl = ClusterContainer([ship, she], lexicon=lexicon)
+                cl = Pronoun()(document, cl)
+                self.assertEqual(cl[0].cluster == cl[1].cluster, linked)
+
+            self.assertEqual(ship.attributes.genus, {"neuter"})
+            self.assertEqual(she.attributes.genus, {"feminine"})
+
+            # genus is kept when attributes are joined
+            joined = ship.attributes + she.attributes
+            self.assertEqual(joined.genus, {"neuter", "feminine"})
+            lexicon.close()
@@ -0,0 +1,231 @@
+import contextlib
+import io
+import os
+from pathlib import Path
+import tempfile
+import unittest
+
+from pairwise_evaluator.evaluator import Evaluator
+from pairwise_evaluator.metrics import max_assignment, score
+from pairwise_evaluator import resampling
+from src.main_functions.evaluation import (
+    INDEX_FILE,
+    is_unchanged,
+    list_documents,
+    paired_documents,
+    score_directory
+)
+from src.utils.errors import InvalidArgument
+from src.utils.utils import load_index
+
+
+class Test(unittest.TestCase):
+    """
+    example from Pradhan et al. (2014):
+        key:        {a b c} {d e f g}
+        response:   {a b} {c d} {f g h i}
+    """
+    a, b, c, d, e, f, g, h, i = [(n, n) for n in range(9)]
+    key = [[a, b, c], [d, e, f, g]]
+    response = [[a, b], [c, d], [f, g, h, i]]
+
+    def test_muc(self):
+        counts = score(self.key, self.response)
+        self.assertEqual(counts["muc"], (2, 5, 2, 5))
+
+    def test_b_cubed(self):
+        p_num, p_den, r_num, r_den = score(self.key, self.response)["bcub"]
+        self.assertAlmostEqual(p_num / p_den, 0.5)
+        self.assertAlmostEqual(r_num / r_den, 5 / 12)
+
+    def test_ceaf(self):
+        counts = score(self.key, self.response)
+
+        p_num, p_den, r_num, r_den = counts["ceafe"]
+        self.assertAlmostEqual(p_num / p_den, 1.3 / 3)
+        self.assertAlmostEqual(r_num / r_den, 0.65)
+
+        self.assertEqual(counts["ceafm"], (4, 8, 4, 7))
+
+    def test_max_assignment(self):
+        weights = [
+            [4, 1, 3],
+            [2, 0, 5],
+            [3, 2, 2]
+        ]
+        # 4 + 5 + 2
+        self.assertEqual(max_assignment(weights), 11)
+
+        # more rows than columns
+        self.assertEqual(max_assignment([[1], [3], [2]]), 3)
+
+    def test_dataset(self):
+        """
+        data set counts are the sum of the document counts
+        """
+        evaluator = Evaluator()
+        preds = dict(enumerate(self.response))
+        gold = dict(enumerate(self.key))
+        evaluator.evaluate_document(preds, gold)
+        evaluator.evaluate_document(preds, gold)
+
+        precision, recall, _ = evaluator.evaluate_dataset("muc")
+        self.assertEqual((precision, recall), (0.4, 0.4))
+        self.assertEqual(evaluator.dataset_counts["muc"], [4, 10, 4, 10])
+
+    def test_link_counts(self):
+        """
+        links are correct if both mentions
+        are in the same golden cluster
+        """
+        a, b, c, d, h = self.a, self.b, self.c, self.d, self.h
+        links = [
+            ("ExactMatch", "surface", b, a),
+            ("PreciseConstructs", "apposition", d, c),
+            ("PreciseConstructs", "acronym", c, a),
+            ("PreciseConstructs", "acronym", h, a)
+        ]
+        evaluator = Evaluator()
+        counts = evaluator.count_links(links, dict(enumerate(self.key)))
+        self.assertEqual(counts, {
+            "ExactMatch": {"surface": [1, 1]},
+            "PreciseConstructs": {"apposition": [0, 1], "acronym": [1, 2]}
+        })
+
+        evaluator.add_link_counts(counts)
+        evaluator.add_link_counts(counts)
+        self.assertEqual(
+            evaluator.link_counts["PreciseConstructs"]["acronym"], [2, 4]
+        )
+
+    @unittest.skipIf(resampling.np is None, "NumPy is not installed")
+    def test_paired_bootstrap(self):
+        """
+        test the scores of both runs and the p-value
+        of a run that is better on every document
+        """
+        evaluator = Evaluator()
+        key = dict(enumerate(self.key))
+        documents = [
+            evaluator.count_document(dict(enumerate(self.response)), key),
+            evaluator.count_document({0: [self.a, self.b]}, key)
+        ]
+        perfect = evaluator.count_document(key, key)
+
+        run = resampling.counts_array(documents * 5)
+        other = resampling.counts_array([perfect] * 10)
+        result = resampling.paired_bootstrap(run, other, 1000, seed=0)
+
+        for document in documents * 5:
+            evaluator.add_counts(document)
+        conll = resampling.SCORES.index("conll")
+        muc = resampling.SCORES.index("muc")
+        self.assertAlmostEqual(
+            result["a"][muc], evaluator.evaluate_dataset("muc")[2]
+        )
+        self.assertAlmostEqual(result["b"][conll], 1)
+        self.assertTrue(all(result["delta"] > 0))
+        self.assertTrue(all(result["p_value"] == 0))
+        self.assertTrue(all(result["low"] <= result["delta"]))
+
+        # runs without common documents cannot be compared
+        with self.assertRaises(ValueError):
+            resampling.paired_bootstrap(run[:0], other[:0], 10)
+        with self.assertRaises(InvalidArgument):
+            paired_documents(["a", "b"], ["c"])
+
+    @unittest.skipIf(resampling.np is None, "NumPy is not installed")
+    def test_stratified_sample(self):
+        """
+        test the allocation of the sample to the strata and
+        the estimate of a sample of all documents
+        """
+        strata = ["nw"] * 96 + ["bc"] * 2 + ["tc"] * 2
+        sample = resampling.stratified_sample(strata, 10, seed=0)
+        drawn = [strata[i] for i in sample]
+        self.assertEqual(
+            (drawn.count("nw"), drawn.count("bc"), drawn.count("tc")),
+            (8, 1, 1)
+        )
+
+        evaluator = Evaluator()
+        key = dict(enumerate(self.key))
+        documents = [
+            evaluator.count_document(dict(enumerate(self.response)), key),
+            evaluator.count_document({0: [self.a, self.b]}, key)
+        ]
+        counts = resampling.counts_array(documents)
+        result = resampling.stratified_estimate(
+            counts, ["nw", "bc"], {"nw": 1, "bc": 1}, 100, seed=0
+        )
+        gold = resampling.f1_scores(counts.sum(axis=0))
+        self.assertTrue(all(abs(result["estimate"] - gold) < 1e-9))
+
+    def write_clusters(self, path, clusters):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text("".join(
+            "\t".join(f"{b},{e}" for b, e in cluster) + "\n"
+            for cluster in clusters
+        ))
+
+    def score(self, path, incremental):
+        evaluator = Evaluator()
+        with contextlib.redirect_stdout(io.StringIO()):
+            counts, _, rescored = score_directory(
+                path, list_documents(path), evaluator, incremental
+            )
+        return evaluator, counts, rescored
+
+    def test_incremental_evaluation(self):
+        """
+        an incremental evaluation only scores the changed
+        documents and has the same totals as a full evaluation
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp)
+            for name in ("a", "sub/b", "c"):
+                self.write_clusters(path / f"{name}.preds", self.response)
+                self.write_clusters(path / f"{name}.gold", self.key)
+
+            _, _, rescored = self.score(path, incremental=False)
+            self.assertEqual(rescored, 3)
+            index = load_index(path / INDEX_FILE)
+            self.assertEqual(sorted(index), ["a", "c", "sub/b"])
+
+            # a changed, b touched but unchanged, c deleted
+            self.write_clusters(path / "a.preds", self.key)
+            stamp = os.stat(path / "sub/b.preds").st_mtime_ns + 10 ** 9
+            os.utime(path / "sub/b.preds", ns=(stamp, stamp))
+            os.remove(path / "c.preds")
+            os.remove(path / "c.gold")
+
+            files = {i: str(path / f"sub/b.{i}") for i in ("preds", "gold")}
+            entry = index["sub/b"]
+            self.assertTrue(is_unchanged(entry, files))
+            self.assertEqual(entry["preds"]["stamp"][0], stamp)
+            self.assertFalse(is_unchanged(index["a"], {
+                i: str(path / f"a.{i}") for i in ("preds", "gold")
+            }))
+
+            incremental, counts, rescored = self.score(path, True)
+            self.assertEqual(rescored, 1)
+            index = load_index(path / INDEX_FILE)
+            self.assertEqual(sorted(index), ["a", "sub/b"])
+            self.assertEqual(index["sub/b"]["preds"]["stamp"][0], stamp)
+
+            full, full_counts, rescored = self.score(path, False)
+            self.assertEqual(rescored, 2)
+            # counts read from the index are lists
+            def as_lists(counts):
+                return {
+                    name: {key: list(i) for key, i in document.items()}
+                    for name, document in counts.items()
+                }
+            self.assertEqual(as_lists(counts), as_lists(full_counts))
+            self.assertEqual(
+                incremental.dataset_counts, full.dataset_counts
+            )
+            self.assertEqual(
+                incremental.evaluate_dataset("muc"),
+                full.evaluate_dataset("muc")
+            )
@@ -0,0 +1,197 @@
+import cProfile
+from pathlib import Path
+import pickle
+import pstats
+import tempfile
+import tracemalloc
+import unittest
+
+from datareader.conll_data_reader import ConllParser
+from mps.multi_pass_sieve import MultiPassSieve
+from src.main_functions.extraction import Extractor, split_parts
+from src.utils.executors import ProcessExecutor
+from src.utils.profiling import CpuProfiler, MemoryProfiler
+
+
+def leaf(n):
+    return sum(range(n))
+
+
+def middle():
+    return leaf(20000)
+
+
+def inner():
+    return [middle() for _ in range(5)]
+
+
+def work():
+    """
+    the profiler is enabled inside the function, as in
+    Extractor.process_document: leaf is called both directly
+    and through inner
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    inner()
+    leaf(50000)
+    profiler.disable()
+    profiler.create_stats()
+    return profiler.stats
+
+
+class Test(unittest.TestCase):
+
+    def find(self, stats, name):
+        for function, values in stats.items():
+            if function[2] == name:
+                return values
+        raise KeyError(name)
+
+    def test_cpu_profiler(self):
+        """
+        statistics of different documents are added up and the
+        collapsed stacks keep all the time of the functions
+        """
+        profiler = CpuProfiler(min_time=0)
+        profiler.merge(work())
+        profiler.merge(work())
+        stats = profiler.stats.stats
+
+        self.assertEqual(self.find(stats, "inner")[:2], (2, 2))
+        self.assertEqual(self.find(stats, "middle")[:2], (10, 10))
+        self.assertEqual(self.find(stats, "leaf")[:2], (12, 12))
+
+        stacks = profiler.collapsed_stacks()
+        labels = [stack.split(";") for stack in stacks]
+        roots = {i[0].split(" ")[0] for i in labels}
+        self.assertIn("inner", roots)
+        # leaf is also called directly by work
+        self.assertIn("leaf", roots)
+        self.assertIn(
+            ["inner", "middle", "leaf"],
+            [[j.split(" ")[0] for j in i if j[0] != "<"] for i in labels]
+        )
+
+        # the time of the stacks is the time of all functions
+        own = sum(values[2] for values in stats.values())
+        self.assertAlmostEqual(sum(stacks.values()), own, places=9)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "cpu"
+            profiler.save(output)
+
+            saved = pstats.Stats(f"{output}.pstats").stats
+            self.assertEqual(self.find(saved, "leaf")[:2], (12, 12))
+            lines = Path(f"{output}.collapsed").read_text().splitlines()
+            self.assertTrue(lines)
+            for line in lines:
+                stack, microseconds = line.rsplit(" ", 1)
+                self.assertIn(stack, stacks)
+                self.assertGreater(int(microseconds), 0)
+
+    def test_memory_profiler(self):
+        """
+        each stage is recorded with the memory it allocated,
+        profilers of different processes are merged
+        """
+        tracing = tracemalloc.is_tracing()
+        MemoryProfiler.start()
+        try:
+            profiler = MemoryProfiler()
+            for _ in range(2):
+                with profiler("allocate"):
+                    kept = [bytearray(1024) for _ in range(100)]
+                with profiler("nothing"):
+                    pass
+        finally:
+            if not tracing:
+                tracemalloc.stop()
+
+        stages = profiler.stages
+        self.assertEqual(list(stages), ["allocate", "nothing"])
+        self.assertEqual(stages["allocate"]["calls"], 2)
+        self.assertGreaterEqual(stages["allocate"]["max_peak"], 100 * 1024)
+        self.assertGreaterEqual(
+            stages["allocate"]["total_peak"],
+            stages["allocate"]["max_peak"]
+        )
+        # the allocations of the stage are found in this file
+        self.assertTrue(any(
+            i.startswith(__file__) for i in stages["allocate"]["lines"]
+        ))
+        self.assertEqual(stages["nothing"]["calls"], 2)
+        del kept
+
+        merged = MemoryProfiler()
+        merged.merge(stages)
+        merged.merge(stages)
+        self.assertEqual(merged.stages["allocate"]["calls"], 4)
+        self.assertEqual(
+            merged.stages["allocate"]["total_peak"],
+            2 * stages["allocate"]["total_peak"]
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "memory.tsv"
+            merged.save(output)
+            lines = output.read_text().splitlines()
+            self.assertTrue(lines[0].startswith("STAGE\tCALLS"))
+            self.assertTrue(lines[1].startswith("allocate\t4\t"))
+            self.assertIn("Top allocations: allocate", lines)
+
+    def test_profiler_not_pickled(self):
+        """
+        the profiles of the extractor grow with the
+        documents, they are not sent to the worker processes
+        """
+        extractor = Extractor(
+            "out", ConllParser(), MultiPassSieve(["ExactMatch"]),
+            profile_memory=True
+        )
+        size = len(pickle.dumps(extractor))
+        extractor.memory_profiler.merge({
+            f"stage{i}": {
+                "calls": 1, "max_peak": 1, "total_peak": 1,
+                "retained": 0, "lines": {f"file.py:{i}": 1}
+            }
+            for i in range(100)
+        })
+
+        extractor.cpu_profiler.merge(work())
+
+        self.assertEqual(len(pickle.dumps(extractor)), size)
+        self.assertEqual(len(extractor.memory_profiler.stages), 100)
+
+    def test_process_profiles(self):
+        """
+        documents are profiled in the worker processes and
+        their profiles are merged by the main process
+        """
+        conll = (
+            "#begin document (test); part {:03d}\n"
+            "test 0 0 John NNP (TOP(S(NP*) - - - - (PERSON) * (0)\n"
+            "test 0 1 saw VBD (VP* - - - - * * -\n"
+            "test 0 2 John NNP (NP*)))) - - - - (PERSON) * (0)\n"
+            "\n"
+            "#end document\n"
+        )
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "test.conll"
+            path.write_text("".join(conll.format(i) for i in range(6)))
+            reader = ConllParser()
+            extractor = Extractor(
+                str(Path(tmp) / "out"), reader,
+                MultiPassSieve(["ExactMatch"]),
+                profile_memory=True, profile_cpu=True
+            )
+            tasks = split_parts([path], reader, tmp)
+            results = extractor.run(
+                tasks, ProcessExecutor(workers=2, queued=2)
+            )
+
+        self.assertEqual(len(results), 6)
+        stages = extractor.memory_profiler.stages
+        self.assertEqual(stages["ConllParser"]["calls"], 6)
+        stats = extractor.cpu_profiler.stats.stats
+        self.assertEqual(self.find(stats, "process")[0], 6)
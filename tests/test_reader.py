@@ -0,0 +1,371 @@
+from concurrent.futures import ThreadPoolExecutor
+import gc
+import gzip
+import io
+from pathlib import Path
+import tarfile
+import tempfile
+import unittest
+import weakref
+
+from datareader.conll_data_reader import ConllParser
+from datareader.conll_writer import save_conll, splice_coref
+from datareader.sources import iter_members
+from mps.multi_pass_sieve import MultiPassSieve
+from mps.online import OnlineResolver
+from mps.sieves.exact_match_sieve import ExactMatch
+from mps.text.cluster_container import ClusterContainer
+from mps.text.document import Document
+
+
+class Test(unittest.TestCase):
+
+    conll = (
+        "#begin document (test); part 000\n"
+        "test 0 0 John NNP (TOP(S(NP*) - - - - (PERSON) * (0)\n"
+        "test 0 1 saw VBD (VP* - - - - * * -\n"
+        "test 0 2 the DT (NP* - - - - * * (1\n"
+        "test 0 3 ship NN *)) - - - - * * 1)\n"
+        "test 0 4 . . *)) - - - - * * -\n"
+        "\n"
+        "test 0 0 John NNP (TOP(S(NP*) - - - - (PERSON) * (0)\n"
+        "test 0 1 liked VBD (VP* - - - - * * -\n"
+        "test 0 2 the DT (NP* - - - - * * (1\n"
+        "test 0 3 ship NN *)) - - - - * * 1)\n"
+        "test 0 4 . . *)) - - - - * * -\n"
+        "\n"
+        "#end document\n"
+    )
+
+    def get_columns(self):
+        """
+        split the test document in sentences and columns
+        """
+        sentences = []
+        for sentence in self.conll.split("\n\n"):
+            rows = [
+                line.split() for line in sentence.splitlines()
+                if line and not line.startswith("#")
+            ]
+            if rows:
+                sentences.append(rows)
+
+        return sentences
+
+    def test_parse_string(self):
+        reader = ConllParser()
+        sentences, tokens, _, ner, trees, coref = reader.parse_string(
+            self.conll
+        )
+
+        self.assertEqual(sentences, [slice(0, 5), slice(5, 10)])
+        self.assertEqual(tokens[:4], ["John", "saw", "the", "ship"])
+        self.assertEqual(ner[:2], ["PERSON", None])
+        self.assertEqual(len(trees), 2)
+        self.assertEqual(coref, {"0": [[0], [5]], "1": [[2, 3], [7, 8]]})
+
+    def test_shared_parser(self):
+        """
+        the same parser can be used by multiple threads
+        """
+        reader = ConllParser()
+        whole = reader.parse_string(self.conll)
+        with ThreadPoolExecutor(4) as pool:
+            results = list(pool.map(reader.parse_string, [self.conll] * 20))
+
+        self.assertTrue(all(i == whole for i in results))
+
+    def test_parse_sources(self):
+        """
+        strings, file-like objects and columns
+        produce the same document
+        """
+        reader = ConllParser()
+        from_string = reader.parse(self.conll)
+        from_file = reader.parse(io.StringIO(self.conll))
+        from_columns = reader.parse(self.get_columns())
+
+        self.assertEqual(from_string, from_file)
+        self.assertEqual(from_string, from_columns)
+
+    def test_resolve(self):
+        reader = ConllParser()
+        mps = MultiPassSieve(["ExactMatch"])
+        results = list(mps.resolve(map(reader.parse, [self.conll] * 2)))
+
+        spans, clusters = results[0]
+        self.assertEqual(len(results), 2)
+        self.assertEqual(list(spans), [0, 0, 2, 3, 5, 5, 7, 8])
+        self.assertEqual(list(clusters), [0, 1, 0, 1])
+
+    def test_required_features(self):
+        """
+        only the features required by the
+        configured sieves are computed
+        """
+        reader = ConllParser()
+        mps = MultiPassSieve(["StrictHeadMatch"])
+        doc = Document(*reader.parse(self.conll))
+        doc.process(features=mps.features)
+        clusters = mps(doc)
+
+        self.assertEqual(mps.features, set())
+        self.assertEqual(doc.rl, [])
+        self.assertTrue(all(i._attributes is None for i in doc.nps))
+        self.assertEqual(clusters[1].cluster, clusters[3].cluster)
+
+        all_sieves = MultiPassSieve(
+            ["ExactMatch", "PreciseConstructs", "Pronoun"]
+        )
+        self.assertEqual(all_sieves.features, {"rl", "attributes"})
+
+    def test_release_mentions(self):
+        """
+        in low memory mode, the trees are released after the
+        mentions are extracted and the mentions (with their
+        words) after the clusters are converted
+        """
+        reader = ConllParser()
+        mps = MultiPassSieve(["ExactMatch", "PreciseConstructs"])
+        doc = Document(*reader.parse(self.conll))
+        doc.process(low_memory=True, features=mps.features)
+        self.assertEqual(doc.trees, [])
+
+        spans, clusters = mps(doc).to_arrays()
+        self.assertEqual(list(clusters), [0, 1, 0, 1])
+
+        word = weakref.ref(doc.nps[0].words[0])
+        doc.release_mentions()
+        gc.collect()
+
+        self.assertIsNone(word())
+        self.assertEqual((doc.nps, doc.lr, doc.rl), ([], [], []))
+        self.assertEqual(len(doc.tokens), 10)
+
+    def test_exact_match_order(self):
+        """
+        the candidates of the exact match sieve are in the
+        same order, whatever the other configured sieves
+        """
+        # [John] [the ship] left ... [John] saw [the ship]
+        conll = (
+            "#begin document (test); part 000\n"
+            "test 0 0 John NNP (TOP(S(NP*) - - - - (PERSON) * -\n"
+            "test 0 1 the DT (NP* - - - - * * -\n"
+            "test 0 2 ship NN *) - - - - * * -\n"
+            "test 0 3 left VBD (VP*) - - - - * * -\n"
+            "test 0 4 . . *)) - - - - * * -\n"
+            "\n"
+        ) + self.conll.split("\n\n")[1] + "\n\n#end document\n"
+
+        reader = ConllParser()
+        for sieves in (["ExactMatch"], ["ExactMatch", "PreciseConstructs"]):
+            mps = MultiPassSieve(sieves)
+            self.assertEqual(mps.features, {"rl"})
+
+            doc = Document(*reader.parse(conll))
+            doc.process(features=mps.features)
+            clusters = ClusterContainer(doc.nps, attributes=False)
+
+            # [John] and the first candidate of the previous sentence
+            clusters.max_candidates = 2
+            clusters = ExactMatch()(doc, clusters)
+
+            # [the ship] ... [the ship] (right to left)
+            self.assertEqual(clusters[1].cluster, clusters[3].cluster)
+
+    def test_parts(self):
+        """
+        each part of a multi-part file
+        is parsed as an independent document
+        """
+        reader = ConllParser()
+        second = self.conll.replace("part 000", "part 001")
+        text = self.conll + second
+
+        parts = reader.iter_parts(text.splitlines())
+        self.assertEqual([number for number, _ in parts], ["000", "001"])
+        self.assertEqual(list(reader.iter_parts(["a b c"])), [])
+
+        whole = reader.parse_string(self.conll)
+        for part in (0, 1):
+            self.assertEqual(reader.parse_string(text, part), whole)
+        self.assertEqual(reader.parse_string(text, 2)[1], [])
+
+    def test_part_offsets(self):
+        """
+        parts are located in a single scan and read from their
+        byte offset, they are the same parts found by select_part
+        """
+        reader = ConllParser()
+        text = "".join(
+            self.conll.replace("part 000", f"part {i:03d} \u00e9")
+            for i in range(3)
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "test.conll"
+            path.write_text(text, encoding="utf-8")
+
+            parts = reader.locate_parts(path)
+            self.assertEqual([i for i, _ in parts], ["000", "001", "002"])
+
+            lines = text.splitlines()
+            split = list(reader.iter_parts(lines))
+            for position, (number, offset) in enumerate(parts):
+                self.assertEqual(
+                    reader(path, offset=offset), reader(path, position)
+                )
+                self.assertEqual(
+                    [i.rstrip("\n") for i in reader.read_part(path, offset)],
+                    list(reader.select_part(lines, position))
+                )
+                self.assertEqual(
+                    split[position],
+                    (number, list(reader.select_part(lines, position)))
+                )
+
+            path.write_text(self.conll.replace("#begin", "#x"))
+            self.assertEqual(reader.locate_parts(path), [(None, 0)])
+
+    def test_compressed_sources(self):
+        """
+        compressed files and archive members are read
+        without extracting them on disk
+        """
+        reader = ConllParser()
+        whole = reader.parse_string(self.conll)
+
+        with tempfile.TemporaryDirectory() as tmp:
+            compressed = Path(tmp) / "test.conll.gz"
+            with gzip.open(compressed, "wt", encoding="utf-8") as ofile:
+                ofile.write(self.conll)
+
+            archive = Path(tmp) / "test.tar.gz"
+            with tarfile.open(archive, "w:gz") as tar:
+                tar.add(compressed, arcname="docs/test.conll.gz")
+
+            self.assertEqual(reader(compressed), whole)
+            self.assertEqual(reader.locate_parts(compressed), [("000", 0)])
+
+            members = list(iter_members(archive))
+            self.assertEqual(members, [("docs/test.conll", self.conll)])
+
+    def test_gold_mapping(self):
+        """
+        the lightweight gold mapping is identical
+        to the mapping of the gold ClusterContainer
+        """
+        reader = ConllParser()
+        data = reader.parse_string(self.conll)
+        # span (2, 3) in two clusters, the last one is kept
+        coref = {"5": [[7, 8], [2, 3]], "0": [[5], [0]], "1": [[2, 3], [9]]}
+
+        doc = Document(*data[:5], coref)
+        self.assertEqual(list(doc.token_sentences), [0] * 5 + [1] * 5)
+        gold = doc.gold_mapping()
+
+        doc.convert_coref()
+        self.assertEqual(gold, doc.coref.convert_mapping())
+        self.assertEqual(list(gold), [0, 1, 5])
+
+        doc = Document(*data[:5], {"0": [[3, 4, 5, 6]]})
+        with self.assertRaises(ValueError):
+            doc.gold_mapping()
+
+    def test_conll_writer(self):
+        """
+        the predicted clusters written in the last column are
+        read back as golden clusters, the other columns and
+        the end of selected parts are kept
+        """
+        reader = ConllParser()
+        mapping = {
+            0: [(0, 0), (5, 5)], 3: [(2, 3), (2, 2), (7, 8)], 4: [(9, 9)]
+        }
+
+        lines = list(splice_coref(self.conll.splitlines(), mapping))
+        self.assertEqual(lines[3], "test 0 2 the DT (NP* - - - - * * (1|(1)")
+        self.assertEqual(lines[-1], "#end document")
+
+        _, _, _, _, _, coref = reader.parse_string("\n".join(lines))
+        self.assertEqual(
+            coref, {"0": [[0], [5]], "1": [[2], [2, 3], [7, 8]]}
+        )
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "test.conll"
+            path.write_text(self.conll + self.conll.replace("000", "001"))
+
+            output = Path(tmp) / "out" / "test.conll_part001.preds.conll"
+            save_conll(path, 1, mapping, output)
+            spliced = output.read_text().splitlines()
+
+            self.assertEqual(spliced[0], "#begin document (test); part 001")
+            self.assertEqual(spliced[1:], lines[1:])
+
+            # the part is read from its offset
+            (_, offset), = reader.locate_parts(path)[1:]
+            save_conll(path, None, mapping, output, offset=offset)
+            self.assertEqual(output.read_text().splitlines(), spliced)
+
+    def test_parse_sentences(self):
+        """
+        sentences of a stream are parsed one at a time,
+        the part changes with each new document
+        """
+        reader = ConllParser()
+        text = self.conll + self.conll.replace("000", "001")
+        sentences = list(reader.parse_sentences(text.splitlines()))
+        whole = reader.parse_string(self.conll)
+
+        self.assertEqual([i[0] for i in sentences], [0, 0, 1, 1])
+        part, tokens, pos_tags, ner, tree = sentences[1]
+        self.assertEqual(tokens, whole[1][5:])
+        self.assertEqual(pos_tags, whole[2][5:])
+        self.assertEqual(ner, whole[3][5:])
+        self.assertEqual(tree, whole[4][1])
+
+    def test_online_resolver(self):
+        """
+        the online resolver returns each cluster once it has two
+        mentions and keeps only the sentences in the window
+        """
+        reader = ConllParser()
+        mps = MultiPassSieve(["ExactMatch", "PreciseConstructs"])
+        resolver = OnlineResolver(mps, window=1)
+        text = self.conll.replace("#end document\n", "") * 3
+
+        updates = [
+            resolver.add_sentence(*sentence[1:])
+            for sentence in reader.parse_sentences(text.splitlines())
+        ]
+
+        self.assertEqual(updates[0], {})
+        self.assertEqual(
+            updates[1], {0: [(0, 0), (5, 5)], 1: [(2, 3), (7, 8)]}
+        )
+        self.assertEqual(updates[5], {0: [(25, 25)], 1: [(27, 28)]})
+        self.assertEqual(len(resolver.sentences.items), 1)
+        self.assertEqual(len(resolver), 2)
+        self.assertEqual(len(resolver.document.tokens.items), 5)
+        with self.assertRaises(IndexError):
+            resolver.document.tokens[0]
+
+        # the windows of the sieves are limited
+        # without changing the MultiPassSieve
+        mps = MultiPassSieve(["StrictHeadMatch"])
+        resolver = OnlineResolver(mps, window=2)
+        self.assertEqual(resolver.sieves[0].window, 2)
+        self.assertIsNone(mps.sieves[0].window)
+
+        # sieves that only search the sentence of the mention
+        mps = MultiPassSieve(["ExactMatch"], {"ExactMatch": 0})
+        resolver = OnlineResolver(mps)
+        self.assertEqual(resolver.window, 1)
+        self.assertEqual(resolver.sieves[0].window, 0)
+        updates = [
+            resolver.add_sentence(*sentence[1:])
+            for sentence in reader.parse_sentences(text.splitlines())
+        ]
+        self.assertEqual(updates[1], {})
@@ -0,0 +1,96 @@
+from collections import deque
+import json
+import unittest
+
+from src.main_functions import service
+
+
+class Test(unittest.TestCase):
+
+    conll = (
+        "#begin document (test); part 000\n"
+        "test 0 0 John NNP (TOP(S(NP*) - - - - (PERSON) * -\n"
+        "test 0 1 saw VBD (VP* - - - - * * -\n"
+        "test 0 2 the DT (NP* - - - - * * -\n"
+        "test 0 3 ship NN *)) - - - - * * -\n"
+        "test 0 4 . . *)) - - - - * * -\n"
+        "\n"
+        "test 0 0 John NNP (TOP(S(NP*) - - - - (PERSON) * -\n"
+        "test 0 1 liked VBD (VP* - - - - * * -\n"
+        "test 0 2 the DT (NP* - - - - * * -\n"
+        "test 0 3 ship NN *)) - - - - * * -\n"
+        "test 0 4 . . *)) - - - - * * -\n"
+        "\n"
+        "#end document\n"
+    )
+
+    def setUp(self):
+        service.init_resolver(["ExactMatch"], None)
+
+    def test_resolve(self):
+        """
+        a document is resolved, the errors of a
+        request are returned in the response
+        """
+        response = service.resolve({"id": "doc", "conll": self.conll})
+
+        self.assertEqual(response["id"], "doc")
+        self.assertEqual(
+            response["clusters"], [[[0, 0], [5, 5]], [[2, 3], [7, 8]]]
+        )
+        self.assertEqual(response["tokens"], 10)
+        self.assertNotIn("error", response)
+        self.assertIn("latency_ms", response)
+
+        response = service.resolve({"id": "bad"})
+        self.assertEqual(response["error"], "KeyError: 'conll'")
+
+        # metrics requests are returned as they are
+        request = {"id": "m", "metrics": True}
+        self.assertIs(service.resolve(request), request)
+
+        # an error sent by the client is not trusted
+        response = service.resolve(
+            {"id": "doc", "conll": self.conll, "error": "fake"}
+        )
+        self.assertNotIn("error", response)
+        self.assertEqual(len(response["clusters"]), 2)
+
+        response = service.resolve({"id": "c", "error": "fake"})
+        self.assertEqual(response["error"], "KeyError: 'conll'")
+
+    def test_read_requests(self):
+        """
+        each line is a request, lines that are not json
+        objects become requests with an error
+        """
+        lines = [
+            json.dumps({"id": "doc", "conll": self.conll}),
+            "{not json",
+            "[1]",
+            "",
+            '{"id": "m", "metrics": true}'
+        ]
+        submitted = deque()
+        requests = list(service.read_requests(lines, submitted))
+
+        self.assertEqual(len(requests), 4)
+        self.assertEqual(len(submitted), 4)
+        self.assertEqual(requests[0]["id"], "doc")
+        self.assertIsInstance(requests[1], service.InvalidRequest)
+        self.assertTrue(requests[1].error.startswith("JSONDecodeError"))
+        self.assertEqual(
+            requests[2].error,
+            "InvalidRequest: expected an object, got list"
+        )
+        self.assertEqual(requests[3], {"id": "m", "metrics": True})
+
+        # the responses of invalid requests keep the error
+        responses = [service.resolve(i) for i in requests]
+        self.assertEqual(len(responses[0]["clusters"]), 2)
+        for response in responses[1:3]:
+            self.assertIsNone(response["id"])
+            self.assertTrue(response["error"].startswith(
+                ("JSONDecodeError", "InvalidRequest")
+            ))
+        self.assertIn("metrics", responses[3])
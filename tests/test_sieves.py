@@ -1,11 +1,23 @@
+from concurrent.futures import ThreadPoolExecutor
+import os
+from pathlib import Path
+import tempfile
 import unittest
 
 from nltk.tree import Tree
 
+from mps.budget import Budget
+from mps.checkpoints import fingerprint
+from mps.multi_pass_sieve import MultiPassSieve
 from mps.text.word import Word
 from mps.text.document import Document
 from mps.text.cluster_container import ClusterContainer
+from mps.text.lexicon import build_lexicon
+from mps.text.mention import Mention
 from mps.sieves.exact_match_sieve import ExactMatch
+from mps.sieves.head_match_sieve import (
+    ProperHeadWordMatch, RelaxedHeadMatch, StrictHeadMatch
+)
 from mps.sieves.precise_constructs_sieve import PreciseConstructs
 from mps.sieves.pronoun_sieve import Pronoun
 
@@ -131,6 +143,20 @@ class Test(unittest.TestCase):
         # [[Crew members] injured in the explosion on the `` USS Cole '']
         self.assertEqual(cl[0].cluster, cl[1].cluster)
 
+    def test_precise_construct_sieve_released_trees(self):
+        """
+        test the precise construc sieve:
+        head of construct after the trees were released
+        """
+        doc, cl = self.get_doc()
+        doc.release_trees()
+        sieve = PreciseConstructs()
+        cl = sieve(doc, cl)
+
+        # 0 and 1 should be coreferential
+        # [[Crew members] injured in the explosion on the `` USS Cole '']
+        self.assertEqual(cl[0].cluster, cl[1].cluster)
+
     def test_precise_construct_sieve_acronym(self):
         """
         test the precise construc sieve:
@@ -157,6 +183,139 @@ class Test(unittest.TestCase):
         # [Most] are [them]
         self.assertEqual(cl[8].cluster, cl[6].cluster)
 
+    def test_candidates_window(self):
+        """
+        test the number of sentences searched
+        for candidates
+        """
+        doc, cl = self.get_doc()
+
+        # [the blast] is the last mention of the last sentence
+        mention = cl[len(cl) - 1]
+        in_window = [
+            len(list(cl.get_candidates(mention, doc, window=window)))
+            for window in (0, 1, 2, None)
+        ]
+        gold = [
+            len(doc.lr[2]) - 1,
+            len(doc.lr[2]) - 1 + len(doc.lr[1]),
+            len(doc.nps) - 1,
+            len(doc.nps) - 1
+        ]
+
+        self.assertEqual(in_window, gold)
+
+    def test_candidates_budget(self):
+        """
+        test that the candidates of a mention are capped
+        and that the exceeded budget is recorded
+        """
+        doc, cl = self.get_doc()
+        mention = cl[len(cl) - 1]
+
+        cl.max_candidates = 3
+        candidates = list(cl.get_candidates(mention, doc, window=None))
+        self.assertEqual(len(candidates), 3)
+        self.assertEqual(cl.exceeded, {"candidates"})
+
+    def test_budget_fallback(self):
+        """
+        test that degraded documents only
+        run the cheap sieves
+        """
+        sieves = ["ExactMatch", "PreciseConstructs"]
+
+        # no sentence has more than 20 mentions
+        mps = MultiPassSieve(sieves, budget=Budget(mentions=20))
+        cl = mps(self.get_doc()[0])
+        self.assertEqual(cl.exceeded, set())
+        self.assertEqual(cl[13].cluster, cl[14].cluster)
+
+        # only ExactMatch is applied
+        mps = MultiPassSieve(sieves, budget=Budget(mentions=2))
+        cl = mps(self.get_doc()[0])
+        self.assertEqual(cl.exceeded, {"mentions"})
+        self.assertEqual(cl[2].cluster, cl[5].cluster)
+        self.assertNotEqual(cl[13].cluster, cl[14].cluster)
+
+        # the time is over before the first sieve
+        mps = MultiPassSieve(sieves, budget=Budget(seconds=-1))
+        cl = mps(self.get_doc()[0])
+        self.assertEqual(cl.exceeded, {"seconds"})
+        self.assertEqual(cl[2].cluster, cl[5].cluster)
+        self.assertNotEqual(cl[13].cluster, cl[14].cluster)
+
+    def test_checkpoints(self):
+        """
+        test that resuming from a checkpoint gives
+        the same clusters as applying all sieves
+        """
+        sieves = ["ExactMatch", "PreciseConstructs", "Pronoun"]
+        gold = MultiPassSieve(sieves)(self.get_doc()[0]).convert_mapping()
+
+        with tempfile.TemporaryDirectory() as path:
+            mps = MultiPassSieve(sieves, checkpoints=path)
+            cl = mps(self.get_doc()[0])
+            self.assertEqual(cl.convert_mapping(), gold)
+            self.assertFalse(cl.resumed)
+
+            mps = MultiPassSieve(
+                sieves, checkpoints=path, resume_after="PreciseConstructs"
+            )
+            cl = mps(self.get_doc()[0])
+            self.assertTrue(cl.resumed)
+            self.assertEqual(cl.convert_mapping(), gold)
+
+            # other windows are saved in other checkpoints
+            mps = MultiPassSieve(
+                sieves, {"ExactMatch": 0}, checkpoints=path,
+                resume_after="PreciseConstructs"
+            )
+            self.assertFalse(mps(self.get_doc()[0]).resumed)
+
+    def test_checkpoint_keys(self):
+        """
+        a lexicon rebuilt at the same path changes the checkpoints,
+        the budget does not. Checkpoints of the same document can
+        be saved at the same time by different threads
+        """
+        sieves = ["ExactMatch", "Pronoun"]
+        with tempfile.TemporaryDirectory() as path:
+            lexicon = Path(path) / "gender.lex"
+            build_lexicon([("john", 1)], lexicon)
+            first = MultiPassSieve(sieves, lexicon=lexicon, checkpoints=path)
+            budget = MultiPassSieve(
+                sieves, lexicon=lexicon, checkpoints=path,
+                budget=Budget(candidates=10)
+            )
+            self.assertEqual(first.prefixes, budget.prefixes)
+
+            stamp = os.stat(lexicon).st_mtime_ns + 10 ** 9
+            build_lexicon([("john", 2)], lexicon)
+            os.utime(lexicon, ns=(stamp, stamp))
+            rebuilt = MultiPassSieve(
+                sieves, lexicon=lexicon, checkpoints=path
+            )
+            self.assertNotEqual(first.prefixes, rebuilt.prefixes)
+
+            doc = self.get_doc()[0]
+            journal = first(doc).journal
+            key = fingerprint(doc)
+            with ThreadPoolExecutor(4) as pool:
+                list(pool.map(
+                    lambda _: first.checkpoints.save(
+                        first.prefixes[-1], key, journal
+                    ),
+                    range(20)
+                ))
+
+            directory = Path(path) / first.prefixes[-1]
+            self.assertEqual(
+                [i.name for i in directory.iterdir()], [f"{key}.ckpt"]
+            )
+            loaded = first.checkpoints.load(first.prefixes[-1], key)
+            self.assertEqual(list(loaded), list(journal))
+
     def test_pronoun_sieve(self):
         """
         test pronoun sieve
@@ -169,3 +328,98 @@ class Test(unittest.TestCase):
         # [Crew members injured in the explosion
         # on the `` USS Cole ''] ... [them]
         self.assertEqual(cl[1].cluster, cl[8].cluster)
+
+    def get_mentions(self, *mentions):
+        """
+        prepare a cluster container with one mention
+        per sentence, each mention is a list of
+        (word, tag, named entity)
+        """
+        index = 0
+        created = []
+        for sentence, words in enumerate(mentions):
+            created.append(Mention([
+                Word(symbol, index + i, sentence, tag, ne)
+                for i, (symbol, tag, ne) in enumerate(words)
+            ]))
+            index += len(words)
+
+        return ClusterContainer(created)
+
+    def test_strict_head_match(self):
+        """
+        test the strict head match sieve
+        """
+        court = [
+            ("the", "DT", None), ("Florida", "NNP", "ORG"),
+            ("Supreme", "NNP", "ORG"), ("Court", "NNP", "ORG")
+        ]
+        cl = self.get_mentions(
+            court,
+            [("the", "DT", None), ("Florida", "NNP", "ORG"),
+             ("court", "NN", None)],
+            [("Florida", "NNP", "GPE")],
+            [("the", "DT", None), ("Florida", "NNP", None),
+             ("election", "NN", None)]
+        )
+        cl = StrictHeadMatch()(None, cl)
+
+        # [the Florida Supreme Court] ... [the Florida court]
+        self.assertEqual(cl[0].cluster, cl[1].cluster)
+        # the head of [the Florida Supreme Court] is Court
+        self.assertNotEqual(cl[0].cluster, cl[2].cluster)
+        # [the Florida election] has a word not in the cluster
+        self.assertNotEqual(cl[0].cluster, cl[3].cluster)
+
+        # candidates only come from the index
+        doc, cl = self.get_doc()
+        cl = StrictHeadMatch()(doc, cl)
+
+        # [the `` USS Cole ''] ... [the `` USS Cole '']
+        self.assertEqual(cl[4].cluster, cl[20].cluster)
+
+    def test_proper_head_word_match(self):
+        """
+        test the proper head word match sieve
+        """
+        cl = self.get_mentions(
+            [("Apollo", "NNP", None), ("11", "CD", None)],
+            [("Apollo", "NNP", None), ("13", "CD", None)],
+            [("Apollo", "NNP", None)]
+        )
+        cl = ProperHeadWordMatch()(None, cl)
+
+        # [Apollo 11] ... [Apollo 13] have different numbers
+        self.assertNotEqual(cl[0].cluster, cl[1].cluster)
+        # [Apollo] is linked to the closest mention
+        self.assertEqual(cl[1].cluster, cl[2].cluster)
+
+    def test_relaxed_head_match(self):
+        """
+        test the relaxed head match sieve
+        """
+        mentions = [
+            [("Senator", "NNP", "PERSON"), ("Bernie", "NNP", "PERSON"),
+             ("Sanders", "NNP", "PERSON")],
+            [("Bernie", "NNP", "PERSON")],
+            [("Senator", "NNP", None)]
+        ]
+        cl = RelaxedHeadMatch()(None, self.get_mentions(*mentions))
+        strict = StrictHeadMatch()(None, self.get_mentions(*mentions))
+
+        # [Senator Bernie Sanders] ... [Bernie]
+        self.assertEqual(cl[0].cluster, cl[1].cluster)
+        self.assertNotEqual(strict[0].cluster, strict[1].cluster)
+        # [Senator] is not a named entity
+        self.assertNotEqual(cl[0].cluster, cl[2].cluster)
+
+        # the head can match the word of a later mention of the
+        # cluster: [Sanders] ... [Bernie] ... [Bernie Sanders]
+        cl = self.get_mentions(
+            [("Sanders", "NNP", "PERSON")],
+            [("Bernie", "NNP", "PERSON")],
+            [("Bernie", "NNP", "PERSON"), ("Sanders", "NNP", "PERSON")]
+        )
+        cl.merge(cl[2], cl[0])
+        cl = RelaxedHeadMatch()(None, cl)
+        self.assertEqual(cl[0].cluster, cl[1].cluster)
@@ -0,0 +1,48 @@
+from pathlib import Path
+import tempfile
+import unittest
+
+from src.utils.store import ResultStore
+
+
+class Test(unittest.TestCase):
+
+    def test_runs(self):
+        """
+        clusters are saved per run and read back
+        in the same format as the TSV files
+        """
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "results.sqlite"
+            store = ResultStore(path, batch=2)
+
+            first = store.new_run({"sieves": ["ExactMatch"]})
+            store.add("a.conll", "preds", {0: [(0, 0), (5, 5)], 1: [(2, 3)]})
+            store.add("a.conll", "gold", {3: [(0, 0), (5, 5)]})
+            store.add("b.conll", "preds", {0: [(1, 1)]})
+            links = [("ExactMatch", "surface", (5, 5), (0, 0))]
+            store.add_links("a.conll", links)
+
+            second = store.new_run()
+            store.add("a.conll", "preds", {0: [(2, 3), (7, 8)]})
+            store.close()
+
+            self.assertTrue(ResultStore.is_store(path))
+            self.assertFalse(ResultStore.is_store(tmp))
+
+            store = ResultStore(path)
+            self.assertEqual(store.last_run(), second)
+            self.assertEqual(store.documents(first), ["a.conll", "b.conll"])
+            self.assertEqual(
+                store.clusters(first, "a.conll", "preds"),
+                {0: [(0, 0), (5, 5)]}
+            )
+            self.assertEqual(store.clusters(first, "b.conll", "gold"), {})
+            self.assertEqual(
+                store.clusters(second, "a.conll", "preds"),
+                {0: [(2, 3), (7, 8)]}
+            )
+            self.assertEqual(store.runs()[0][2], {"sieves": ["ExactMatch"]})
+            self.assertEqual(store.links(first, "a.conll"), links)
+            self.assertEqual(store.links(second, "a.conll"), [])
+            store.close()
@@ -0,0 +1,98 @@
+import io
+import json
+from pathlib import Path
+import tempfile
+import unittest
+
+from src.utils.telemetry import Telemetry
+
+
+class Test(unittest.TestCase):
+
+    def test_histogram(self):
+        """
+        latencies are counted in the first bucket
+        whose upper bound is not exceeded
+        """
+        telemetry = Telemetry(5, stream=io.StringIO())
+        for seconds in (0.0005, 0.001, 0.003, 0.5, 20):
+            telemetry.update({"seconds": seconds})
+
+        histogram = telemetry.report()["latency_histogram"]
+        self.assertEqual(histogram["<=1ms"], 2)
+        self.assertEqual(histogram["<=5ms"], 1)
+        self.assertEqual(histogram["<=500ms"], 1)
+        self.assertEqual(histogram[">10000ms"], 1)
+        self.assertEqual(sum(histogram.values()), 5)
+
+    def test_slowest(self):
+        """
+        only the top slowest documents are kept,
+        sorted from the slowest
+        """
+        telemetry = Telemetry(None, top=3, stream=io.StringIO())
+        for i, seconds in enumerate((0.3, 0.1, 0.5, 0.2, 0.4, 0.3)):
+            telemetry.update({"document": f"d{i}", "seconds": seconds})
+
+        slowest = telemetry.report()["slowest"]
+        self.assertEqual(
+            [i["document"] for i in slowest], ["d2", "d4", "d5"]
+        )
+
+    def test_progress(self):
+        """
+        with an unknown total the progress line only ends
+        with finish, otherwise when all documents are done
+        """
+        stream = io.StringIO()
+        telemetry = Telemetry(None, prefix="Test", stream=stream)
+        telemetry.update({"tokens": 10})
+        telemetry.update({"tokens": 5})
+        self.assertNotIn("\n", stream.getvalue())
+
+        telemetry.finish()
+        output = stream.getvalue()
+        self.assertTrue(output.endswith("\n"))
+        self.assertIn("Test: 2 |", output.splitlines()[-1])
+        self.assertIn("tokens/s", output)
+
+        stream = io.StringIO()
+        telemetry = Telemetry(2, prefix="Test", stream=stream)
+        telemetry.update()
+        telemetry.update()
+        last = stream.getvalue().split("\r")[-1]
+        self.assertTrue(last.startswith("Test: 2/2 ["))
+        self.assertIn("100.0%", last)
+        self.assertTrue(last.endswith("\n"))
+
+        # finish only prints if the total was not known
+        telemetry.finish()
+        self.assertEqual(stream.getvalue().count("\n"), 1)
+
+    def test_save(self):
+        """
+        the report is saved as json
+        """
+        telemetry = Telemetry(2, stream=io.StringIO())
+        telemetry.update({
+            "document": "a", "tokens": 100, "mentions": 20,
+            "seconds": 0.01, "budget": ["seconds"]
+        })
+        telemetry.update({
+            "document": "b", "tokens": 50, "mentions": 10,
+            "seconds": 0.002, "budget": ["seconds", "candidates"]
+        })
+
+        with tempfile.TemporaryDirectory() as tmp:
+            output = Path(tmp) / "metrics.json"
+            telemetry.save(output)
+            report = json.loads(output.read_text())
+
+        self.assertEqual(report["documents"], 2)
+        self.assertEqual(report["tokens"], 150)
+        self.assertEqual(report["mentions"], 30)
+        self.assertEqual(report["degraded"], {"seconds": 2, "candidates": 1})
+        self.assertEqual(
+            [i["document"] for i in report["slowest"]], ["a", "b"]
+        )
+        self.assertEqual(sum(report["latency_histogram"].values()), 2)